@@ -0,0 +1,194 @@
+import argparse
+import csv
+import importlib
+import json
+import math
+import os
+import pkgutil
+import random
+import statistics
+import time
+
+'''
+    排序算法的基准测试:
+        自动发现 sort 目录下所有 sort_*.py 中带 sort() 和 name() 的模块
+        输入分布: random sorted reversed few_unique sawtooth organ_pipe, 规模从 10^2 到 10^7 按 10 倍递增
+        每组先预热, 再重复计时 (time.perf_counter_ns, 复制数据不计时), 记录 中位数 p95 最小值 平均值 (纳秒)
+    按前两个规模的耗时增长估计下一个规模 (至少按 10 倍), 预计单次排序超过 budget 秒时不再测更大的规模
+    (冒泡之类的 O(n^2) 算法在 10^3 ~ 10^4 就会停下), 出错的 (例如递归过深) 同样不再测更大的规模, 都记录在 skipped 中
+
+    结果输出为 JSON 或 CSV, 用来挑选算法:
+        python -m sort.bench --max-size 100000 --json bench.json --csv bench.csv
+        python -m sort.bench --sorts tim quick --distributions sorted few_unique
+'''
+
+DISTRIBUTIONS = ('random', 'sorted', 'reversed', 'few_unique', 'sawtooth', 'organ_pipe')
+MIN_SIZE = 100
+MAX_SIZE = 10 ** 7
+MAX_VALUE = 1 << 30
+WARMUP = 1
+REPEAT = 5
+BUDGET = 10.0  # 秒, 单次排序预计耗时的上限, 也是每组重复计时的总时长
+FIELDS = ['sort', 'distribution', 'size', 'repeat', 'median_ns', 'p95_ns', 'min_ns', 'mean_ns']
+
+
+def discover() -> {}:
+    """ name() -> 模块, 按 name 排序 """
+    sorts = {}
+    for module_info in pkgutil.iter_modules([os.path.dirname(os.path.abspath(__file__))]):
+        if not module_info.name.startswith('sort_'):
+            continue
+        module = importlib.import_module('sort.' + module_info.name)
+        if hasattr(module, 'sort') and hasattr(module, 'name'):
+            sorts[module.name()] = module
+    return dict(sorted(sorts.items()))
+
+
+def generate(distribution, size, seed=0) -> []:
+    rng = random.Random('%s-%s-%s' % (distribution, size, seed))
+    if distribution == 'random':
+        return [rng.randrange(MAX_VALUE) for x in range(size)]
+    if distribution == 'sorted':
+        return list(range(size))
+    if distribution == 'reversed':
+        return list(range(size, 0, -1))
+    if distribution == 'few_unique':
+        return [rng.randrange(16) for x in range(size)]
+    if distribution == 'sawtooth':
+        period = max(1, size // 10)  # 10 段升序
+        return [x % period for x in range(size)]
+    if distribution == 'organ_pipe':
+        half = size // 2
+        return list(range(half)) + list(range(size - half, 0, -1))
+    raise ValueError('unknown distribution %s' % distribution)
+
+
+def sizes(min_size=MIN_SIZE, max_size=MAX_SIZE) -> [int]:
+    result = []
+    size = min_size
+    while size <= max_size:
+        result.append(size)
+        size *= 10
+    return result
+
+
+def measure(module, data, repeat=REPEAT, warmup=WARMUP, budget=BUDGET) -> [int]:
+    """ 每次排序 data 的副本, 超过 budget 秒后不再重复 (至少 1 次) """
+    deadline = time.perf_counter_ns() + int(budget * 1e9)
+    times = []
+    for i in range(warmup + repeat):
+        target = data[:]
+        start = time.perf_counter_ns()
+        module.sort(target)
+        end = time.perf_counter_ns()
+        if i >= warmup or end > deadline:
+            times.append(end - start)
+        if end > deadline:
+            break
+    return times
+
+
+def stats(times) -> {}:
+    ordered = sorted(times)
+    return {
+        'repeat': len(ordered),
+        'median_ns': int(statistics.median(ordered)),
+        'p95_ns': ordered[max(0, math.ceil(len(ordered) * 0.95) - 1)],
+        'min_ns': ordered[0],
+        'mean_ns': int(statistics.fmean(ordered)),
+    }
+
+
+def run(sorts=None, distributions=DISTRIBUTIONS, min_size=MIN_SIZE, max_size=MAX_SIZE,
+        repeat=REPEAT, warmup=WARMUP, budget=BUDGET, seed=0, check=False) -> {}:
+    """
+    :param sorts: 参与的 name(), 默认全部
+    :param check: 检查排序结果, 不正确的记为出错
+    :return: {rows: [{sort distribution size ...统计}], skipped: [{sort distribution size reason}]}
+    """
+    modules = discover()
+    if sorts is not None:
+        modules = {name: modules[name] for name in sorts}
+
+    rows = []
+    skipped = []
+    for distribution in distributions:
+        stopped = {}  # name -> 原因
+        last = {}  # name -> 上一个规模的最短耗时
+        for size in sizes(min_size, max_size):
+            data = generate(distribution, size, seed)
+            expect = sorted(data) if check else None
+            for name, module in modules.items():
+                if name in stopped:
+                    skipped.append({'sort': name, 'distribution': distribution, 'size': size,
+                                    'reason': stopped[name]})
+                    continue
+                try:
+                    times = measure(module, data, repeat, warmup, budget)
+                    if check and module.sort(data[:]) != expect:
+                        raise ValueError('wrong result')
+                except (RecursionError, ValueError, IndexError) as error:
+                    stopped[name] = 'error: %s' % error
+                    skipped.append({'sort': name, 'distribution': distribution, 'size': size,
+                                    'reason': stopped[name]})
+                    continue
+
+                row = {'sort': name, 'distribution': distribution, 'size': size}
+                row.update(stats(times))
+                rows.append(row)
+                fastest = min(times)
+                projected = fastest * max(10, fastest / last[name] if last.get(name) else 10)
+                last[name] = fastest
+                if projected > budget * 1e9:
+                    stopped[name] = 'projected %.1fs after %s' % (projected / 1e9, size)
+    return {'rows': rows, 'skipped': skipped}
+
+
+def write_json(result, path):
+    with open(path, 'w') as file:
+        json.dump(result, file, indent=2)
+
+
+def write_csv(result, path):
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(result['rows'])
+
+
+def format_table(result) -> str:
+    lines = ['%-8s %-12s %10s %14s %14s' % ('sort', 'distribution', 'size', 'median_ms', 'p95_ms')]
+    for row in result['rows']:
+        lines.append('%-8s %-12s %10s %14.3f %14.3f' % (row['sort'], row['distribution'], row['size'],
+                                                        row['median_ns'] / 1e6, row['p95_ns'] / 1e6))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark the sort modules')
+    parser.add_argument('--sorts', nargs='*', help='names returned by name(), default all')
+    parser.add_argument('--distributions', nargs='*', default=list(DISTRIBUTIONS), choices=DISTRIBUTIONS)
+    parser.add_argument('--min-size', type=int, default=MIN_SIZE)
+    parser.add_argument('--max-size', type=int, default=MAX_SIZE)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--warmup', type=int, default=WARMUP)
+    parser.add_argument('--budget', type=float, default=BUDGET, help='max projected seconds of a single run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check', action='store_true', help='verify every result against sorted()')
+    parser.add_argument('--json')
+    parser.add_argument('--csv')
+    args = parser.parse_args()
+
+    result = run(args.sorts, args.distributions, args.min_size, args.max_size, args.repeat, args.warmup,
+                 args.budget, args.seed, args.check)
+    if args.json:
+        write_json(result, args.json)
+    if args.csv:
+        write_csv(result, args.csv)
+    print(format_table(result))
+    for item in result['skipped']:
+        print('skipped %(sort)s %(distribution)s %(size)s: %(reason)s' % item)
+
+
+if __name__ == '__main__':
+    main()
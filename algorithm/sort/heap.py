@@ -3,97 +3,309 @@
     小顶堆： i <= 2*i 且 i<2*i+1 即父节点大于等于左右子节点
     大顶堆： 相反
     这里我使用小顶堆
+
+    Heap: 从 0 开始存储的 d 叉小顶堆(默认二叉)，父节点 (i-1)//d，子节点 d*i+1 ~ d*i+d
+        push/pop O(log n)，heapify 自底向上下滤 O(n)，批量 push 时新增的元素多就直接重新 heapify
+    PriorityQueue: 在 Heap 上记录每个元素在数组中的位置，可以按元素 降低/提高 优先级或删除，都是 O(log n)
+        优先级相同时先进先出，元素需要可哈希且不重复，适合用在调度中
+    下面的函数是原来从 1 开始存储的写法，保留给旧的调用
 """
 
+import itertools
+
+
+class Heap:
+    def __init__(self, data=None, d=2):
+        if d < 2:
+            raise ValueError('d must be at least 2')
+        self.d = d
+        self.items = [] if data is None else list(data)
+        self.heapify()
+
+    def __len__(self):
+        return len(self.items)
+
+    def heapify(self):
+        """ 自底向上，从最后一个有子节点的位置开始下滤 """
+        for index in range((len(self.items) - 2) // self.d, -1, -1):
+            self.sift_down(index)
+
+    def push(self, value):
+        self.items.append(value)
+        self.sift_up(len(self.items) - 1)
+
+    def push_all(self, values):
+        values = list(values)
+        if len(values) > len(self.items):  # 逐个 push 的 k log(n+k) 大于重建的 n+k
+            self.items.extend(values)
+            self.heapify()
+        else:
+            for value in values:
+                self.push(value)
+
+    def peek(self):
+        if len(self.items) == 0:
+            raise IndexError('peek from empty heap')
+        return self.items[0]
+
+    def pop(self):
+        """ 删除并返回最小值，最后一个元素移到堆顶后下滤 """
+        if len(self.items) == 0:
+            raise IndexError('pop from empty heap')
+        last = self.items.pop()
+        if len(self.items) == 0:
+            return last
+        top = self.items[0]
+        self.items[0] = last
+        self.sift_down(0)
+        return top
+
+    def sift_up(self, index):
+        items = self.items
+        d = self.d
+        value = items[index]
+        while index > 0:
+            parent = (index - 1) // d
+            if not value < items[parent]:
+                break
+            items[index] = items[parent]
+            index = parent
+        items[index] = value
+
+    def sift_down(self, index):
+        items = self.items
+        d = self.d
+        size = len(items)
+        value = items[index]
+        while True:
+            first = d * index + 1
+            if first >= size:
+                break
+            child = first
+            for other in range(first + 1, min(first + d, size)):
+                if items[other] < items[child]:
+                    child = other
+            if not items[child] < value:
+                break
+            items[index] = items[child]
+            index = child
+        items[index] = value
+
+
+class PriorityQueue(Heap):
+    def __init__(self, pairs=None, d=2):
+        """ :param pairs: [(元素, 优先级)] """
+        self.counter = itertools.count()  # 优先级相同时按加入的顺序
+        self.positions = {}  # 元素 -> 在 items 中的位置
+        entries = []
+        if pairs is not None:
+            for item, priority in pairs:
+                if item in self.positions:
+                    raise KeyError('duplicate item %r' % (item,))
+                self.positions[item] = len(entries)
+                entries.append((priority, next(self.counter), item))
+        super().__init__(entries, d)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def priority(self, item):
+        return self.items[self.positions[item]][0]
+
+    def push(self, item, priority):
+        if item in self.positions:
+            raise KeyError('duplicate item %r' % (item,))
+        self.positions[item] = len(self.items)
+        super().push((priority, next(self.counter), item))
+
+    def push_all(self, pairs):
+        """ 先检查整批元素(与已有的以及批内)都不重复, 有重复时队列不变 """
+        pairs = list(pairs)
+        seen = set()
+        for item, priority in pairs:
+            if item in self.positions or item in seen:
+                raise KeyError('duplicate item %r' % (item,))
+            seen.add(item)
+        if len(pairs) <= len(self.items):
+            for item, priority in pairs:
+                self.push(item, priority)
+            return
+        for item, priority in pairs:
+            self.positions[item] = len(self.items)
+            self.items.append((priority, next(self.counter), item))
+        self.heapify()
+
+    def peek(self):
+        """ 返回 (元素, 优先级) """
+        priority, order, item = super().peek()
+        return item, priority
+
+    def pop(self):
+        """ 删除并返回优先级最小的 (元素, 优先级) """
+        priority, order, item = super().pop()
+        del self.positions[item]
+        if len(self.items) != 0:
+            self.positions[self.items[0][2]] = 0
+        return item, priority
+
+    def decrease_key(self, item, priority):
+        """ 降低优先级，上滤 """
+        index = self.positions[item]
+        old, order, item = self.items[index]
+        if old < priority:
+            raise ValueError('new priority %r is greater than %r' % (priority, old))
+        self.items[index] = (priority, order, item)
+        self.sift_up(index)
+
+    def increase_key(self, item, priority):
+        """ 提高优先级，下滤 """
+        index = self.positions[item]
+        old, order, item = self.items[index]
+        if priority < old:
+            raise ValueError('new priority %r is less than %r' % (priority, old))
+        self.items[index] = (priority, order, item)
+        self.sift_down(index)
+
+    def update(self, item, priority):
+        """ 不确定方向时使用 """
+        if priority < self.priority(item):
+            self.decrease_key(item, priority)
+        else:
+            self.increase_key(item, priority)
+
+    def delete(self, item):
+        """ 删除任意元素，最后一个元素填到它的位置后按大小上滤或下滤，返回被删除元素的优先级 """
+        index = self.positions.pop(item)
+        removed = self.items[index]
+        last = self.items.pop()
+        if index < len(self.items):
+            self.items[index] = last
+            self.positions[last[2]] = index
+            if last < removed:
+                self.sift_up(index)
+            else:
+                self.sift_down(index)
+        return removed[0]
+
+    def sift_up(self, index):
+        items = self.items
+        positions = self.positions
+        d = self.d
+        entry = items[index]
+        while index > 0:
+            parent = (index - 1) // d
+            if not entry < items[parent]:
+                break
+            items[index] = items[parent]
+            positions[items[index][2]] = index
+            index = parent
+        items[index] = entry
+        positions[entry[2]] = index
+
+    def sift_down(self, index):
+        items = self.items
+        positions = self.positions
+        d = self.d
+        size = len(items)
+        entry = items[index]
+        while True:
+            first = d * index + 1
+            if first >= size:
+                break
+            child = first
+            for other in range(first + 1, min(first + d, size)):
+                if items[other] < items[child]:
+                    child = other
+            if not items[child] < entry:
+                break
+            items[index] = items[child]
+            positions[items[index][2]] = index
+            index = child
+        items[index] = entry
+        positions[entry[2]] = index
+
 
 def insert(heap, value):
     """ 将元素插入堆中 上滤"""
-    heap.append(0)  # 增加长度
-    index_parent = int((len(heap) - 1) / 2)  # 长度的一半就是父节点
-    index_space = len(heap) - 1
-    # print(index_parent, index_space, value, heap)
-    while index_space >= 1:
-        # 如果父节点比新值大，且父节点大于等于1（为了留个数组第一项出来）
-        if heap[index_parent] > value and index_parent >= 1:
-            heap[index_space] = heap[index_parent]
-            index_space = index_parent
-            index_parent = int(index_space / 2)
-        else:
-            heap[index_space] = value
+    heap.append(value)
+    sift_up(heap, len(heap) - 1)
+
+
+def sift_up(heap, index):
+    value = heap[index]
+    while index > 1 and value < heap[index // 2]:
+        heap[index] = heap[index // 2]
+        index //= 2
+    heap[index] = value
+
+
+def sift_down(heap, index):
+    value = heap[index]
+    size = len(heap)
+    while 2 * index < size:
+        child = 2 * index
+        if child + 1 < size and heap[child + 1] < heap[child]:
+            child += 1
+        if not heap[child] < value:
             break
+        heap[index] = heap[child]
+        index = child
+    heap[index] = value
 
 
 def check_heap(heap):
     """ 比较堆的有序性 """
-    flag = True
-    # start = int(len(heap)/8)
-    while flag:
-        flag = False
-        for i in range(2, len(heap)):
-            # 原本从2开始，对完整堆进行检查，现在只检查三层 提高 20% 左右效率但是会时不时出现bug
-            # 因为，如果是子节点填充父节点，只会可能导致这两层乱序，如果是相邻子节点填充当前父节点就有可能导致三层乱序
-            if heap[i] < heap[int(i / 2)]:
-                flag = True
-                temp = heap[i]
-                heap[i] = heap[int(i / 2)]
-                heap[int(i / 2)] = temp
+    for i in range(2, len(heap)):
+        if heap[i] < heap[i // 2]:
+            return False
+    return True
 
 
 def delete_min(heap):
-    if len(heap) == 3:
-        if heap[1] < heap[2]:
-            return heap.pop(1)
-        return heap.pop()
-    elif len(heap) == 2:
-        return heap.pop()
-    elif len(heap) == 1:
+    """ 最后一个元素移到堆顶下滤 O(log n)，空堆返回 None """
+    if len(heap) == 1:
         return None
-
+    last = heap.pop()
+    if len(heap) == 1:
+        return last
     result = heap[1]
-
-    # 重建式，效率更低
-    # heap[1] = heap.pop()
-    # heap.pop(0)
-    # heap = build_heap(heap)
-    # print(heap)
-
-    # 下滤
-    # 将第一个和最后一个踢出，层层往下比较，填充直到最后一层，然后将最后一个已经填充的数放入最后一个值
-    key = heap.pop()  # 最后一个弹出
-    space = 1
-    while 2 * space + 1 <= len(heap) - 1:
-        # print('空白',space, len(heap))
-        if heap[space * 2] < heap[space * 2 + 1]:
-            heap[space] = heap[space * 2]
-            space = 2 * space
-        else:
-            heap[space] = heap[space * 2 + 1]
-            space = space * 2 + 1
-    # 空到最后一层时，填充进已经填充好了的数，若发现填充破坏了堆的有序性，就交换
-    heap[space] = key
-    check_heap(heap)
-    # print('运算结束',heap,space)
+    heap[1] = last
+    sift_down(heap, 1)
     return result
 
 
 def build_heap(data):
-    """ 构建堆返回一个新列表 """
-    heap = [0]
-    for ele in data:
-        insert(heap, ele)
+    """ 构建堆返回一个新列表 自底向上下滤 O(n) """
+    heap = [0] + list(data)
+    for index in range((len(heap) - 1) // 2, 0, -1):
+        sift_down(heap, index)
     return heap
 
 
-def decrease_key():
-    """ 降低关键字的值， 降低处在指定位置的值 上滤操作"""
-    pass
+def decrease_key(heap, index, value):
+    """ 降低关键字的值， 降低处在指定位置的值 上滤"""
+    if heap[index] < value:
+        raise ValueError('new value %r is greater than %r' % (value, heap[index]))
+    heap[index] = value
+    sift_up(heap, index)
 
 
-def increase_key():
-    """ 增加关键字的值， 增加处在指定位置的值 下滤操作"""
-    pass
+def increase_key(heap, index, value):
+    """ 增加关键字的值， 增加处在指定位置的值 下滤"""
+    if value < heap[index]:
+        raise ValueError('new value %r is less than %r' % (value, heap[index]))
+    heap[index] = value
+    sift_down(heap, index)
 
 
-def delete():
-    """ 先decreaseKey上滤到顶层，然后delete"""
-    pass
+def delete(heap, index):
+    """ 最后一个元素填到该位置后上滤或下滤，返回被删除的值 """
+    removed = heap[index]
+    last = heap.pop()
+    if index < len(heap):
+        heap[index] = last
+        if last < removed:
+            sift_up(heap, index)
+        else:
+            sift_down(heap, index)
+    return removed
@@ -1,5 +1,5 @@
-import datetime
 import random
+import time
 import sys
 
 import sort.sort_radix as box
@@ -10,9 +10,11 @@ import sort.sort_shell as shell
 import sort.sort_merge as merge
 import sort.sort_quick as quick
 import sort.sort_heap as heap
+import sort.sort_tim as tim
 
 '''
     参数： [数量] [范围][排序类别][c 检查/s 展示]
+    这里每种排序只运行一次，用来检查结果，多次计时和按输入分布比较见 python -m sort.bench
 
     结论： 在效率上，箱排序，归并排序,快速排序 是同等级比较好的排序方法，但是列表自带的sort方法才是最6的 差了一个数量级
         快速一般要快于归并（如果数据大量重复就会慢，归并不受影响）
@@ -36,6 +38,7 @@ def main():
     flag_merge = False
     flag_quick = False
     flag_heap = False
+    flag_tim = False
     flag_all = True  # 如果没有指定排序就是全部
 
     # 得到参数，如果是 python main.py s c 就输出数据信息并且检查排序结果
@@ -71,11 +74,13 @@ def main():
                 flag_quick = True
             if param == 'he':
                 flag_heap = True
+            if param == 'ti':
+                flag_tim = True
 
     # 如果没有指定参数就默认是全部排序运行
     if flag_all:
         flag_box = flag_merge = flag_quick = True
-        flag_bubble = flag_insert = flag_select = flag_shell = flag_heap = True
+        flag_bubble = flag_insert = flag_select = flag_shell = flag_heap = flag_tim = True
 
     # 生成随机数据
     origin_data = [random.randint(1, max_num) for x in range(sort_size)]
@@ -99,6 +104,8 @@ def main():
         run_sort(shell, origin_data, '希尔排序', detail, check)
     if flag_heap:
         run_sort(heap, origin_data, '堆排序', detail, check)
+    if flag_tim:
+        run_sort(tim, origin_data, 'TimSort', detail, check)
 
     print('-' * 30 + ' 开始列表sort方法排序')
     data = origin_data[:]  # 复制数据，为了不影响其他排序算法
@@ -155,9 +162,9 @@ def show_list(data, title, show=True, check=False):
 def get_time(start=None):
     """得到时间，计算运行时间的函数"""
 
-    now = datetime.datetime.now()
+    now = time.perf_counter_ns()
     if start is not None:
-        print('排序耗时', now - start)
+        print('排序耗时 %.3f ms' % ((now - start) / 1e6))
     return now
 
 
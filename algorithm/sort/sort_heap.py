@@ -4,20 +4,15 @@ import sort.heap as heap
     堆排序： 构建堆，不停删除堆顶，然后重建堆，达到排序的目的，
         
     性能略差于其他排序(八种排序中最差的了，可能是受编写的影响)，几乎不受重复数据影响
+    现在建立在 heap.Heap 上: 自底向上建堆 O(n)，每次删除堆顶下滤 O(log n)，总共 O(n log n)
 '''
 
 
-def sort(data):
-    heap_list = heap.build_heap(data)
-    # print('得到堆',heap_list)
-    data = []
-    while True:
-        ele = heap.delete_min(heap_list)
-        # if len(heap_list) >= 3:
-        #     heap_list = heap.build_heap(heap_list)
-        if ele is None:
-            break
-        data.append(ele)
+def sort(data, d=2):
+    """ :param d: 堆的叉数，4 叉堆的层数少一半，比较次数相近时移动更少 """
+    min_heap = heap.Heap(data, d)
+    for i in range(len(data)):
+        data[i] = min_heap.pop()
     return data
 
 
@@ -1,5 +1,3 @@
-import sys
-
 '''
     快速排序： 建立左右指针位， 先右边比较，将右边的最高位和 参照值比较， 比参照值大就交换，比参照值小就高位指针下移，
         移动到当低位和高位指针相等就退出比较循环，并且进入左边比较的过程，
@@ -16,13 +14,124 @@ import sys
         使得j=j-1，i=i+1，直至找到为止。找到符合条件的值，进行交换的时候i， j指针位置不变。另外，i==j这一过程一定正好是i+或j-完成的时候，此时令循环结束）。
     有问题存在，当数据量达到 20000 就要好久,, ee 是程序的锅，是对算法没理解好
     优缺点： 当数据重复大，就会慢一些
+
+    sort 使用非递归的内省排序(introsort)，不修改递归深度限制:
+        用显式的栈代替递归，每次先处理较短的一边，栈的深度不超过 log2 n
+        参照值取三数中值，区间较大时取九数中值(ninther)，有序和逆序的输入不会退化
+        三路划分(荷兰国旗)：小于 等于 大于参照值的三段，等于的一段不再参与排序，大量重复时反而更快
+        划分的层数超过 2*log2 n 时该区间改用堆排序，最坏也是 O(n log n)
+        短于 SMALL 的区间最后用插入排序
+    quick_sort 是原来递归的写法，有序的输入会递归 n 层
 '''
 
+SMALL = 16  # 短于该长度的区间用插入排序
+NINTHER = 128  # 长于该长度的区间用九数中值取参照值
+
 
 def sort(data):
-    sys.setrecursionlimit(100000)  # 设置最大递归深度
-    # return sort(data, 0, len(data)-1)
-    return quick_sort(data, 0, len(data) - 1)
+    return intro_sort(data)
+
+
+def intro_sort(data):
+    stack = []
+    if len(data) > 1:
+        stack.append((0, len(data) - 1, 2 * (len(data).bit_length() - 1)))
+    while stack:
+        low, high, depth = stack.pop()
+        while high - low + 1 > SMALL:
+            if depth == 0:
+                heap_sort_range(data, low, high)
+                break
+            depth -= 1
+            less, greater = partition(data, low, high, choose_pivot(data, low, high))
+            # [low, less) < 参照值 <= [less, greater] <= 参照值 < (greater, high]
+            if less - low < high - greater:
+                stack.append((greater + 1, high, depth))
+                high = less - 1
+            else:
+                stack.append((low, less - 1, depth))
+                low = greater + 1
+        else:
+            insert_sort_range(data, low, high)
+    return data
+
+
+def median_of_three(data, a, b, c):
+    """ 返回三个位置中值的那个位置 """
+    if data[a] < data[b]:
+        if data[b] < data[c]:
+            return b
+        return c if data[a] < data[c] else a
+    if data[a] < data[c]:
+        return a
+    return c if data[b] < data[c] else b
+
+
+def choose_pivot(data, low, high):
+    mid = (low + high) // 2
+    if high - low + 1 > NINTHER:
+        step = (high - low + 1) // 8
+        return data[median_of_three(data,
+                                    median_of_three(data, low, low + step, low + 2 * step),
+                                    median_of_three(data, mid - step, mid, mid + step),
+                                    median_of_three(data, high - 2 * step, high - step, high))]
+    return data[median_of_three(data, low, mid, high)]
+
+
+def partition(data, low, high, pivot):
+    """ 三路划分，返回等于参照值的一段 [less, greater] """
+    less = low
+    i = low
+    greater = high
+    while i <= greater:
+        value = data[i]
+        if value < pivot:
+            data[i] = data[less]
+            data[less] = value
+            less += 1
+            i += 1
+        elif pivot < value:
+            data[i] = data[greater]
+            data[greater] = value
+            greater -= 1
+        else:
+            i += 1
+    return less, greater
+
+
+def insert_sort_range(data, low, high):
+    for i in range(low + 1, high + 1):
+        value = data[i]
+        j = i - 1
+        while j >= low and value < data[j]:
+            data[j + 1] = data[j]
+            j -= 1
+        data[j + 1] = value
+
+
+def heap_sort_range(data, low, high):
+    """ 在 [low, high] 上建大顶堆，依次把堆顶换到末尾 """
+    size = high - low + 1
+    for start in range(size // 2 - 1, -1, -1):
+        sift_down(data, low, start, size)
+    for end in range(size - 1, 0, -1):
+        data[low], data[low + end] = data[low + end], data[low]
+        sift_down(data, low, 0, end)
+
+
+def sift_down(data, low, root, size):
+    value = data[low + root]
+    while True:
+        child = 2 * root + 1
+        if child >= size:
+            break
+        if child + 1 < size and data[low + child] < data[low + child + 1]:
+            child += 1
+        if not value < data[low + child]:
+            break
+        data[low + root] = data[low + child]
+        root = child
+    data[low + root] = value
 
 
 # 高效无误的写法
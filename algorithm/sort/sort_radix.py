@@ -7,32 +7,133 @@
 
     优点， 在数据小，量大时排序非常快
     需要比较(log10 n)*n次 时间复杂度是O(n) 空间复杂度是2n
+
+    现在的实现按二进制位分箱(LSD)，每次取 radix_bits 位(默认 8 位即 256 个箱子，也可以 16 位)，用计数数组代替字典:
+        统计每个箱子的数量，前缀和得到每个箱子的起始位置，按顺序放入，每一趟都是稳定的
+        整数先减去最小值变成非负数，负数和任意大的整数都可以；浮点数按 IEEE 754 的位变换成顺序相同的无符号整数
+        (正数最高位置 1，负数全部取反；-0.0 先换成 0.0，两者相等，保持原来的先后)
+        所有关键字共同的高位不用排，趟数由 最小值 和 最大值 不同的最高位决定
+    key 为函数时按 key 的结果稳定地排序原来的元素
+    整数和浮点数混合时: 整数的绝对值都不超过 2^53 (能精确转成浮点数) 就按浮点数排序, 否则退回到内置的 sorted
+    有 numpy 且关键字能放进 64 位时整趟向量化: 每一趟用 numpy 对 8/16 位整数的稳定排序(内部就是计数排序)
 """
+import struct
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
+RADIX_BITS = 8
+NUMPY_MIN = 1000  # 少于该数量时 numpy 的转换开销大于收益
+SIGN = 1 << 63
+MASK64 = (1 << 64) - 1
+EXACT_FLOAT = 1 << 53  # 绝对值不超过该值的整数转成浮点数不丢精度
 
-def sort(data) -> []:
-    max_value = data[0]
-    for i in range(1, len(data)):
-        if max_value < data[i]:
-            max_value = data[i]
-    length = len(str(max_value))  # 得到数据最大位数
 
-    for loop in range(0, length):
-        data_dict = {}
+def sort(data, key=None, radix_bits=RADIX_BITS) -> []:
+    """ 原地排序并返回 data """
+    if radix_bits not in (8, 16):
+        raise ValueError('radix_bits must be 8 or 16')
+    if len(data) < 2:
+        return data
+    keys = data if key is None else [key(value) for value in data]
+    kind = key_kind(keys)
+    if kind is None:
+        data[:] = sorted(data, key=key)
+        return data
 
-        for num in data:
-            box_type = int(num / (10 ** loop )) % 10
-            if box_type in data_dict:
-                data_dict[box_type].append(num)
-            else:
-                data_dict[box_type] = [num]
+    if np is not None and len(data) >= NUMPY_MIN:
+        order = numpy_order(keys, kind, radix_bits)
+        if order is not None:
+            data[:] = [data[i] for i in order.tolist()]
+            return data
 
-        data = []
-        for i in range(10):
-            if i in data_dict:
-                data.extend(data_dict[i])
+    order = radix_order(unsigned_keys(keys, kind), radix_bits)
+    data[:] = [data[i] for i in order]
     return data
 
 
+def key_kind(keys) -> str:
+    """ 'int' 或 'float', 整数和浮点数混合且整数转成浮点数会丢精度时返回 None """
+    ints = True
+    floats = True
+    for value in keys:
+        if isinstance(value, int):
+            floats = False
+        elif isinstance(value, float):
+            ints = False
+        else:
+            raise TypeError('radix sort keys must be int or float, got %s' % type(value).__name__)
+    if ints:
+        return 'int'
+    if floats or all(-EXACT_FLOAT <= value <= EXACT_FLOAT for value in keys if isinstance(value, int)):
+        return 'float'
+    return None
+
+
+def unsigned_keys(keys, kind) -> []:
+    """ 顺序相同的非负整数 """
+    if kind == 'int':
+        low = min(keys)
+        return [value - low for value in keys]
+    bits = struct.unpack('<%sQ' % len(keys), struct.pack('<%sd' % len(keys), *keys))
+    return [SIGN if bit == SIGN else bit ^ MASK64 if bit & SIGN else bit | SIGN for bit in bits]
+
+
+def radix_order(keys, radix_bits) -> [int]:
+    """ 返回排序后元素原来的位置 """
+    n = len(keys)
+    mask = (1 << radix_bits) - 1
+    order = list(range(n))
+    passes = -(-(min(keys) ^ max(keys)).bit_length() // radix_bits)
+    for loop in range(passes):
+        shift = loop * radix_bits
+        digits = [(value >> shift) & mask for value in keys]
+        counts = [0] * (mask + 1)
+        for digit in digits:
+            counts[digit] += 1
+        starts = [0] * (mask + 1)
+        total = 0
+        for digit in range(mask + 1):
+            starts[digit] = total
+            total += counts[digit]
+
+        new_keys = [0] * n
+        new_order = [0] * n
+        for i in range(n):
+            digit = digits[i]
+            position = starts[digit]
+            starts[digit] = position + 1
+            new_keys[position] = keys[i]
+            new_order[position] = order[i]
+        keys = new_keys
+        order = new_order
+    return order
+
+
+def numpy_order(keys, kind, radix_bits):
+    """ 整数放不进 int64 时返回 None """
+    if kind == 'int':
+        try:
+            unsigned = np.array(keys, dtype=np.int64).view(np.uint64) ^ np.uint64(SIGN)
+        except OverflowError:
+            return None
+    else:
+        bits = (np.array(keys, dtype=np.float64) + 0.0).view(np.uint64)  # -0.0 + 0.0 为 0.0
+        unsigned = np.where(bits >> np.uint64(63) == 1, ~bits, bits | np.uint64(SIGN))
+
+    digit_type = np.uint8 if radix_bits == 8 else np.uint16
+    mask = np.uint64((1 << radix_bits) - 1)
+    order = np.arange(len(keys))
+    passes = -(-(int(unsigned.min()) ^ int(unsigned.max())).bit_length() // radix_bits)
+    for loop in range(passes):
+        digits = ((unsigned >> np.uint64(loop * radix_bits)) & mask).astype(digit_type)
+        step = np.argsort(digits, kind='stable')
+        unsigned = unsigned[step]
+        order = order[step]
+    return order
+
+
 def name() -> str:
     return "radix"
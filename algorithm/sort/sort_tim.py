@@ -1,4 +1,4 @@
-import sort.sort_insert as insert
+from bisect import bisect_left, bisect_right
 
 '''
     TimSort python列表内置的就是该算法的实现:
@@ -20,12 +20,371 @@ import sort.sort_insert as insert
     1. runLen[n-2] > runLen[n-1] + runLen[n]
     2. runLen[n-1] > runLen[n]
     则利用归并排序将其中最短的2个run合并成一个新run，最终栈空的时候排序也就完成了。
+
+    合并时先用 gallop 跳过两个 run 中已经在最终位置上的头尾，只把较短的一个复制出来，
+    逐个比较时一边连续赢了 min_gallop 次就进入 galloping 模式: 指数查找 + 二分，一次搬一整段，
+    galloping 有效就降低 min_gallop，无效就提高，回到逐个比较
+
+    key 的结果只计算一次，排序 keys 时 values 跟着一起移动，只用 < 比较，相等的元素保持原来的顺序(稳定)
+    reverse 时先把列表反转，升序排好后再反转回来，这样相等的元素仍然保持原来的顺序
 '''
 
+MIN_MERGE = 64  # 长度小于该值时直接二分插入排序
+MIN_GALLOP = 7
+
+
+def sort(data, key=None, reverse=False):
+    """ 原地排序并返回 data """
+    if key is None:
+        keys, values = data, None
+    else:
+        keys, values = [key(value) for value in data], data
+    if reverse:
+        keys.reverse()
+        if values is not None:
+            values.reverse()
 
-def sort(data):
+    TimSort(keys, values).sort()
+
+    if reverse:
+        keys.reverse()
+        if values is not None:
+            values.reverse()
     return data
 
 
+def min_run_length(n) -> int:
+    """ 取 n 的高 6 位，其余位有 1 时加一，使 n / minrun 为 2 的幂或略小于 2 的幂 """
+    r = 0
+    while n >= MIN_MERGE:
+        r |= n & 1
+        n >>= 1
+    return n + r
+
+
+def gallop_left(key, a, base, length, hint) -> int:
+    """ a[base:base+length] 有序，从 base+hint 开始指数查找，返回 k 满足 a[k-1] < key <= a[k] """
+    p = base + hint
+    if a[p] < key:
+        # 向右: a[p+last] < key <= a[p+ofs]
+        max_ofs = length - hint
+        last, ofs = 0, 1
+        while ofs < max_ofs and a[p + ofs] < key:
+            last, ofs = ofs, (ofs << 1) + 1
+        return bisect_left(a, key, p + last + 1, p + min(ofs, max_ofs))
+    # 向左: a[p-ofs] < key <= a[p-last]
+    max_ofs = hint + 1
+    last, ofs = 0, 1
+    while ofs < max_ofs and not a[p - ofs] < key:
+        last, ofs = ofs, (ofs << 1) + 1
+    return bisect_left(a, key, p - min(ofs, max_ofs) + 1, p - last)
+
+
+def gallop_right(key, a, base, length, hint) -> int:
+    """ 同 gallop_left，返回 k 满足 a[k-1] <= key < a[k]，相等的元素留在左边 """
+    p = base + hint
+    if key < a[p]:
+        # 向左: a[p-ofs] <= key < a[p-last]
+        max_ofs = hint + 1
+        last, ofs = 0, 1
+        while ofs < max_ofs and key < a[p - ofs]:
+            last, ofs = ofs, (ofs << 1) + 1
+        return bisect_right(a, key, p - min(ofs, max_ofs) + 1, p - last)
+    # 向右: a[p+last] <= key < a[p+ofs]
+    max_ofs = length - hint
+    last, ofs = 0, 1
+    while ofs < max_ofs and not key < a[p + ofs]:
+        last, ofs = ofs, (ofs << 1) + 1
+    return bisect_right(a, key, p + last + 1, p + min(ofs, max_ofs))
+
+
+class TimSort:
+    def __init__(self, keys, values=None):
+        self.keys = keys
+        self.values = values  # 与 keys 平行的原始元素, None 表示 keys 就是元素本身
+        self.min_gallop = MIN_GALLOP
+        self.runs = []  # [(base, length)]
+
+    def sort(self):
+        keys = self.keys
+        n = len(keys)
+        if n < 2:
+            return
+        if n < MIN_MERGE:
+            self.binary_insertion(0, n, self.count_run(0, n))
+            return
+
+        min_run = min_run_length(n)
+        low = 0
+        while low < n:
+            length = self.count_run(low, n)
+            if length < min_run:
+                force = min(min_run, n - low)
+                self.binary_insertion(low, low + force, low + length)
+                length = force
+            self.runs.append((low, length))
+            self.merge_collapse()
+            low += length
+        self.merge_force_collapse()
+
+    def count_run(self, low, high) -> int:
+        """ 从 low 开始的 run 的长度，严格降序的 run 原地反转成升序 """
+        keys = self.keys
+        i = low + 1
+        if i == high:
+            return 1
+        if keys[i] < keys[low]:
+            i += 1
+            while i < high and keys[i] < keys[i - 1]:
+                i += 1
+            keys[low:i] = keys[low:i][::-1]
+            if self.values is not None:
+                self.values[low:i] = self.values[low:i][::-1]
+        else:
+            i += 1
+            while i < high and not keys[i] < keys[i - 1]:
+                i += 1
+        return i - low
+
+    def binary_insertion(self, low, high, start):
+        """ [low, start) 已经有序，把 [start, high) 逐个二分插入 """
+        keys = self.keys
+        values = self.values
+        for i in range(start, high):
+            pivot = keys[i]
+            position = bisect_right(keys, pivot, low, i)
+            if position == i:
+                continue
+            keys[position + 1:i + 1] = keys[position:i]
+            keys[position] = pivot
+            if values is not None:
+                value = values[i]
+                values[position + 1:i + 1] = values[position:i]
+                values[position] = value
+
+    def merge_collapse(self):
+        """ 维持栈上 run 长度的约束，不满足时合并 """
+        runs = self.runs
+        while len(runs) > 1:
+            n = len(runs) - 2
+            if (n > 0 and runs[n - 1][1] <= runs[n][1] + runs[n + 1][1]) or \
+                    (n > 1 and runs[n - 2][1] <= runs[n - 1][1] + runs[n][1]):
+                if runs[n - 1][1] < runs[n + 1][1]:
+                    n -= 1
+            elif runs[n][1] > runs[n + 1][1]:
+                break
+            self.merge_at(n)
+
+    def merge_force_collapse(self):
+        runs = self.runs
+        while len(runs) > 1:
+            n = len(runs) - 2
+            if n > 0 and runs[n - 1][1] < runs[n + 1][1]:
+                n -= 1
+            self.merge_at(n)
+
+    def merge_at(self, i):
+        """ 合并栈上的第 i 和 i+1 个 run """
+        keys = self.keys
+        base_a, length_a = self.runs[i]
+        base_b, length_b = self.runs[i + 1]
+        self.runs[i] = (base_a, length_a + length_b)
+        del self.runs[i + 1]
+
+        # A 中不大于 B[0] 的前缀，B 中不小于 A[-1] 的后缀已经在最终位置上
+        k = gallop_right(keys[base_b], keys, base_a, length_a, 0) - base_a
+        base_a += k
+        length_a -= k
+        if length_a == 0:
+            return
+        length_b = gallop_left(keys[base_a + length_a - 1], keys, base_b, length_b, length_b - 1) - base_b
+        if length_b == 0:
+            return
+
+        if length_a <= length_b:
+            self.merge_low(base_a, length_a, base_b, length_b)
+        else:
+            self.merge_high(base_a, length_a, base_b, length_b)
+
+    def merge_low(self, base_a, length_a, base_b, length_b):
+        """ A 较短: 把 A 复制出来，从左往右合并 """
+        keys = self.keys
+        values = self.values
+        temp = keys[base_a:base_a + length_a]
+        temp_values = None if values is None else values[base_a:base_a + length_a]
+        i = 0  # temp 中的位置
+        j = base_b  # B 中的位置
+        end_b = base_b + length_b
+        dest = base_a
+        min_gallop = self.min_gallop
+
+        while i < length_a and j < end_b:
+            # 逐个比较，直到一边连续赢了 min_gallop 次
+            count_a = count_b = 0
+            while True:
+                if keys[j] < temp[i]:
+                    keys[dest] = keys[j]
+                    if values is not None:
+                        values[dest] = values[j]
+                    dest += 1
+                    j += 1
+                    count_b += 1
+                    count_a = 0
+                    if j == end_b:
+                        break
+                else:
+                    keys[dest] = temp[i]
+                    if values is not None:
+                        values[dest] = temp_values[i]
+                    dest += 1
+                    i += 1
+                    count_a += 1
+                    count_b = 0
+                    if i == length_a:
+                        break
+                if count_a >= min_gallop or count_b >= min_gallop:
+                    break
+            if i == length_a or j == end_b:
+                break
+
+            # galloping: 一次搬一整段，直到两边都搬不满 MIN_GALLOP 个
+            min_gallop += 1
+            while True:
+                min_gallop -= min_gallop > 1
+                count_a = gallop_right(keys[j], temp, i, length_a - i, 0) - i
+                if count_a:
+                    keys[dest:dest + count_a] = temp[i:i + count_a]
+                    if values is not None:
+                        values[dest:dest + count_a] = temp_values[i:i + count_a]
+                    dest += count_a
+                    i += count_a
+                    if i == length_a:
+                        break
+                keys[dest] = keys[j]
+                if values is not None:
+                    values[dest] = values[j]
+                dest += 1
+                j += 1
+                if j == end_b:
+                    break
+
+                count_b = gallop_left(temp[i], keys, j, end_b - j, 0) - j
+                if count_b:
+                    keys[dest:dest + count_b] = keys[j:j + count_b]
+                    if values is not None:
+                        values[dest:dest + count_b] = values[j:j + count_b]
+                    dest += count_b
+                    j += count_b
+                    if j == end_b:
+                        break
+                keys[dest] = temp[i]
+                if values is not None:
+                    values[dest] = temp_values[i]
+                dest += 1
+                i += 1
+                if i == length_a:
+                    break
+                if count_a < MIN_GALLOP and count_b < MIN_GALLOP:
+                    break
+            min_gallop += 1
+
+        self.min_gallop = max(1, min_gallop)
+        # B 用完时把 A 剩下的放到最后，A 用完时 B 剩下的已经在原位
+        if i < length_a:
+            keys[dest:dest + length_a - i] = temp[i:]
+            if values is not None:
+                values[dest:dest + length_a - i] = temp_values[i:]
+
+    def merge_high(self, base_a, length_a, base_b, length_b):
+        """ B 较短: 把 B 复制出来，从右往左合并 """
+        keys = self.keys
+        values = self.values
+        temp = keys[base_b:base_b + length_b]
+        temp_values = None if values is None else values[base_b:base_b + length_b]
+        i = length_b - 1  # temp 中的位置
+        j = base_a + length_a - 1  # A 中的位置
+        dest = base_b + length_b - 1
+        min_gallop = self.min_gallop
+
+        while i >= 0 and j >= base_a:
+            count_a = count_b = 0
+            while True:
+                if temp[i] < keys[j]:
+                    keys[dest] = keys[j]
+                    if values is not None:
+                        values[dest] = values[j]
+                    dest -= 1
+                    j -= 1
+                    count_a += 1
+                    count_b = 0
+                    if j < base_a:
+                        break
+                else:
+                    keys[dest] = temp[i]
+                    if values is not None:
+                        values[dest] = temp_values[i]
+                    dest -= 1
+                    i -= 1
+                    count_b += 1
+                    count_a = 0
+                    if i < 0:
+                        break
+                if count_a >= min_gallop or count_b >= min_gallop:
+                    break
+            if i < 0 or j < base_a:
+                break
+
+            min_gallop += 1
+            while True:
+                min_gallop -= min_gallop > 1
+                # A 中大于 temp[i] 的后缀
+                position = gallop_right(temp[i], keys, base_a, j - base_a + 1, j - base_a)
+                count_a = j + 1 - position
+                if count_a:
+                    keys[dest - count_a + 1:dest + 1] = keys[position:j + 1]
+                    if values is not None:
+                        values[dest - count_a + 1:dest + 1] = values[position:j + 1]
+                    dest -= count_a
+                    j -= count_a
+                    if j < base_a:
+                        break
+                keys[dest] = temp[i]
+                if values is not None:
+                    values[dest] = temp_values[i]
+                dest -= 1
+                i -= 1
+                if i < 0:
+                    break
+
+                # temp 中不小于 A[j] 的后缀
+                position = gallop_left(keys[j], temp, 0, i + 1, i)
+                count_b = i + 1 - position
+                if count_b:
+                    keys[dest - count_b + 1:dest + 1] = temp[position:i + 1]
+                    if values is not None:
+                        values[dest - count_b + 1:dest + 1] = temp_values[position:i + 1]
+                    dest -= count_b
+                    i -= count_b
+                    if i < 0:
+                        break
+                keys[dest] = keys[j]
+                if values is not None:
+                    values[dest] = values[j]
+                dest -= 1
+                j -= 1
+                if j < base_a:
+                    break
+                if count_a < MIN_GALLOP and count_b < MIN_GALLOP:
+                    break
+            min_gallop += 1
+
+        self.min_gallop = max(1, min_gallop)
+        # A 用完时把 B 剩下的放到最前面，B 用完时 A 剩下的已经在原位
+        if i >= 0:
+            keys[dest - i:dest + 1] = temp[:i + 1]
+            if values is not None:
+                values[dest - i:dest + 1] = temp_values[:i + 1]
+
+
 def name() -> str:
     return "tim"
@@ -1,4 +1,5 @@
-import datetime
+import sys
+import time
 import unittest
 import random
 
@@ -10,11 +11,14 @@ import sort.sort_shell as shell
 import sort.sort_merge as merge
 import sort.sort_quick as quick
 import sort.sort_heap as heap
+import sort.heap as heap_queue
+import sort.sort_tim as tim
+import sort.bench as bench
 
 max_num_value = 1000
 sort_scale = 100
 
-all_sorts = [radix, bubble, insert, select, shell, merge, quick, heap]
+all_sorts = [radix, bubble, insert, select, shell, merge, quick, heap, tim]
 
 
 def generate_data():
@@ -30,11 +34,11 @@ def check_sorted(data) -> bool:
 
 
 def get_time(start=None):
-    """得到时间，计算运行时间的函数"""
+    """得到时间，计算运行时间的函数 有 start 时返回经过的微秒数"""
 
-    now = datetime.datetime.now()
+    now = time.perf_counter_ns()
     if start is not None:
-        microseconds = (now - start).microseconds
+        microseconds = (now - start) // 1000
         # print('waste time:', microseconds / 1000, 'ms')
         return microseconds
     return now
@@ -47,6 +51,41 @@ class TestSortCorrect(unittest.TestCase):
         result = radix.sort(generate_data())
         assert check_sorted(result)
 
+        self.assertEqual(radix.sort([]), [])
+        for data in [[random.randint(-10 ** 6, 10 ** 6) for x in range(3000)],
+                     [random.randint(-2 ** 70, 2 ** 70) for x in range(3000)],
+                     [random.uniform(-1e9, 1e9) for x in range(3000)],
+                     [random.choice([1.5, -2.25, float('inf'), -float('inf'), 3]) for x in range(200)]]:
+            for radix_bits in (8, 16):
+                self.assertEqual(radix.sort(data[:], radix_bits=radix_bits), sorted(data))
+
+        # 按 key 稳定排序原来的元素
+        records = [(random.randint(-20, 20), i) for i in range(3000)]
+        self.assertEqual(radix.sort(records[:], key=lambda record: record[0]),
+                         sorted(records, key=lambda record: record[0]))
+        with self.assertRaises(TypeError):
+            radix.sort(['b', 'a'])
+
+    def test_radix_sort_mixed_keys(self):
+        # 整数和浮点数混合: 超过 2^53 的整数不能转成浮点数比较, 太大的整数也转不成浮点数
+        for data in [[2 ** 53 + 1, 2 ** 53, float(2 ** 53), 1.5],
+                     [10 ** 400, -10 ** 400, 0.5, -1.5, 3],
+                     [0.0, -0.0, 0, -0.0, 0.0, -1, 1.0],
+                     [random.choice([0.0, -0.0, 0.5, -0.5]) for x in range(1500)],
+                     [random.randint(-100, 100) for x in range(1500)] + [random.uniform(-100, 100) for x in range(1500)]]:
+            self.assertEqual(radix.sort(data[:]), sorted(data))
+            self.assertEqual(radix.sort([(value, i) for i, value in enumerate(data)], key=lambda record: record[0]),
+                             sorted([(value, i) for i, value in enumerate(data)], key=lambda record: record[0]))
+
+    def test_radix_sort_without_numpy(self):
+        saved = radix.np
+        radix.np = None
+        try:
+            data = [random.randint(-10 ** 6, 10 ** 6) for x in range(3000)]
+            self.assertEqual(radix.sort(data[:]), sorted(data))
+        finally:
+            radix.np = saved
+
     def test_bubble_sort(self):
         result = bubble.sort(generate_data())
         assert check_sorted(result)
@@ -54,6 +93,9 @@ class TestSortCorrect(unittest.TestCase):
     def test_heap_sort(self):
         result = heap.sort(generate_data())
         assert check_sorted(result)
+        for d in (3, 4):
+            data = generate_data()
+            self.assertEqual(heap.sort(data[:], d), sorted(data))
 
     def test_insert_sort(self):
         result = insert.sort(generate_data())
@@ -67,6 +109,18 @@ class TestSortCorrect(unittest.TestCase):
         result = quick.sort(generate_data())
         assert check_sorted(result)
 
+        # 非递归的内省排序: 有序 逆序 大量重复都不会退化, 也不修改递归深度限制
+        limit = sys.getrecursionlimit()
+        for distribution in bench.DISTRIBUTIONS:
+            data = bench.generate(distribution, 20000)
+            self.assertEqual(quick.sort(data[:]), sorted(data))
+        self.assertEqual(sys.getrecursionlimit(), limit)
+
+        data = generate_data() * 10
+        target = data[:]
+        quick.heap_sort_range(target, 100, 899)
+        self.assertEqual(target, data[:100] + sorted(data[100:900]) + data[900:])
+
     def test_select_sort(self):
         result = select.sort(generate_data())
         assert check_sorted(result)
@@ -75,6 +129,22 @@ class TestSortCorrect(unittest.TestCase):
         result = shell.sort(generate_data())
         assert check_sorted(result)
 
+    def test_tim_sort(self):
+        result = tim.sort(generate_data())
+        assert check_sorted(result)
+
+        # 有序 逆序 锯齿 以及大量重复, 长度跨过 minrun 触发合并和 galloping
+        for data in [list(range(3000)), list(range(3000, 0, -1)), [i % 50 for i in range(3000)],
+                     [random.randint(1, 5) for x in range(3000)], generate_data() * 30]:
+            self.assertEqual(tim.sort(data[:]), sorted(data))
+
+    def test_tim_sort_key(self):
+        records = [(random.randint(1, 20), i) for i in range(2000)]
+        for reverse in (False, True):
+            result = tim.sort(records[:], key=lambda record: record[0], reverse=reverse)
+            # 与内置的 sorted 一样稳定
+            self.assertEqual(result, sorted(records, key=lambda record: record[0], reverse=reverse))
+
 
 class TestPerformance(unittest.TestCase):
     """测试性能"""
@@ -107,5 +177,98 @@ class TestPerformance(unittest.TestCase):
             print('|%-7s  | %s ms' % (key, value / 1000))
 
 
+class TestHeap(unittest.TestCase):
+    """测试堆和优先队列"""
+
+    def test_heap(self):
+        data = generate_data()
+        for d in (2, 3, 5):
+            min_heap = heap_queue.Heap(data, d)
+            min_heap.push_all(generate_data())
+            min_heap.push(0)
+            result = [min_heap.pop() for x in range(len(min_heap))]
+            self.assertEqual(result[0], 0)
+            assert check_sorted(result)
+        with self.assertRaises(IndexError):
+            heap_queue.Heap().pop()
+
+    def test_priority_queue(self):
+        for d in (2, 4):
+            queue = heap_queue.PriorityQueue([('task%s' % i, i % 10) for i in range(100)], d)
+            queue.push_all([('extra%s' % i, i) for i in range(5)])
+            queue.decrease_key('task55', -1)
+            queue.increase_key('task0', 100)
+            queue.update('task1', 5)
+            self.assertEqual(queue.delete('task2'), 2)
+            self.assertNotIn('task2', queue)
+            with self.assertRaises(ValueError):
+                queue.decrease_key('task3', 50)
+
+            self.assertEqual(queue.peek(), ('task55', -1))
+            result = [queue.pop() for x in range(len(queue))]
+            self.assertEqual(len(result), 104)
+            self.assertEqual(result[-1], ('task0', 100))
+            assert check_sorted([priority for item, priority in result])
+            # 优先级相同时先进先出
+            self.assertEqual([item for item, priority in result if priority == 0][:3], ['task10', 'task20', 'task30'])
+
+    def test_priority_queue_rejected_batch(self):
+        # 有重复元素的批量 push 不改变队列, 大批量(重新 heapify)和小批量(逐个 push)都一样
+        for size in (3, 50):
+            queue = heap_queue.PriorityQueue([('task%s' % i, i) for i in range(10)])
+            for batch in ([('new%s' % i, -i) for i in range(size)] + [('task5', 0)],
+                          [('new%s' % i, -i) for i in range(size)] + [('new0', 1)]):
+                with self.assertRaises(KeyError):
+                    queue.push_all(batch)
+                self.assertEqual(len(queue), 10)
+                self.assertNotIn('new0', queue)
+                self.assertEqual(sorted(queue.positions.values()), list(range(10)))
+            result = [queue.pop() for x in range(len(queue))]
+            self.assertEqual(result, [('task%s' % i, i) for i in range(10)])
+
+    def test_legacy_functions(self):
+        data = generate_data()
+        heap_list = heap_queue.build_heap(data)
+        heap_queue.decrease_key(heap_list, len(heap_list) - 1, -5)
+        heap_queue.increase_key(heap_list, 1, max_num_value + 1)
+        heap_queue.delete(heap_list, 2)
+        assert heap_queue.check_heap(heap_list)
+        result = []
+        while True:
+            value = heap_queue.delete_min(heap_list)
+            if value is None:
+                break
+            result.append(value)
+        self.assertEqual(len(result), len(data) - 1)
+        assert check_sorted(result)
+
+
+class TestBench(unittest.TestCase):
+    """测试基准测试工具"""
+
+    def test_discover(self):
+        sorts = bench.discover()
+        for sort in all_sorts:
+            self.assertIs(sorts[sort.name()], sort)
+
+    def test_generate(self):
+        for distribution in bench.DISTRIBUTIONS:
+            data = bench.generate(distribution, 1000)
+            self.assertEqual(len(data), 1000)
+            self.assertEqual(data, bench.generate(distribution, 1000))
+        self.assertEqual(bench.sizes(100, 10 ** 7), [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7])
+
+    def test_run(self):
+        result = bench.run(['tim', 'bubble'], ['sorted', 'random'], 100, 10000, repeat=2, warmup=0, budget=0.05)
+        rows = {(row['sort'], row['distribution'], row['size']): row for row in result['rows']}
+        self.assertIn(('tim', 'sorted', 100), rows)
+        # 冒泡的耗时按至少 10 倍增长, 超出预算的规模不再运行
+        self.assertIn(('bubble', 'random', 10000), [(item['sort'], item['distribution'], item['size'])
+                                                     for item in result['skipped']])
+        for row in rows.values():
+            self.assertLessEqual(row['min_ns'], row['median_ns'])
+            self.assertLessEqual(row['median_ns'], row['p95_ns'])
+
+
 if __name__ == '__main__':
     unittest.main()
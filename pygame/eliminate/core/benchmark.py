@@ -0,0 +1,246 @@
+"""
+    消除热点路径的基准测试:
+        对 json/grid.json 中的每个盘面以及合成的大盘面 (默认 16x16 32x32), 分别计时
+        check_eliminate (全盘扫描) synthesize_monster eliminate_monster best_plan_to_swap (high_order_first) main_loop
+    每项先预热, 再重复 repeat 次, 每次从同一个 save_state 恢复, 准备工作不计时, 记录 中位数 最小值 p95 (纳秒)
+    单项累计超过 budget 秒后不再重复 (至少 1 次); 计时期间关闭日志, 同一个种子每次得到相同的盘面
+    best_plan_to_swap 评估全部候选两两的组合, 组合数超过 pair_limit 的盘面 (如 32x32) 跳过 best_plan_to_swap 和 main_loop,
+    记录在 meta.skipped 中
+
+    结果为 JSON {meta, results: {盘面/项目: 统计}}, 可作为之后运行的基线:
+        python -m core.benchmark --json bench.json
+        python -m core.benchmark --baseline bench.json --tolerance 0.2  中位数比基线慢 20% 以上的项目返回 1
+"""
+import argparse
+import json
+import logging
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+
+from core.grid import Grid
+from core.main_config import MainConfig
+from core.strategy import high_order_first
+from domain.enum_type import CellType, StrategyType
+
+SYNTHETIC = ((16, 16), (32, 32))
+STONE_RATE = 0.05
+REPEAT = 20
+WARMUP = 2
+BUDGET = 5.0  # 秒
+MOVES = 5
+PAIR_LIMIT = 200000
+TOLERANCE = 0.2
+
+
+def synthetic_config(row, col, seed=0) -> {}:
+    """ 与 grid.json 格式相同的盘面, 约 STONE_RATE 的格子为石头 """
+    rng = random.Random(seed)
+    data = [CellType.STONE.value if rng.random() < STONE_RATE else CellType.MONSTER.value
+            for _ in range(row * col)]
+    return {'id': -1, 'row': row, 'col': col, 'data': data}
+
+
+def measure(setup, run, repeat=REPEAT, warmup=WARMUP, budget=BUDGET) -> [int]:
+    """
+    每次先调用 setup() 准备, 只计时 run(setup 的返回值), 预热和计时合计超过 budget 秒后停止
+    一次预热就超过 budget 时, 直接以这一次作为结果
+    """
+    deadline = time.perf_counter_ns() + int(budget * 1e9)
+    for i in range(warmup):
+        state = setup()
+        start = time.perf_counter_ns()
+        run(state)
+        end = time.perf_counter_ns()
+        if end > deadline:
+            return [end - start]
+    times = []
+    for i in range(repeat):
+        state = setup()
+        start = time.perf_counter_ns()
+        run(state)
+        times.append(time.perf_counter_ns() - start)
+        if time.perf_counter_ns() > deadline:
+            break
+    return times
+
+
+def stats(times) -> {}:
+    ordered = sorted(times)
+    return {
+        'repeat': len(ordered),
+        'median_ns': int(statistics.median(ordered)),
+        'min_ns': ordered[0],
+        'p95_ns': ordered[max(0, math.ceil(len(ordered) * 0.95) - 1)],
+        'mean_ns': int(statistics.fmean(ordered)),
+    }
+
+
+def bench_config(config, compact=False, seed=0, repeat=REPEAT, warmup=WARMUP, budget=BUDGET, moves=MOVES,
+                 pair_limit=PAIR_LIMIT) -> ({}, [str]):
+    """
+    返回 ({项目: 统计}, [跳过的项目]), 盘面上没有能消除的交换时跳过 synthesize_monster 和 eliminate_monster
+    :param pair_limit: 候选组合数的上限, None 为不限制
+    """
+    grid = Grid(compact=compact, rng=random.Random(seed), grid_config=config)
+    grid.init_generate_grid()
+    grid.check_eliminate()
+    base = grid.save_state()
+
+    def restore():
+        grid.restore_state(base)
+        return grid
+
+    def rescan():
+        grid.restore_state(base)
+        grid.line_states = None
+        return grid
+
+    result = {'check_eliminate': stats(measure(rescan, Grid.check_eliminate, repeat, warmup, budget))}
+    skipped = []
+
+    # 用第一个候选和能补全它的怪物交换, 不经过 best_plan_to_swap 的全部组合
+    cells = grid.get_complex_swap_choice()
+    other = None if len(cells) == 0 else grid.get_completion_one(cells[0])
+    if other is not None:
+        grid.restore_state(base)
+        grid.swap_monster(cells[0].index, other.index)
+        swapped = grid.save_state()
+
+        def restore_swapped():
+            grid.restore_state(swapped)
+            return grid
+
+        def synthesized():
+            grid.restore_state(swapped)
+            return grid.synthesize_monster()
+
+        result['synthesize_monster'] = stats(measure(restore_swapped, Grid.synthesize_monster,
+                                                     repeat, warmup, budget))
+        result['eliminate_monster'] = stats(measure(synthesized, grid.eliminate_monster, repeat, warmup, budget))
+    else:
+        skipped.extend(['synthesize_monster', 'eliminate_monster'])
+
+    if pair_limit is not None and len(high_order_first.candidate_pairs(len(cells))) > pair_limit:
+        skipped.extend(['best_plan_to_swap', 'main_loop'])
+        return result, skipped
+
+    result['best_plan_to_swap'] = stats(measure(restore, high_order_first.best_plan_to_swap,
+                                                repeat, warmup, budget))
+
+    def new_grid():
+        return Grid(compact=compact, rng=random.Random(seed), grid_config=config)
+
+    def main_loop(other_grid):
+        other_grid.main_loop(moves, StrategyType.HIGH_ORDER_FIRST)
+
+    result['main_loop'] = stats(measure(new_grid, main_loop, repeat, warmup, budget))
+    return result, skipped
+
+
+def run_suite(grid_ids=None, synthetic=SYNTHETIC, compact=False, seed=0, repeat=REPEAT, warmup=WARMUP,
+              budget=BUDGET, moves=MOVES, pair_limit=PAIR_LIMIT) -> {}:
+    """
+    :param grid_ids: grid.json 中的盘面, 默认全部
+    :param synthetic: 合成盘面的 [(row, col)]
+    """
+    configs = MainConfig().grids
+    if grid_ids is None:
+        grid_ids = list(range(len(configs)))
+    targets = [('grid_%s' % grid_id, configs[grid_id]) for grid_id in grid_ids]
+    targets.extend(('synthetic_%sx%s' % (row, col), synthetic_config(row, col, seed)) for row, col in synthetic)
+
+    logging.disable(logging.CRITICAL)
+    results = {}
+    skipped = []
+    try:
+        for name, config in targets:
+            result, cases = bench_config(config, compact, seed, repeat, warmup, budget, moves, pair_limit)
+            for case, value in result.items():
+                results['%s/%s' % (name, case)] = value
+            skipped.extend('%s/%s' % (name, case) for case in cases)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    meta = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'compact': compact,
+        'seed': seed,
+        'repeat': repeat,
+        'budget': budget,
+        'moves': moves,
+        'skipped': skipped,
+    }
+    return {'meta': meta, 'results': results}
+
+
+def compare(current, baseline, tolerance=TOLERANCE) -> [{}]:
+    """ 中位数超过 基线 * (1 + tolerance) 的项目, 基线中没有的项目不比较 """
+    regressions = []
+    for name, value in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None or base['median_ns'] == 0:
+            continue
+        ratio = value['median_ns'] / base['median_ns']
+        if ratio > 1 + tolerance:
+            regressions.append({'name': name, 'baseline_ns': base['median_ns'], 'median_ns': value['median_ns'],
+                                'ratio': ratio})
+    return regressions
+
+
+def format_table(current, baseline=None) -> str:
+    lines = ['%-40s %12s %12s %12s %8s' % ('case', 'median_us', 'min_us', 'p95_us', 'ratio')]
+    for name, value in current['results'].items():
+        ratio = ''
+        if baseline is not None and name in baseline['results'] and baseline['results'][name]['median_ns']:
+            ratio = '%.2f' % (value['median_ns'] / baseline['results'][name]['median_ns'])
+        lines.append('%-40s %12.1f %12.1f %12.1f %8s' % (name, value['median_ns'] / 1000, value['min_ns'] / 1000,
+                                                           value['p95_ns'] / 1000, ratio))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark the eliminate hot paths')
+    parser.add_argument('--grids', type=int, nargs='*', help='grid ids in json/grid.json, default all')
+    parser.add_argument('--synthetic', nargs='*', default=['%sx%s' % size for size in SYNTHETIC],
+                        help='synthetic board sizes like 16x16')
+    parser.add_argument('--compact', action='store_true', help='use array backed board')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--warmup', type=int, default=WARMUP)
+    parser.add_argument('--budget', type=float, default=BUDGET, help='seconds per case before repeating stops')
+    parser.add_argument('--moves', type=int, default=MOVES, help='moves per main_loop run')
+    parser.add_argument('--pair-limit', type=int, default=PAIR_LIMIT,
+                        help='skip the strategy cases when there are more candidate pairs, 0 for no limit')
+    parser.add_argument('--json', help='write results, usable as a later baseline')
+    parser.add_argument('--baseline', help='results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='allowed slowdown of the median')
+    args = parser.parse_args()
+
+    synthetic = [tuple(int(value) for value in size.split('x')) for size in args.synthetic]
+    current = run_suite(args.grids, synthetic, args.compact, args.seed, args.repeat, args.warmup, args.budget,
+                        args.moves, args.pair_limit or None)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(current, file, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    print(format_table(current, baseline))
+    if baseline is None:
+        return 0
+
+    regressions = compare(current, baseline, args.tolerance)
+    for regression in regressions:
+        print('regression %(name)s: %(baseline_ns)s ns -> %(median_ns)s ns (x%(ratio).2f)' % regression)
+    return 1 if len(regressions) != 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
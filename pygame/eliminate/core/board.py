@@ -0,0 +1,137 @@
+from array import array
+
+from domain.cell_state import CellState
+from domain.enum_type import CellType, OrderType
+from domain.monster import Monster
+from domain.stone import Stone
+
+EMPTY_CODE = 0  # 消除后留下的空位 ref_id=' '
+STONE_KEY = -1
+
+
+class Board:
+    """
+    数组存储的盘面, 可直接替代 Grid.grid 的 [Monster/Stone] 列表
+    每个格子的 类型 怪物编码 品质 等级 石头血量 分别存在平行的数组里, 取格子时才创建 Monster/Stone 视图
+    视图只是拷贝, 修改后需要重新赋值回 board[index]
+    """
+
+    def __init__(self, ref_ids, size=0):
+        self.ref_ids = [' '] + list(ref_ids)  # code -> ref_id
+        self.ref_codes = {}  # ref_id -> code
+        for code in range(len(self.ref_ids)):
+            self.ref_codes[self.ref_ids[code]] = code
+
+        self.cell_type = array('b', [CellType.STONE.value]) * size
+        self.ref_code = array('h', [EMPTY_CODE]) * size
+        self.order = array('b', [0]) * size
+        self.level = array('i', [0]) * size
+        self.hp = array('b', [0]) * size
+
+    @classmethod
+    def from_cells(cls, ref_ids, cells):
+        board = cls(ref_ids)
+        for cell in cells:
+            board.append(cell)
+        return board
+
+    @classmethod
+    def from_codes(cls, ref_ids, codes):
+        """ codes: 每个格子的编码, 怪物为 key 石头为 -hp (与 MoveTrace board_batch 相同), 不创建 Monster/Stone """
+        codes = [int(code) for code in codes]
+        board = cls(ref_ids, len(codes))
+        for index in range(len(codes)):
+            code = codes[index]
+            if code < 0:
+                board.hp[index] = -code
+            else:
+                board.cell_type[index] = CellType.MONSTER.value
+                board.ref_code[index] = code >> 3
+                board.order[index] = code & 7
+                board.level[index] = 1
+        return board
+
+    def __len__(self):
+        return len(self.cell_type)
+
+    def __iter__(self):
+        for index in range(len(self.cell_type)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        if self.cell_type[index] == CellType.STONE.value:
+            return Stone(index, self.hp[index])
+        return Monster(index, self.ref_ids[self.ref_code[index]], OrderType(self.order[index]), self.level[index])
+
+    def __setitem__(self, index, cell):
+        if cell.get_type() == CellType.STONE:
+            self.cell_type[index] = CellType.STONE.value
+            self.ref_code[index] = EMPTY_CODE
+            self.order[index] = 0
+            self.level[index] = 0
+            self.hp[index] = cell.hp
+        else:
+            self.cell_type[index] = CellType.MONSTER.value
+            self.ref_code[index] = self.ref_codes[cell.ref_id]
+            self.order[index] = cell.order.value
+            self.level[index] = cell.level
+            self.hp[index] = 0
+
+    def append(self, cell):
+        for values in (self.cell_type, self.ref_code, self.order, self.level, self.hp):
+            values.append(0)
+        self[len(self.cell_type) - 1] = cell
+
+    def copy(self):
+        board = Board(self.ref_ids[1:])
+        board.cell_type = array('b', self.cell_type)
+        board.ref_code = array('h', self.ref_code)
+        board.order = array('b', self.order)
+        board.level = array('i', self.level)
+        board.hp = array('b', self.hp)
+        return board
+
+    def is_monster(self, index) -> bool:
+        return self.cell_type[index] == CellType.MONSTER.value
+
+    def key(self, index) -> int:
+        """ 相同 (ref_id, order) 的怪物 key 相同, 石头为 STONE_KEY """
+        if self.cell_type[index] == CellType.STONE.value:
+            return STONE_KEY
+        return self.ref_code[index] * 8 + self.order[index]
+
+    def keys(self) -> [int]:
+        return [self.key(index) for index in range(len(self.cell_type))]
+
+    def is_same(self, index_one, index_other) -> bool:
+        return self.is_monster(index_one) and self.key(index_one) == self.key(index_other)
+
+    def swap(self, index_one, index_other):
+        for values in (self.cell_type, self.ref_code, self.order, self.level, self.hp):
+            values[index_one], values[index_other] = values[index_other], values[index_one]
+
+    def scan_line(self, direct_type, indexes) -> ([CellState], [CellState]):
+        """ 与 Grid.scan_line 结果一致, 直接比较 key 不创建 Monster """
+        result = ([], [])
+        run = []
+        run_key = STONE_KEY
+        for index in indexes:
+            key = self.key(index)
+            if key == run_key and key != STONE_KEY:
+                run.append(index)
+                continue
+            self.add_run(run, direct_type, result)
+            run = [index] if key != STONE_KEY else []
+            run_key = key
+        self.add_run(run, direct_type, result)
+        return result
+
+    def add_run(self, run, direct_type, result):
+        if len(run) == 0:
+            return
+        head = run[0]
+        state = CellState(self.ref_ids[self.ref_code[head]], run, OrderType(self.order[head]), direct_type)
+        if len(run) <= 2:
+            result[1].append(state)
+        else:
+            result[0].append(state)
@@ -0,0 +1,197 @@
+"""
+    批量生成初始盘面, 全程不创建 Monster/Stone:
+        generate(grid_id, count, seed) 返回 count 个盘面, 每个盘面 row*col 个编码,
+        有 numpy 时为 (count, row*col) 的 int8 数组, 没有时为 [array('b')]
+        编码与 MoveTrace 相同: 怪物为 ref_code << 3 | order (初始品质为 E), 石头为 -hp
+        怪物最多 detector.MAX_BYTE_REF_CODE (15) 种, 更多时编码放不进 int8, 直接抛出 ValueError
+        石头的位置与 grid.json 一致, 盘面没有可消除的结构, 各种怪物的数量按 monster.json 的权重保持比例
+    有 numpy 时所有盘面按格子顺序一起生成: 每个格子排除 4 个方向上会连成 3 个的类型, 在 数量/权重 不是最大的类型中按权重随机,
+    有格子所有类型都被排除的盘面整批重新生成, 多次重试仍失败的 (怪物种类太少) 再用 generator.generate_refs 逐个回溯生成
+    没有 numpy 时逐个用 generator.generate_refs 生成, 两种方式同一个种子的结果不同
+
+    文件格式: 头部 b'ELBB' 版本 grid_id row col, 之后每个盘面 row*col 个有符号字节, 分块生成写入, 逐个读出
+    Grid.init_from_codes 用读出的盘面开局, simulation --boards 直接使用这个文件
+
+    python -m core.board_batch --grid 3 --count 10000 --seed 0 --out boards.bin
+"""
+import argparse
+import random
+import struct
+from array import array
+
+from core import detector, generator, layout
+from core.main_config import MainConfig
+from core.spawn import SpawnEngine
+from domain.enum_type import CellType, min_order_type
+from domain.stone import Stone
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b'ELBB'
+VERSION = 1
+HEADER = struct.Struct('<4sBHHH')
+CHUNK = 1024  # 写文件时每次生成的盘面数
+ATTEMPTS = 100  # 留下可消除结构时的重试次数
+
+
+def generate(grid_id, count, seed=None):
+    configs = MainConfig()
+    return generate_boards(configs.grids[grid_id], configs.monsters, count, new_rng(seed))
+
+
+def new_rng(seed):
+    if np is not None:
+        return np.random.default_rng(seed)
+    return random.Random(seed)
+
+
+def generate_boards(grid, monsters, count, rng):
+    """ rng: 有 numpy 时为 numpy.random.Generator, 否则为 random.Random """
+    check_monsters(monsters)
+    if np is not None:
+        return generate_numpy(grid, monsters, count, rng)
+    return [generate_one(grid, monsters, rng) for _ in range(count)]
+
+
+def check_monsters(monsters):
+    if len(monsters) > detector.MAX_BYTE_REF_CODE:
+        raise ValueError('board batch codes are signed bytes, %s monsters exceed the limit of %s'
+                         % (len(monsters), detector.MAX_BYTE_REF_CODE))
+
+
+def generate_one(grid, monsters, rng) -> array:
+    data = grid['data']
+    table = layout.get_layout(grid['row'], grid['col'])
+    codes = array('b', [0]) * table.size
+    indexes = []
+    for index in range(table.size):
+        if data[index] == CellType.STONE.value:
+            codes[index] = -Stone.random_hp(rng)
+        elif data[index] == CellType.MONSTER.value:
+            indexes.append(index)
+
+    ref_codes = {monsters[i]['id']: i + 1 for i in range(len(monsters))}
+    for attempt in range(ATTEMPTS):
+        ref_ids, conflict = generator.generate_refs(table, indexes, SpawnEngine(monsters, rng), rng)
+        if not conflict:
+            for index in indexes:
+                codes[index] = ref_codes[ref_ids[index]] << detector.ORDER_BITS | min_order_type().value
+            return codes
+    raise ValueError('too few monster types to generate a board without eliminate')
+
+
+def generate_numpy(grid, monsters, count, rng):
+    """ 留下可消除结构的盘面整批重新生成, 重试 ATTEMPTS 次后仍失败的逐个回溯生成 """
+    codes = np.empty((count, grid['row'] * grid['col']), dtype=np.int8)
+    pending = np.arange(count)
+    for attempt in range(ATTEMPTS):
+        if len(pending) == 0:
+            break
+        boards, conflict = fill_numpy(grid, monsters, len(pending), rng)
+        codes[pending[~conflict]] = boards[~conflict]
+        pending = pending[conflict]
+
+    retry = random.Random(int(rng.integers(1 << 62)))
+    for board in pending.tolist():
+        codes[board] = np.frombuffer(generate_one(grid, monsters, retry).tobytes(), dtype=np.int8)
+    return codes
+
+
+def fill_numpy(grid, monsters, count, rng):
+    """ 返回 (盘面, 每个盘面是否有格子所有类型都被排除) """
+    table = layout.get_layout(grid['row'], grid['col'])
+    data = np.asarray(grid['data'])
+    weights = np.array([monster.get('weight', 1) for monster in monsters], dtype=np.float64)
+    boards = np.arange(count)
+
+    refs = np.zeros((count, table.size), dtype=np.int16)  # ref_code, 石头为 0
+    counts = np.zeros((count, len(monsters)), dtype=np.float64)
+    conflict = np.zeros(count, dtype=bool)
+    for index in np.flatnonzero(data == CellType.MONSTER.value).tolist():
+        # 第 0 列接收石头和不成对的情况, 不参与选择
+        exclude = np.zeros((count, len(monsters) + 1), dtype=bool)
+        for backward in table.backward.values():
+            pre = backward[index]
+            if pre < 0 or backward[pre] < 0:
+                continue
+            same = refs[:, pre] == refs[:, backward[pre]]
+            exclude[boards, np.where(same, refs[:, pre], 0)] = True
+        exclude = exclude[:, 1:]
+
+        balance = counts / weights
+        candidate = (balance != balance.max(axis=1, keepdims=True)) & ~exclude
+        empty = ~candidate.any(axis=1)
+        candidate[empty] = ~exclude[empty]
+
+        cumulative = np.cumsum(candidate * weights, axis=1)
+        conflict |= cumulative[:, -1] == 0
+        pick = np.argmax(cumulative > rng.random(count)[:, None] * cumulative[:, -1:], axis=1)
+        refs[:, index] = pick + 1
+        counts[boards, pick] += 1
+
+    hp = rng.integers(1, 8, size=(count, table.size))
+    codes = np.where(data == CellType.STONE.value, -hp, refs << detector.ORDER_BITS | min_order_type().value)
+    return codes.astype(np.int8), conflict
+
+
+def to_bytes(boards) -> bytes:
+    if np is not None and isinstance(boards, np.ndarray):
+        return boards.astype(np.int8).tobytes()
+    return b''.join(board.tobytes() for board in boards)
+
+
+def save(path, grid_id, count, seed=None, chunk=CHUNK):
+    """ 分块生成 count 个盘面写入 path, 内存中最多同时存在 chunk 个盘面 """
+    configs = MainConfig()
+    grid = configs.grids[grid_id]
+    check_monsters(configs.monsters)
+    rng = new_rng(seed)
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, grid_id, grid['row'], grid['col']))
+        for start in range(0, count, chunk):
+            file.write(to_bytes(generate_boards(grid, configs.monsters, min(chunk, count - start), rng)))
+
+
+def read_header(file) -> (int, int, int):
+    magic, version, grid_id, row, col = HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a board batch')
+    return grid_id, row, col
+
+
+def iter_boards(path):
+    """ 逐个读出盘面 array('b') """
+    with open(path, 'rb') as file:
+        grid_id, row, col = read_header(file)
+        while True:
+            data = file.read(row * col)
+            if len(data) < row * col:
+                return
+            yield array('b', data)
+
+
+def load(path) -> (int, []):
+    """ 返回 (grid_id, 全部盘面), 有 numpy 时盘面为 (count, row*col) 的数组 """
+    with open(path, 'rb') as file:
+        grid_id, row, col = read_header(file)
+        data = file.read()
+    if np is not None:
+        return grid_id, np.frombuffer(data, dtype=np.int8).reshape(-1, row * col)
+    return grid_id, [array('b', data[start:start + row * col]) for start in range(0, len(data), row * col)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='generate starting boards in batch')
+    parser.add_argument('--grid', type=int, default=0, help='grid id in json/grid.json')
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--out', required=True)
+    args = parser.parse_args()
+    save(args.out, args.grid, args.count, args.seed)
+
+
+if __name__ == '__main__':
+    main()
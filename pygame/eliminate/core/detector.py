@@ -0,0 +1,127 @@
+"""
+    批量检测连续结构:
+        把要检查的 行/列/斜线 首尾相接拼成一个序列, 线与线之间用 STONE_KEY 隔开,
+        每个格子换成 key (相同 ref_id 和 order 的怪物 key 相同, 石头为 STONE_KEY),
+        一次找出序列中所有 key 相同的区间, 再按线拆回 CellState
+    有 numpy 时区间查找是向量化的, 没有时退回纯 Python 实现, 结果一致
+"""
+from core.board import Board, STONE_KEY
+from domain.cell_state import CellState
+from domain.enum_type import CellType, OrderType
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ORDER_BITS = 3  # key = ref_code << 3 | order
+MAX_BYTE_REF_CODE = 127 >> ORDER_BITS  # key 存成有符号字节 (MoveTrace, board_batch) 时 ref_code 的上限, 即最多 15 种怪物
+
+
+def scan_lines(grid, line_ids=None) -> [([CellState], [CellState])]:
+    """
+    :param line_ids: Grid.get_lines() 中需要扫描的线, None 为全部
+    :return: 与 line_ids 一一对应的 (可消除的结构, 可能消除的结构)
+    """
+    lines = grid.get_lines()
+    if line_ids is None:
+        line_ids = range(len(lines))
+
+    flat = []  # 拼接后的格子 index, -1 为分隔
+    owners = []  # 序列位置 -> line_ids 中的下标
+    for i, line_id in enumerate(line_ids):
+        indexes = lines[line_id][1]
+        flat.extend(indexes)
+        flat.append(-1)
+        owners.extend([i] * (len(indexes) + 1))
+
+    ref_ids = get_ref_ids(grid)
+    result = [([], []) for _ in line_ids]
+    for start, end, key in find_runs(line_keys(grid, flat)):
+        position = owners[start]
+        state = CellState(ref_ids[key >> ORDER_BITS], flat[start:end], OrderType(key & 7),
+                          lines[line_ids[position]][0])
+        if end - start <= 2:
+            result[position][1].append(state)
+        else:
+            result[position][0].append(state)
+    return result
+
+
+def get_ref_ids(grid) -> [str]:
+    if isinstance(grid.grid, Board):
+        return grid.grid.ref_ids
+    return [' '] + [monster['id'] for monster in grid.configs.monsters]
+
+
+def line_keys(grid, flat):
+    board = grid.grid
+    if isinstance(board, Board):
+        if np is not None:
+            keys = board_keys(board)
+            return keys[np.asarray(flat, dtype=np.intp)]
+        return [board.key(index) if index >= 0 else STONE_KEY for index in flat]
+
+    ref_codes = get_ref_codes(grid)
+    result = [cell_key(board[index], ref_codes) if index >= 0 else STONE_KEY for index in flat]
+    if np is not None:
+        return np.asarray(result, dtype=np.int32)
+    return result
+
+
+def grid_keys(grid) -> [int]:
+    """ 整盘每个格子的 key """
+    if isinstance(grid.grid, Board):
+        return grid.grid.keys()
+    ref_codes = get_ref_codes(grid)
+    return [cell_key(cell, ref_codes) for cell in grid.grid]
+
+
+def get_ref_codes(grid) -> {}:
+    ref_codes = {}
+    ref_ids = get_ref_ids(grid)
+    for code in range(len(ref_ids)):
+        ref_codes[ref_ids[code]] = code
+    return ref_codes
+
+
+def cell_key(cell, ref_codes) -> int:
+    if cell.get_type() == CellType.STONE:
+        return STONE_KEY
+    return ref_codes[cell.ref_id] << ORDER_BITS | cell.order.value
+
+
+def board_keys(board):
+    """ numpy 计算整盘 key, 末尾多放一个 STONE_KEY 供 -1 下标取用 """
+    cell_type = np.frombuffer(board.cell_type, dtype=np.int8)
+    ref_code = np.frombuffer(board.ref_code, dtype=np.int16).astype(np.int32)
+    order = np.frombuffer(board.order, dtype=np.int8)
+    keys = np.where(cell_type == CellType.STONE.value, STONE_KEY, (ref_code << ORDER_BITS) | order)
+    return np.append(keys, STONE_KEY)
+
+
+def find_runs(keys) -> [(int, int, int)]:
+    """ 序列中 key 相同的最长区间 [(start, end, key)], 忽略 STONE_KEY """
+    if np is not None:
+        return find_runs_numpy(keys)
+
+    result = []
+    start = 0
+    for i in range(1, len(keys) + 1):
+        if i == len(keys) or keys[i] != keys[start]:
+            if keys[start] != STONE_KEY:
+                result.append((start, i, keys[start]))
+            start = i
+    return result
+
+
+def find_runs_numpy(keys) -> [(int, int, int)]:
+    keys = np.asarray(keys)
+    if len(keys) == 0:
+        return []
+    boundary = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    starts = np.concatenate(([0], boundary))
+    ends = np.concatenate((boundary, [len(keys)]))
+    values = keys[starts]
+    valid = values != STONE_KEY
+    return list(zip(starts[valid].tolist(), ends[valid].tolist(), values[valid].tolist()))
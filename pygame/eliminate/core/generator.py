@@ -0,0 +1,77 @@
+"""
+    构造式生成初始盘面:
+        按 index 顺序生成怪物, 每个怪物排除掉会和 4 个方向上已经生成的前两个格子连成 3 个的类型, 一遍生成没有可消除结构的盘面
+        某个格子所有类型都被排除时回溯到造成冲突的格子换成其他可选的类型,
+        回溯次数超出 BACKTRACK_LIMIT 倍格子数时 (怪物种类太少) 不再回溯, 由调用方处理剩下的冲突
+    只处理 ref_id, 不创建 Monster, Grid.init_generate_grid 和 board_batch 共用
+"""
+import random
+
+BACKTRACK_LIMIT = 10  # 最多回溯 格子数 * BACKTRACK_LIMIT 次
+
+
+def generate_refs(layout, indexes, spawner, rng=random) -> ([str], bool):
+    """
+    :param indexes: 要放怪物的格子, 升序
+    :param spawner: SpawnEngine 生成的数量计入其中
+    :return: (index -> ref_id 其余格子为 None, 是否留下了可消除的结构)
+    """
+    positions = {index: position for position, index in enumerate(indexes)}
+    ref_ids = [None] * layout.size
+    options = {}  # index -> 回溯时还可以换的类型
+    backtracks = 0
+    conflict = False
+    position = 0
+    while position < len(indexes):
+        index = indexes[position]
+        if index in options:
+            # 回溯到这个格子, 换成下一个可选的类型, 没有可选的再往前回溯一格
+            spawner.change(ref_ids[index], -1)
+            if len(options[index]) != 0:
+                ref_ids[index] = options[index].pop()
+                spawner.change(ref_ids[index], 1)
+                position += 1
+                continue
+            del options[index]
+            ref_ids[index] = None
+            if position == 0:
+                backtracks = BACKTRACK_LIMIT * len(indexes)
+            else:
+                position -= 1
+            continue
+
+        matched = matched_refs(layout, ref_ids, index)
+        allowed = [ref_id for ref_id in spawner.ids if ref_id not in matched]
+        if len(allowed) == 0 and backtracks < BACKTRACK_LIMIT * len(indexes):
+            # 直接跳回造成冲突的格子中最后生成的那个, 中间的格子撤销
+            backtracks += 1
+            target = max(positions[pre] for pres in matched.values() for pre in pres)
+            for undo in indexes[target + 1:position]:
+                spawner.change(ref_ids[undo], -1)
+                ref_ids[undo] = None
+                del options[undo]
+            position = target
+            continue
+
+        conflict = conflict or len(allowed) == 0
+        ref_ids[index] = spawner.spawn(spawner.mask(matched))
+        options[index] = [ref_id for ref_id in allowed if ref_id != ref_ids[index]]
+        rng.shuffle(options[index])
+        position += 1
+    return ref_ids, conflict
+
+
+def matched_refs(layout, ref_ids, index) -> {}:
+    """
+    4 个方向上 index 之前的两个格子是同一种怪物时, 该怪物不能放在 index
+    :return: {ref_id: [造成冲突的格子]}
+    """
+    result = {}
+    for backward in layout.backward.values():
+        pre = backward[index]
+        if pre < 0 or ref_ids[pre] is None:
+            continue
+        pre_pre = backward[pre]
+        if pre_pre >= 0 and ref_ids[pre_pre] == ref_ids[pre]:
+            result.setdefault(ref_ids[pre], []).extend((pre, pre_pre))
+    return result
@@ -1,58 +1,125 @@
+import copy
 import logging
 import math
 import random
 
+from core import detector, generator, layout, render, snapshot, swap_effect, zobrist
+from core.board import Board
 from core.main_config import MainConfig
-from core.strategy import high_order_first
+from core.soldier_ledger import SoldierLedger
+from core.spawn import SpawnEngine
+from core.swap_index import SwapIndex
+from core.strategy import high_order_first, lookahead
 from domain.cell_state import CellState
 from domain.cell_vo import CellVO
 from domain.direct_type import DirectType
 from domain.enum_type import CellType, min_order_type, StrategyType, OrderType
 from domain.monster import Monster
-from domain.soldier import Soldier
 from domain.stone import Stone
 from util.logger import log
 
 
 class Grid:
-    def __init__(self, grid_id=0):
+    def __init__(self, grid_id=0, compact=False, plan_cache=None, rng=None, grid_config=None):
+        """
+        :param compact: 为 True 时用数组存储的 Board 代替 [Monster/Stone] 列表
+        :param plan_cache: PlanCache 相同盘面复用已经算过的交换方案, 可在多个 Grid 间共享
+        :param rng: random.Random 盘面 掉落 策略 用到的所有随机数都从这里取, None 为全局的 random
+        :param grid_config: 与 grid.json 中格式相同的 {row col data}, 给出时代替 grid_id 对应的配置
+        """
+        self.rng = random if rng is None else rng
         self.configs = MainConfig()
-        self.current_grid = self.configs.grids[grid_id]
+        self.grid_id = grid_id
+        self.current_grid = self.configs.grids[grid_id] if grid_config is None else grid_config
         self.row = self.current_grid['row']
         self.col = self.current_grid['col']
-        # TODO use dict, more quickly?
-        self.grid = []  # Monster or  Stone Object
-        self.type_count = {}
+        # Monster or  Stone Object, or Board
+        if compact:
+            self.grid = Board([monster['id'] for monster in self.configs.monsters])
+        else:
+            self.grid = []
+        self.spawner = SpawnEngine(self.configs.monsters, self.rng)
+        self.type_count = self.spawner.counts  # ref_id -> 累计生成数量
 
         # direct ->[CellState]
         self.direct_states = {}  # able to eliminate (length more than 2)
         self.probably_eliminate = {}  # probably to eliminate (length equal to 2)
 
-        self.soldiers = {}  # (ref_id, order,level) -> soldier synthesizer then go on battle
-
-        # init monster count
-        for monster in self.configs.monsters:
-            self.type_count[monster['id']] = 0
+        # 增量检查 [(direct, [index])] 每条线的扫描结果 以及自上次检查后变动过的格子
+        self.layout = layout.get_layout(self.row, self.col)  # 同形状的盘面共用
+        self.lines = self.layout.lines
+        self.cell_lines = self.layout.cell_lines  # index -> [line_id]
+        self.line_states = None  # line_id -> ([CellState], [CellState])
+        self.dirty_indexes = set()
+        self.swap_snapshot = None  # 评估交换用的不可变快照, 盘面变动后失效
+        self.swap_index = None  # 交换候选的索引, 第一次取候选时才开始维护
+
+        # Zobrist 指纹 随格子变动增量维护, 第一次取指纹时才开始维护
+        self.cell_hashes = None
+        self.fingerprint = 0
+        self.plan_cache = plan_cache
+        self.search_pool = None  # high_order_first.SearchPool 为 None 时串行评估, 由调用方创建和关闭
+        self.profiler = None  # PhaseProfiler 为 None 时不统计
+        self.trace = None  # MoveTrace 为 None 时不记录
+        self.move_log = None  # MoveLog 为 None 时不记录
+        self.cascade_check = None  # 每轮连锁前调用, lookahead 用它在模拟中检查时间预算
+
+        # (ref_id, order, level) -> 数量 soldier synthesizer then go on battle
+        self.soldiers = SoldierLedger([monster['id'] for monster in self.configs.monsters])
 
     def init_generate_grid(self):
+        """ 构造式生成没有可消除结构的盘面, 见 core.generator, 怪物种类太少生成不出来时退回到 检查-替换 的循环 """
         data = self.current_grid['data']
+        stones = {index: self.create_stone(index) for index in range(len(data))
+                  if data[index] == CellType.STONE.value}
+        indexes = [index for index in range(len(data)) if data[index] == CellType.MONSTER.value]
+        ref_ids, conflict = generator.generate_refs(self.layout, indexes, self.spawner, self.rng)
+
         for index in range(len(data)):
-            type_ = data[index]
-            if type_ == CellType.MONSTER.value:
-                self.grid.append(self.create_monster(index))
-            if type_ == CellType.STONE.value:
-                self.grid.append(self.create_stone(index))
+            if index in stones:
+                self.grid.append(stones[index])
+            else:
+                self.grid.append(Monster(index, ref_ids[index], min_order_type()))
+
+        self.check_eliminate()
+        if conflict:
+            self.break_eliminate()
 
+    def init_from_codes(self, codes):
+        """
+        用 board_batch 生成的盘面代替 init_generate_grid, 只用于新建的 Grid
+        compact 时直接写入 Board 的数组, 不创建 Monster/Stone
+        """
+        codes = [int(code) for code in codes]
+        ref_ids = detector.get_ref_ids(self)
+        if isinstance(self.grid, Board):
+            self.grid = Board.from_codes(ref_ids[1:], codes)
+        else:
+            self.grid = [Stone(index, -code) if code < 0 else
+                         Monster(index, ref_ids[code >> detector.ORDER_BITS], OrderType(code & 7))
+                         for index, code in enumerate(codes)]
+
+        counts = {ref_id: 0 for ref_id in ref_ids[1:]}
+        for code in codes:
+            if code >= 0:
+                counts[ref_ids[code >> detector.ORDER_BITS]] += 1
+        self.spawner.load(counts)
+        self.check_eliminate()
+
+    def break_eliminate(self):
+        """ 在每个可消除结构中随机替换一个怪物, 直到没有可消除的结构 """
         while True:
             self.check_eliminate()
             for direct in self.direct_states:
                 states = self.direct_states[direct]
                 for state in states:
                     indexes = state.indexes
-                    index = random.choice(indexes)
+                    index = self.rng.choice(indexes)
 
                     monster = self.grid[index]
                     monster.ref_id = self.replace_monster_with_other(monster.ref_id)
+                    self.grid[index] = monster
+                    self.mark_dirty(index)
 
             self.check_eliminate()
             # self.simple_show()
@@ -60,104 +127,117 @@ class Grid:
             if len(self.direct_states) == 0:
                 break
 
-    @staticmethod
-    def create_stone(index):
-        return Stone(index, Stone.random_hp())
+    def create_stone(self, index):
+        return Stone(index, Stone.random_hp(self.rng))
 
     def create_monster(self, index):
         return Monster(index, self.random_monster_ref(), min_order_type())
 
     def replace_monster_with_other(self, ref_id) -> str:
-        self.type_count[ref_id] -= 1
-        ids = []
-        for monster in self.configs.monsters:
-            if monster['id'] != ref_id:
-                ids.append(monster['id'])
-        other_id = random.choice(ids)
-        return other_id
+        return self.spawner.replace(ref_id)
 
     def random_monster_ref(self) -> str:
-        # return 'X'
+        return self.spawner.spawn()
 
-        # monster_dict = random.choice(self.configs.monsters)
-        # ref_id = monster_dict['id']
-        # self.type_count[ref_id] += 1
-        # return ref_id
+    def get_monster_resources(self) -> []:
+        return list(self.spawner.candidates()[0])
 
-        ref_id = random.choice(self.get_monster_resources())
-        self.type_count[ref_id] += 1
-        return ref_id
+    def check_eliminate(self):
+        """
+        增量检查: 只重新扫描经过变动格子的 行/列/斜线, 其余线沿用上次的扫描结果
+        结果的顺序与全盘扫描一致
+        """
+        lines = self.get_lines()
+        if self.line_states is None:
+            self.line_states = detector.scan_lines(self)
+            self.swap_index = None
+        else:
+            dirty_lines = list(self.get_dirty_lines())
+            if len(dirty_lines) == 0:
+                self.dirty_indexes = set()
+                return
+            for line_id, line_state in zip(dirty_lines, detector.scan_lines(self, dirty_lines)):
+                self.line_states[line_id] = line_state
+            if self.swap_index is not None:
+                self.swap_index.update(self, dirty_lines, self.dirty_indexes)
+        self.dirty_indexes = set()
 
-    def get_monster_resources(self) -> []:
-        result = []
-        max_count = max(self.type_count.values())
+        self.direct_states = {}
+        self.probably_eliminate = {}
+        for line_id in range(len(lines)):
+            eliminates, probablies = self.line_states[line_id]
+            self.append_states(lines[line_id][0], eliminates, probablies)
+
+    def mark_dirty(self, *indexes):
+        self.dirty_indexes.update(indexes)
+        self.swap_snapshot = None
+        if self.cell_hashes is not None:
+            for index in indexes:
+                value = zobrist.cell_hash(self, index)
+                self.fingerprint ^= self.cell_hashes[index] ^ value
+                self.cell_hashes[index] = value
+
+    def get_fingerprint(self) -> int:
+        if self.cell_hashes is None or len(self.cell_hashes) != len(self.grid):
+            self.cell_hashes = zobrist.board_hash(self)
+            self.fingerprint = 0
+            for value in self.cell_hashes:
+                self.fingerprint ^= value
+        return self.fingerprint
+
+    def get_dirty_lines(self) -> set:
+        result = set()
+        for index in self.dirty_indexes:
+            result.update(self.cell_lines[index])
+        return result
 
-        for ref_id in self.type_count:
-            if self.type_count[ref_id] != max_count:
-                result.append(ref_id)
+    def get_lines(self) -> [(DirectType, [int])]:
+        """ 所有需要检查的线, 顺序与 check_east check_south check_north_east check_south_east 一致 """
+        return self.lines
 
-        if len(result) == 0:
-            return list(self.type_count.keys())
+    def scan_line(self, direct_type, indexes) -> ([CellState], [CellState]):
+        """ 扫描一条线 返回 (可消除的结构, 可能消除的结构) """
+        if isinstance(self.grid, Board):
+            return self.grid.scan_line(direct_type, indexes)
+        result = ([], [])
+        temp = []
+        for index in indexes:
+            temp = self.compare_monster(self.grid[index], temp, direct_type, result)
+        self.add_monster(temp, direct_type, result)
         return result
 
-    def check_eliminate(self):
-        self.direct_states = {}
-        self.probably_eliminate = {}
+    def append_states(self, direct_type, eliminates, probablies):
+        if len(eliminates) != 0:
+            if direct_type not in self.direct_states:
+                self.direct_states[direct_type] = list(eliminates)
+            else:
+                self.direct_states[direct_type].extend(eliminates)
+        if len(probablies) != 0:
+            if direct_type not in self.probably_eliminate:
+                self.probably_eliminate[direct_type] = list(probablies)
+            else:
+                self.probably_eliminate[direct_type].extend(probablies)
 
-        self.check_east()
-        self.check_south()
-        self.check_north_east()
-        self.check_south_east()
+    # 单方向全盘扫描, 结果追加到 direct_states probably_eliminate
+    def check_direct(self, direct_type):
+        for direct, indexes in self.get_lines():
+            if direct == direct_type:
+                eliminates, probablies = self.scan_line(direct, indexes)
+                self.append_states(direct, eliminates, probablies)
 
     def check_east(self):
-        for x in range(self.row):
-            temp = []
-            for y in range(0, self.col):
-                cell = self.grid[self.col * x + y]
-                temp = self.compare_monster(cell, temp, DirectType.EAST)
-            self.add_monster(temp, DirectType.EAST)
+        self.check_direct(DirectType.EAST)
 
     def check_south(self):
-        for y in range(self.col):
-            temp = []
-            for x in range(self.row):
-                cell = self.grid[self.col * x + y]
-                temp = self.compare_monster(cell, temp, DirectType.SOUTH)
-            self.add_monster(temp, DirectType.SOUTH)
+        self.check_direct(DirectType.SOUTH)
 
     def check_south_east(self):
-        for i in range(self.col - 2):
-            temp = []
-            for j in range(i, (self.row - i) * self.col, self.col + 1):
-                cell = self.grid[j]
-                temp = self.compare_monster(cell, temp, DirectType.SOUTH_EAST)
-            self.add_monster(temp, DirectType.SOUTH_EAST)
-
-        for i in range(self.col, self.col * (self.row - 1), self.col):
-            temp = []
-            for j in range(i, self.col * self.row, self.col + 1):
-                cell = self.grid[j]
-                temp = self.compare_monster(cell, temp, DirectType.SOUTH_EAST)
-            self.add_monster(temp, DirectType.SOUTH_EAST)
+        self.check_direct(DirectType.SOUTH_EAST)
 
     def check_north_east(self):
-        for i in range(1, self.col):
-            temp = []
-            for j in range(i, i * self.col + 1, self.col - 1):
-                cell = self.grid[j]
-                temp = self.compare_monster(cell, temp, DirectType.NORTH_EAST)
-            self.add_monster(temp, DirectType.NORTH_EAST)
-
-        if self.row < 3:
-            return
-        for i in range(self.col * 2 - 1, (self.row - 1) * self.col - 1, self.col):
-            temp = []
-            for j in range(i, self.row * self.col - 1, self.col - 1):
-                cell = self.grid[j]
-                temp = self.compare_monster(cell, temp, DirectType.NORTH_EAST)
-            self.add_monster(temp, DirectType.NORTH_EAST)
+        self.check_direct(DirectType.NORTH_EAST)
 
-    def compare_monster(self, cell, temp, direct_type):
+    def compare_monster(self, cell, temp, direct_type, result):
         if len(temp) == 0:
             if cell.get_type() == CellType.MONSTER:
                 return [cell]
@@ -169,62 +249,59 @@ class Grid:
         if temp_.get_type() == cell.get_type() == CellType.MONSTER and temp_.is_same(cell):
             temp.append(cell)
         elif cell.get_type() == CellType.MONSTER:
-            self.add_monster(temp, direct_type)
+            self.add_monster(temp, direct_type, result)
             temp = [cell]
         else:
-            self.add_monster(temp, direct_type)
+            self.add_monster(temp, direct_type, result)
             temp = []
         return temp
 
-    def add_monster(self, temp, direct_type):
+    @staticmethod
+    def add_monster(temp, direct_type, result):
+        """ result: ([CellState] 可消除, [CellState] 可能消除) """
         if len(temp) == 0:
             return
 
         temp = sorted(temp, key=lambda a: a.order.value)
 
         indexes = []
-        result = []
         state = None
         for i in range(len(temp)):
             indexes.append(temp[i].index)
             if i == 0:
                 state = CellState(temp[i].ref_id, indexes, temp[i].order, direct_type)
-                result.append(state)
 
             elif temp[i].order != temp[i - 1].order:
                 state = CellState(temp[i].ref_id, indexes, temp[i].order, direct_type)
-                result.append(state)
                 indexes = []
             else:
                 state.indexes = indexes
 
         if len(temp) <= 2:
-            if direct_type not in self.probably_eliminate:
-                self.probably_eliminate[direct_type] = [state]
-            else:
-                self.probably_eliminate[direct_type].append(state)
+            result[1].append(state)
         if len(temp) > 2:
-            if direct_type not in self.direct_states:
-                self.direct_states[direct_type] = [state]
-            else:
-                self.direct_states[direct_type].append(state)
+            result[0].append(state)
 
     def main_loop(self, loop, strategy_type):
         self.init_generate_grid()
+        if self.trace is not None:
+            self.trace.record(self)
+        if self.move_log is not None:
+            self.move_log.start(self)
         i = 0
         for i in range(loop):
-            log.info('loop %s' % i)
+            log.info('loop %s', i)
             self.table_show()
 
             cells = self.swap_by_strategy(strategy_type)
             if len(cells) == 0:
                 log.warning('can\'t find any swap plan')
                 break
-            log.info('best plan %s' % str(cells))
+            log.info('best plan %s', cells)
 
             self.swap_and_eliminate(cells)
 
-        log.warning('complete loop: %s' % i)
+        log.warning('complete loop: %s', i)
         self.show()
 
     # 生成/掉落
@@ -233,30 +310,57 @@ class Grid:
             monster = Monster(index, self.random_monster_ref(), min_order_type())
             # log.debug('generate %s' % monster)
             self.grid.__setitem__(index, monster)
+        self.mark_dirty(*space_indexes)
 
     # 记录上场士兵
     def record_soldier(self, ref_id, order, target_level):
-        if (ref_id, order, target_level - 1) in self.soldiers:
-            self.soldiers[(ref_id, order, target_level - 1)].count += target_level
-        else:
-            soldier = Soldier(ref_id, order, target_level - 1, target_level)
-            self.soldiers[(ref_id, order, target_level - 1)] = soldier
+        self.soldiers.record(ref_id, order, target_level)
 
     # 交换和消除
-    def swap_and_eliminate(self, cell_vo_tuple):
+    def swap_and_eliminate(self, cell_vo_tuple, max_cascades=None) -> int:
+        """
+        返回连锁消除的轮数
+        :param max_cascades: 最多消除的轮数, 搜索中模拟时用来截断, None 为消除到没有可消除的结构
+        """
         if len(cell_vo_tuple) != 2:
-            return
-        self.swap_monster(cell_vo_tuple[0].index, cell_vo_tuple[1].index)
-
-        while True:
-            removes = self.synthesize_monster()
+            return 0
+        profiler = self.profiler
+        if profiler is None:
+            self.swap_monster(cell_vo_tuple[0].index, cell_vo_tuple[1].index)
+        else:
+            profiler.run('swap', self.swap_monster, cell_vo_tuple[0].index, cell_vo_tuple[1].index)
+
+        cascade = 0
+        while max_cascades is None or cascade < max_cascades:
+            if self.cascade_check is not None:
+                self.cascade_check()
+            if profiler is None:
+                removes = self.synthesize_monster()
+            else:
+                removes = profiler.run('synthesize', self.synthesize_monster)
             if len(removes) == 0:
                 break
-            space_indexes = self.eliminate_monster(removes)
+            cascade += 1
+            if profiler is None:
+                space_indexes = self.eliminate_monster(removes)
+            else:
+                space_indexes = profiler.run('eliminate', self.eliminate_monster, removes)
 
             self.table_show()
             # log.debug('space %s' % space_indexes)
-            self.generate_new(space_indexes)
+            if profiler is None:
+                self.generate_new(space_indexes)
+            else:
+                profiler.run('generate', self.generate_new, space_indexes)
+                profiler.cells['generate'] += len(space_indexes)
+
+        if profiler is not None:
+            profiler.record_cascade(cascade)
+        if self.trace is not None:
+            self.trace.record(self, cell_vo_tuple[0].index, cell_vo_tuple[1].index, cascade)
+        if self.move_log is not None:
+            self.move_log.record(self, cell_vo_tuple[0].index, cell_vo_tuple[1].index)
+        return cascade
 
     # 合成
     def synthesize_monster(self) -> []:
@@ -267,30 +371,31 @@ class Grid:
         if len(temp) == 0:
             return []
 
-        result = {}
+        # 结构会被增量检查复用, 这里不能修改 state.indexes
+        result = {}  # (ref_id, order) -> [index]
         for state in temp:
             key = (state.ref_id, state.order)
             if key not in result:
-                result[key] = state
+                result[key] = list(state.indexes)
             else:
-                result[key].indexes.extend(state.indexes)
+                result[key].extend(state.indexes)
 
         final_index = []
         remove_indexes = None
         for (ref_id, order) in result:
             if order == OrderType.A:
-                log.warning('up the top order %s %s' % (ref_id, result[(ref_id, order)]))
+                log.warning('up the top order %s %s', ref_id, result[(ref_id, order)])
                 continue
 
-            value = result[(ref_id, order)]
-            indexes = set(value.indexes)
+            indexes = set(result[(ref_id, order)])
             target_index, target_level = self.get_synthesize_index_level(indexes)
 
-            log.debug('synthesize unit: %s %s %s target_index %s' % (ref_id, order, indexes, target_index))
+            log.debug('synthesize unit: %s %s %s target_index %s', ref_id, order, indexes, target_index)
 
             final_index.append(target_index)
             monster = Monster(target_index, ref_id, order.up(), level=target_level)
             self.grid[target_index] = monster
+            self.mark_dirty(target_index)
 
             self.record_soldier(ref_id, order, target_level)
 
@@ -299,7 +404,7 @@ class Grid:
             else:
                 remove_indexes = indexes.union(remove_indexes)
 
-        log.info('synthesize:%s remove:%s' % (final_index, remove_indexes))
+        log.info('synthesize:%s remove:%s', final_index, remove_indexes)
         if remove_indexes is None:
             return []
 
@@ -307,7 +412,7 @@ class Grid:
         for index in remove_indexes:
             if index not in final_index:
                 result.append(index)
-        log.debug('remove=%s' % result)
+        log.debug('remove=%s', result)
         return result
 
     def get_synthesize_index_level(self, indexes) -> (int, int):
@@ -331,34 +436,53 @@ class Grid:
 
     # 消除和掉落 返回空缺的[index]
     def eliminate_monster(self, removes) -> []:
+        """
+        按列压实: 每列自下而上遍历一次, 留下的怪物依次落到最低的非石头位置 (石头不动, 怪物可以越过石头下落)
+        被消除的格子 ref_id 置为 ' ' 后留在顶部的空位上
+        :return: 空缺的 index 按列从左到右, 每列自下而上, 即 generate_new 的填充顺序
+        """
         if removes is None or len(removes) == 0:
             return []
-        for index in removes:
-            self.grid[index].ref_id = ' '
+        removed = set(removes)
+        columns = sorted({index % self.col for index in removed})
 
         space_indexes = []
-        for x in range(self.col):
-            stack = []
+        for x in columns:
+            slots = []  # 非石头的位置 自下而上
+            kept = []  # 留下的怪物
+            spaces = []  # 被消除的怪物
             for i in range(self.row):
                 index = (self.row - i - 1) * self.col + x
-                if index in removes:
-                    # log.debug('space %s' % index)
-                    stack.append(index)
-                else:
-                    if len(stack) == 0:
-                        continue
-                    target_remove = stack[0]
-                    swap_result = self.swap_monster(index, target_remove)
-                    if swap_result:
-                        stack.pop(0)
-                        stack.append(index)
-                        # log.debug('swap and append %s %s stack%s' % (index, target_remove, stack))
-            # log.info('current col space:%s' % stack)
-            space_indexes.extend(stack)
+                if index in removed:
+                    slots.append(index)
+                    cell = self.grid[index]
+                    cell.ref_id = ' '
+                    spaces.append(cell)
+                elif self.is_monster(index):
+                    slots.append(index)
+                    kept.append(self.grid[index])
+
+            cells = kept + spaces
+            changed = []
+            for slot, cell in zip(slots, cells):
+                if cell.index != slot or cell.ref_id == ' ':
+                    cell.index = slot
+                    self.grid[slot] = cell
+                    changed.append(slot)
+            self.mark_dirty(*changed)
+            space_indexes.extend(slots[len(kept):])
         return space_indexes
 
+    def is_monster(self, index) -> bool:
+        if isinstance(self.grid, Board):
+            return self.grid.is_monster(index)
+        return self.grid[index].get_type() == CellType.MONSTER
+
     def swap_monster(self, one_index, other_index) -> bool:
-        log.debug('swap %s %s' % (one_index, other_index))
+        log.debug('swap %s %s', one_index, other_index)
+        if isinstance(self.grid, Board):
+            return self.swap_board_cell(one_index, other_index)
+
         one = self.grid[one_index]
         other = self.grid[other_index]
 
@@ -373,42 +497,90 @@ class Grid:
         one.index = other_index
         self.grid[one_index] = other
         self.grid[other_index] = one
+        self.mark_dirty(one_index, other_index)
 
         return True
 
+    def swap_board_cell(self, one_index, other_index) -> bool:
+        board = self.grid
+        if not board.is_monster(one_index) or not board.is_monster(other_index):
+            return False
+        if board.is_same(one_index, other_index):
+            return False
+        board.swap(one_index, other_index)
+        self.mark_dirty(one_index, other_index)
+        return True
+
     def swap_by_strategy(self, strategy_type) -> (CellVO, CellVO):
         """
-        依据策略找出最佳方案
+        依据策略找出最佳方案, 设置了 search_pool 时并行评估
         :return: (CellVO, CellVO) 需要交换的两个 cell
         """
+        if self.profiler is not None:
+            return self.profiler.run('strategy', self.find_plan, strategy_type)
+        return self.find_plan(strategy_type)
+
+    def find_plan(self, strategy_type) -> (CellVO, CellVO):
         # TODO 完善策略
         # log.setLevel(logging.DEBUG)
 
         if strategy_type == StrategyType.HIGH_ORDER_FIRST:
-            return high_order_first.best_plan_to_swap(self)
+            return high_order_first.best_plan_to_swap(self, self.search_pool, self.plan_cache)
+        if strategy_type == StrategyType.LOOKAHEAD:
+            return lookahead.best_plan_to_swap(self)
 
         # log.setLevel(logging.INFO)
 
     def calculate_swap_effect(self, index_one, index_other) -> int:
-        effect = 0
-        swap_result = self.swap_monster(index_one, index_other)
-        if not swap_result:
-            log.debug('swap failed')
-            return 0
-        self.check_eliminate()
-        for direct in self.direct_states:
-            for state in self.direct_states[direct]:
-                effect += state.order.value ** 3
-                target_level = 0
-                for index in state.indexes:
-                    monster = self.grid[index]
-                    target_level += monster.level
-                effect += (target_level - 3) * (state.order.value - 1) ** 3
-                log.debug('state %s effect=%s' % (state, effect))
-
-        self.swap_monster(index_one, index_other)
+        """ 评估交换的收益, 不修改盘面 """
+        effect = swap_effect.evaluate_swap(self.board_snapshot(), index_one, index_other)
+        log.debug('swap %s %s effect=%s', index_one, index_other, effect)
         return effect
 
+    def board_snapshot(self) -> swap_effect.BoardSnapshot:
+        if self.swap_snapshot is None:
+            self.swap_snapshot = swap_effect.BoardSnapshot.from_grid(self)
+        return self.swap_snapshot
+
+    def save_state(self) -> tuple:
+        """ 搜索用的快照: 盘面 计数 士兵 以及检查/指纹的缓存, 配合 restore_state 回退 """
+        if isinstance(self.grid, Board):
+            cells = self.grid.copy()
+        else:
+            cells = [copy.copy(cell) for cell in self.grid]
+        line_states = None if self.line_states is None else list(self.line_states)
+        cell_hashes = None if self.cell_hashes is None else list(self.cell_hashes)
+        return (cells, dict(self.type_count), self.soldiers.copy(), line_states, set(self.dirty_indexes),
+                self.direct_states, self.probably_eliminate, self.swap_snapshot, cell_hashes, self.fingerprint)
+
+    def restore_state(self, state):
+        """ 同一个快照可以多次恢复 """
+        cells, type_count, soldiers, line_states, dirty_indexes, \
+            self.direct_states, self.probably_eliminate, self.swap_snapshot, cell_hashes, self.fingerprint = state
+        if isinstance(cells, Board):
+            self.grid = cells.copy()
+        else:
+            self.grid = [copy.copy(cell) for cell in cells]
+        self.spawner.load(type_count)
+        self.soldiers = soldiers.copy()
+        self.line_states = None if line_states is None else list(line_states)
+        self.dirty_indexes = set(dirty_indexes)
+        self.cell_hashes = None if cell_hashes is None else list(cell_hashes)
+        self.swap_index = None
+
+    def snapshot(self, with_random=True) -> bytes:
+        """ 对局的二进制快照, 见 core.snapshot """
+        return snapshot.dump(self, with_random)
+
+    def restore(self, data, with_random=True):
+        snapshot.restore(self, data, with_random)
+
+    @classmethod
+    def from_snapshot(cls, data, compact=False, with_random=True, rng=None):
+        """ 按快照中的 grid_id 新建 Grid 并恢复 """
+        grid = cls(snapshot.read(data)['grid_id'], compact=compact, rng=rng)
+        return snapshot.restore(grid, data, with_random)
+
     def is_same_monster(self, index_one, index_other) -> bool:
         return self.grid[index_one].is_same(self.grid[index_other])
 
@@ -430,20 +602,15 @@ class Grid:
             return True
         return False
 
+    def get_swap_index(self) -> SwapIndex:
+        self.check_eliminate()
+        if self.swap_index is None:
+            self.swap_index = SwapIndex.from_grid(self)
+        return self.swap_index
+
     # 根据 index 和 期望的ref_id 找出附近 最大的关联结构 [[index],[index]]
     def get_nearby_index_lists(self, target) -> [[], []]:
-        current = target.index
-        result = []
-
-        for direct in self.probably_eliminate:
-            state_list = self.probably_eliminate[direct]
-            for cell in state_list:
-                pre = cell.get_pre(self)
-                next_ = cell.get_next(self)
-                if pre == current or next_ == current:
-                    result.append(cell.indexes)
-
-        return result
+        return self.get_swap_index().nearby(target.index)
 
     def get_completion_one(self, cell) -> Monster:
         """
@@ -451,26 +618,13 @@ class Grid:
         :param cell:
         return monster
         """
-        index_lists = self.get_nearby_index_lists(cell)
-        temp = []
-        for indexes in index_lists:
-            temp.extend(indexes)
-
-        target = []
-        for monster in self.grid:
-            if monster.get_type() != CellType.MONSTER:
-                continue
-            if not monster.is_same(cell):
-                continue
+        temp = set()
+        for indexes in self.get_nearby_index_lists(cell):
+            temp.update(indexes)
 
-            if monster.index in temp:
-                # log.debug('ignore %s' % monster)
-                pass
-            else:
-                # log.debug('monster=%s' % monster)
-                target.append(monster)
+        target = [index for index in self.get_swap_index().positions_of(cell.ref_id, cell.order) if index not in temp]
         if len(target) != 0:
-            return random.choice(target)
+            return self.grid[self.rng.choice(target)]
 
     def get_simple_swap_choice(self) -> Monster:
         for direct in self.probably_eliminate:
@@ -488,103 +642,28 @@ class Grid:
 
     # 获取备选方案 按权重倒序排序
     def get_complex_swap_choice(self) -> [CellVO]:
-        self.check_eliminate()
-
-        result = []
-        result.extend(self.cell_vo_by_successive())
-        if len(result) > 1:
-            result = sorted(result, key=lambda cell_vo: cell_vo.weight, reverse=True)
-        return result
-
-    # 分为 xo ox xx
-    def cell_vo_by_successive(self) -> [CellVO]:
-        vo_dict = {}  # id -> [(order,index)]
-        for direct in self.probably_eliminate:
-            state_list = self.probably_eliminate[direct]
-            for cell in state_list:
-                pre = cell.get_pre(self)
-                next_ = cell.get_next(self)
-                # log.debug('%s %s - %s' % (cell, pre, next_))
-
-                if cell.ref_id not in vo_dict:
-                    vo_dict[cell.ref_id] = []
-
-                id_ = vo_dict[cell.ref_id]
-                if pre is not None:
-                    id_.append((cell.order, pre))
-                if next_ is not None:
-                    id_.append((cell.order, next_))
-
-        result = []
-        for ref_id in vo_dict:
-            vo_tuple = vo_dict[ref_id]
-            # log.debug('%s: %s' % (ref_id, str(vo_tuple)))
-            result.extend(self.get_repeated_indexes(ref_id, vo_tuple))
-        return result
-
-    def get_repeated_indexes(self, ref_id, vo_tuple) -> [CellVO]:
-        temp = {}  # ref_id_order->count
-        result = []
-        for order, index in vo_tuple:
-            base = 1
-            if index < 0:
-                index *= -1
-                base = 1 / 2
-
-            key = (order, index)
-            if key not in temp:
-                temp[key] = base
-            else:
-                temp[key] = temp[key] + base
-
-        for order, index in temp:
-            key = (order, index)
-            if temp[key] > 0.75 and self.grid[index].get_type() == CellType.MONSTER:
-                cell = CellVO(ref_id, order, index, temp[key])
-                result.append(cell)
-        return result
+        return self.get_swap_index().swap_choice()
 
     def show(self):
-        log.setLevel(logging.INFO)
+        """ 级别为 INFO 时输出, 需要看盘面的调用方自己调整 log 的级别 """
         self.table_show()
         self.show_detail()
         self.show_soldier()
-        log.info('type count: %s' % self.type_count)
+        log.info('type count: %s', self.type_count)
 
     def show_detail(self):
-        for i in range(self.row):
-            temp = ''
-            for j in range(self.col):
-                temp += "%8s" % (self.grid[i * self.col + j].show())
-            log.info('%s' % temp)
+        log.info('\n%s', render.LazyText(render.grid_detail, self))
 
     def table_show(self):
-        log.info('┏' + '━┳' * (self.col - 1) + '━┓')
-        for i in range(self.row):
-            temp = '┃'
-            for j in range(self.col):
-                temp += "%s┃" % (self.grid[i * self.col + j].simple_show())
-            log.info('%s' % temp)
-            if i != self.row - 1:
-                log.info('┣' + '━╋' * (self.col - 1) + '━┫')
-        log.info("┗" + '━┻' * (self.col - 1) + "━┛")
+        log.info('\n%s', render.LazyText(render.grid_table, self))
 
     def simple_show(self):
-        for i in range(self.row):
-            temp = '|'
-            for j in range(self.col):
-                temp += "%2s" % (self.grid[i * self.col + j].simple_show())
-            log.info('%s |' % temp)
+        log.info('\n%s', render.LazyText(render.grid_simple, self))
 
     def show_soldier(self):
-        result = []
-        for (ref_id, order, level) in self.soldiers:
-            result.append(self.soldiers[(ref_id, order, level)])
-            # log.info('%s' % self.soldiers[(ref_id, order, level)])
-
-        result = sorted(result, key=lambda soldiers: soldiers.order.value, reverse=True)
-        count = 0
+        if not log.isEnabledFor(logging.INFO):
+            return
+        result = sorted(self.soldiers.values(), key=lambda soldiers: soldiers.order.value, reverse=True)
         for soldier in result:
-            log.info('%s' % soldier)
-            count += soldier.count
-        log.info('count=%s' % count)
+            log.info('%s', soldier)
+        log.info('count=%s', self.soldiers.total())
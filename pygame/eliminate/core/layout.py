@@ -0,0 +1,80 @@
+"""
+    按盘面形状 (row, col) 预先算好的 index 表, 同形状的 Grid 共用一份:
+        rows columns south_easts north_easts: 每一行/列/斜线的格子 index
+        lines: 需要检查的线 [(direct, [index])], 与 check_east check_south check_north_east check_south_east 的顺序一致
+        cell_lines: index -> 经过它的 line_id (line_tuples cell_line_tuples 为对应的 tuple)
+        forward backward: direct -> index -> 沿线方向的后一个/前一个格子, 出界为 -1, 两张表合起来是 8 个方向的邻居
+    斜线的方向与线内 index 的顺序一致: SOUTH_EAST 向右下, NORTH_EAST 的线从右上往左下排列
+"""
+from domain.direct_type import DirectType
+
+layouts = {}  # (row, col) -> Layout
+
+
+class Layout:
+    def __init__(self, row, col):
+        self.row = row
+        self.col = col
+        self.size = row * col
+        self.rows = [[x * col + y for y in range(col)] for x in range(row)]
+        self.columns = [[x * col + y for x in range(row)] for y in range(col)]
+        # 从第一行以及第一列(SOUTH_EAST) / 最后一列(NORTH_EAST)出发的全部斜线, 包括长度不到 3 的
+        self.south_easts = [self.walk(DirectType.SOUTH_EAST, start)
+                            for start in list(range(col)) + list(range(col, self.size, col))]
+        self.north_easts = [self.walk(DirectType.NORTH_EAST, start)
+                            for start in list(range(col)) + list(range(2 * col - 1, self.size, col))]
+
+        self.forward = {direct: [self.move(direct, index, 1) for index in range(self.size)] for direct in DirectType}
+        self.backward = {direct: [self.move(direct, index, -1) for index in range(self.size)] for direct in DirectType}
+
+        self.lines = [(DirectType.EAST, indexes) for indexes in self.rows]
+        self.lines.extend((DirectType.SOUTH, indexes) for indexes in self.columns)
+        self.lines.extend((DirectType.NORTH_EAST, indexes) for indexes in self.north_easts if len(indexes) >= 3)
+        self.lines.extend((DirectType.SOUTH_EAST, indexes) for indexes in self.south_easts if len(indexes) >= 3)
+
+        self.cell_lines = [[] for _ in range(self.size)]
+        for line_id in range(len(self.lines)):
+            for index in self.lines[line_id][1]:
+                self.cell_lines[index].append(line_id)
+        # BoardSnapshot 用的不可变版本
+        self.line_tuples = tuple(tuple(indexes) for _, indexes in self.lines)
+        self.cell_line_tuples = tuple(tuple(line_ids) for line_ids in self.cell_lines)
+
+    def move(self, direct, index, sign) -> int:
+        """ 沿 direct 走一步 (sign=-1 为反方向), 出界为 -1 """
+        x, y = divmod(index, self.col)
+        if direct == DirectType.EAST:
+            x, y = x, y + sign
+        elif direct == DirectType.SOUTH:
+            x, y = x + sign, y
+        elif direct == DirectType.SOUTH_EAST:
+            x, y = x + sign, y + sign
+        else:
+            x, y = x + sign, y - sign
+        if 0 <= x < self.row and 0 <= y < self.col:
+            return x * self.col + y
+        return -1
+
+    def walk(self, direct, start) -> [int]:
+        result = []
+        index = start
+        while index >= 0:
+            result.append(index)
+            index = self.move(direct, index, 1)
+        return result
+
+    def neighbours(self, index) -> [int]:
+        """ 8 个方向上相邻的格子 """
+        result = []
+        for direct in DirectType:
+            for table in (self.forward, self.backward):
+                if table[direct][index] >= 0:
+                    result.append(table[direct][index])
+        return result
+
+
+def get_layout(row, col) -> Layout:
+    key = (row, col)
+    if key not in layouts:
+        layouts[key] = Layout(row, col)
+    return layouts[key]
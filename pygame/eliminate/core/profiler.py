@@ -0,0 +1,64 @@
+"""
+    推演各阶段的性能统计:
+        Grid.profiler 为 None 时不做任何统计, 设置 PhaseProfiler 后记录
+        每个阶段的 总耗时 次数 处理的格子数, 每次交换的连锁深度分布, 并在每个阶段结束时回调
+    阶段: strategy(选择交换方案) swap synthesize eliminate generate
+"""
+import time
+
+PHASES = ('strategy', 'swap', 'synthesize', 'eliminate', 'generate')
+
+
+class PhaseProfiler:
+    def __init__(self):
+        self.times = {phase: 0.0 for phase in PHASES}  # phase -> 秒
+        self.counts = {phase: 0 for phase in PHASES}  # phase -> 调用次数
+        self.cells = {phase: 0 for phase in PHASES}  # phase -> 处理的格子数 (返回 list 的阶段)
+        self.cascades = {}  # 连锁深度 -> 交换次数
+        self.callbacks = {}  # phase -> [callback(phase, elapsed, result)]
+
+    def on(self, phase, callback):
+        """ 注册阶段结束时的回调 """
+        self.callbacks.setdefault(phase, []).append(callback)
+
+    def run(self, phase, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.record(phase, time.perf_counter() - start, result)
+        return result
+
+    def record(self, phase, elapsed, result=None):
+        self.times[phase] = self.times.get(phase, 0.0) + elapsed
+        self.counts[phase] = self.counts.get(phase, 0) + 1
+        if isinstance(result, list):
+            self.cells[phase] = self.cells.get(phase, 0) + len(result)
+        for callback in self.callbacks.get(phase, ()):
+            callback(phase, elapsed, result)
+
+    def record_cascade(self, depth):
+        self.cascades[depth] = self.cascades.get(depth, 0) + 1
+
+    def merge(self, other):
+        """ 合并另一份统计, other 可以是 PhaseProfiler 或 to_dict 的结果 """
+        if isinstance(other, PhaseProfiler):
+            other = other.to_dict()
+        for phase, value in other['times'].items():
+            self.times[phase] = self.times.get(phase, 0.0) + value
+        for phase, value in other['counts'].items():
+            self.counts[phase] = self.counts.get(phase, 0) + value
+        for phase, value in other['cells'].items():
+            self.cells[phase] = self.cells.get(phase, 0) + value
+        for depth, value in other['cascades'].items():
+            self.cascades[int(depth)] = self.cascades.get(int(depth), 0) + value
+        return self
+
+    def to_dict(self) -> {}:
+        return {
+            'times': dict(self.times),
+            'counts': dict(self.counts),
+            'cells': dict(self.cells),
+            'cascades': {depth: self.cascades[depth] for depth in sorted(self.cascades)},
+        }
+
+    def hot_phase(self) -> str:
+        return max(self.times, key=self.times.get)
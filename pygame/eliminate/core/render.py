@@ -0,0 +1,52 @@
+"""
+    盘面的文本渲染:
+        LazyText 作为日志的参数传入, logging 只在真正输出这条日志时才调用 str(),
+        日志级别不够时盘面不会被格式化, 无界面批量推演时没有渲染开销
+    渲染函数只依赖每个格子的文本, 也用于离线渲染 MoveTrace
+"""
+
+
+class LazyText:
+    """ 第一次 str() 时才渲染, 多个 handler 输出同一条日志时只渲染一次 """
+    __slots__ = ('func', 'args', 'text')
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+        self.text = None
+
+    def __str__(self):
+        if self.text is None:
+            self.text = self.func(*self.args)
+        return self.text
+
+
+def table_text(texts, row, col) -> str:
+    """ texts: 每个格子的文本, 按 index 排列 """
+    lines = ['┏' + '━┳' * (col - 1) + '━┓']
+    for i in range(row):
+        lines.append('┃' + ''.join('%s┃' % texts[i * col + j] for j in range(col)))
+        if i != row - 1:
+            lines.append('┣' + '━╋' * (col - 1) + '━┫')
+    lines.append('┗' + '━┻' * (col - 1) + '━┛')
+    return '\n'.join(lines)
+
+
+def detail_text(texts, row, col) -> str:
+    return '\n'.join(''.join('%8s' % texts[i * col + j] for j in range(col)) for i in range(row))
+
+
+def simple_text(texts, row, col) -> str:
+    return '\n'.join('|' + ''.join('%2s' % texts[i * col + j] for j in range(col)) + ' |' for i in range(row))
+
+
+def grid_table(grid) -> str:
+    return table_text([cell.simple_show() for cell in grid.grid], grid.row, grid.col)
+
+
+def grid_detail(grid) -> str:
+    return detail_text([cell.show() for cell in grid.grid], grid.row, grid.col)
+
+
+def grid_simple(grid) -> str:
+    return simple_text([cell.simple_show() for cell in grid.grid], grid.row, grid.col)
@@ -0,0 +1,99 @@
+"""
+    对局的逐步记录和重放, 用来逐位对比引擎优化前后的结果:
+        MoveLog 在开局时保存一份带 rng 状态的快照, 之后每步记录 交换的两个 index 以及交换消除后整个状态的摘要
+        (盘面 生成计数 士兵 rng 状态, 见 core.snapshot)
+        replay 从快照恢复, 每步重新按记录的策略选择交换, 检查选出的交换和交换后的摘要与记录一致
+    策略中用到的随机数也来自 grid.rng, 所以重放必须重新执行策略; LOOKAHEAD 按时间预算搜索时结果不确定, 记录时应只用节点预算
+
+    文件格式: 头部 <4sBBI b'ELML' 版本 策略 快照长度, 之后为快照, 每步为 <hh16s
+    python -m core.replay game.moves [--compact]
+"""
+import argparse
+import hashlib
+import random
+import struct
+
+from core import snapshot
+from domain.enum_type import StrategyType
+
+MAGIC = b'ELML'
+VERSION = 1
+HEADER = struct.Struct('<4sBBI')
+MOVE = struct.Struct('<hh16s')
+
+
+class ReplayMismatch(Exception):
+    def __init__(self, move, reason):
+        super().__init__('move %s: %s' % (move, reason))
+        self.move = move
+        self.reason = reason
+
+
+class MoveLog:
+    def __init__(self, strategy_type, initial=b''):
+        self.strategy_type = strategy_type
+        self.initial = initial  # 开局的快照
+        self.moves = []  # [(index_one, index_other, digest)]
+
+    def start(self, grid):
+        self.initial = snapshot.dump(grid)
+        self.moves = []
+
+    def record(self, grid, index_one, index_other):
+        self.moves.append((index_one, index_other, state_digest(grid)))
+
+    def to_bytes(self) -> bytes:
+        data = bytearray(HEADER.pack(MAGIC, VERSION, self.strategy_type.value, len(self.initial)))
+        data.extend(self.initial)
+        for move in self.moves:
+            data.extend(MOVE.pack(*move))
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, strategy, length = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('not a move log')
+        move_log = cls(StrategyType(strategy), bytes(data[HEADER.size:HEADER.size + length]))
+        for offset in range(HEADER.size + length, len(data), MOVE.size):
+            move_log.moves.append(MOVE.unpack_from(data, offset))
+        return move_log
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+
+def state_digest(grid) -> bytes:
+    return hashlib.blake2b(snapshot.dump(grid), digest_size=16).digest()
+
+
+def replay(move_log, compact=False) -> int:
+    """ 重放全部步骤, 不一致时抛出 ReplayMismatch, 返回重放的步数 """
+    from core.grid import Grid
+
+    grid = Grid.from_snapshot(move_log.initial, compact=compact, rng=random.Random())
+    for move in range(len(move_log.moves)):
+        index_one, index_other, digest = move_log.moves[move]
+        cells = grid.swap_by_strategy(move_log.strategy_type)
+        plan = tuple(cell.index for cell in cells)
+        if plan != (index_one, index_other):
+            raise ReplayMismatch(move, 'plan %s, recorded %s' % (plan, (index_one, index_other)))
+        grid.swap_and_eliminate(cells)
+        if state_digest(grid) != digest:
+            raise ReplayMismatch(move, 'state differs after swap %s' % (plan,))
+    return len(move_log.moves)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='replay a recorded game and check every state')
+    parser.add_argument('path')
+    parser.add_argument('--compact', action='store_true', help='replay on the array backed board')
+    args = parser.parse_args()
+    with open(args.path, 'rb') as file:
+        move_log = MoveLog.from_bytes(file.read())
+    print('replayed %s moves, all states match' % replay(move_log, args.compact))
+
+
+if __name__ == '__main__':
+    main()
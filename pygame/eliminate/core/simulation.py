@@ -0,0 +1,215 @@
+"""
+    无界面批量推演:
+        按 json/grid.json 中的盘面配置跑 N 局独立的游戏, 每局使用固定的种子, 可以放到进程池中并行
+        记录每局的 步数 每秒步数 每步连锁次数 产出士兵数 以及各阶段耗时, 导出为 CSV / JSON
+        --profile 时每局附带 PhaseProfiler 的细分统计, 汇总在 JSON 的 summary.profile 中
+        --trace 目录 时每局写一份二进制对局记录 game_N.trace, 用 python -m core.trace 离线渲染
+        --boards 文件 时依次使用 core.board_batch 预先生成的盘面开局, 不再随机生成
+        --record 目录 时每局写一份逐步记录 game_N.moves, 用 python -m core.replay 重放并逐步检查状态
+        --search-workers N 时对局在当前进程中串行, 整次推演共用一个 N 个进程的 SearchPool 并行评估交换方案, 结束后关闭
+    每局的士兵产出以 SoldierLedger 返回, 汇总时按数组合并, 在 summary.production 中按 怪物 品质 等级 导出
+    每局使用独立的 random.Random(seed), 不影响全局的 random
+
+    python -m core.simulation --games 100 --loop 50 --workers 4 --csv result.csv --json result.json
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core import board_batch
+from core.grid import Grid
+from core.main_config import MainConfig
+from core.profiler import PhaseProfiler
+from core.replay import MoveLog
+from core.strategy.high_order_first import SearchPool
+from core.trace import MoveTrace
+from domain.enum_type import StrategyType
+
+FIELDS = ['game', 'grid_id', 'seed', 'moves', 'cascades', 'cascades_per_move', 'soldiers',
+          'moves_per_sec', 'init_time', 'strategy_time', 'eliminate_time', 'total_time']
+
+
+def play_game(game, grid_id, seed, loop, strategy_type=StrategyType.HIGH_ORDER_FIRST, compact=False,
+              profile=False, trace_dir=None, codes=None, record_dir=None, search_pool=None) -> {}:
+    """
+    跑完一局, 直到步数用完或找不到交换方案
+    :param codes: board_batch 生成的盘面, None 时随机生成
+    :param search_pool: SearchPool 由调用方创建和关闭, 可以在多局间复用
+    """
+    start = time.perf_counter()
+    grid = Grid(grid_id, compact=compact, rng=random.Random(seed))
+    grid.search_pool = search_pool
+    if profile:
+        grid.profiler = PhaseProfiler()
+    if codes is None:
+        grid.init_generate_grid()
+    else:
+        grid.init_from_codes(codes)
+    init_time = time.perf_counter() - start
+    if trace_dir is not None:
+        grid.trace = MoveTrace.for_grid(grid)
+        grid.trace.record(grid)
+    if record_dir is not None:
+        grid.move_log = MoveLog(strategy_type)
+        grid.move_log.start(grid)
+
+    moves = 0
+    cascades = 0
+    strategy_time = 0.0
+    eliminate_time = 0.0
+    for i in range(loop):
+        begin = time.perf_counter()
+        cells = grid.swap_by_strategy(strategy_type)
+        strategy_time += time.perf_counter() - begin
+        if len(cells) == 0:
+            break
+
+        begin = time.perf_counter()
+        cascades += grid.swap_and_eliminate(cells)
+        eliminate_time += time.perf_counter() - begin
+        moves += 1
+
+    total_time = time.perf_counter() - start
+    play_time = strategy_time + eliminate_time
+    result = {
+        'game': game,
+        'grid_id': grid_id,
+        'seed': seed,
+        'moves': moves,
+        'cascades': cascades,
+        'cascades_per_move': cascades / moves if moves else 0.0,
+        'soldiers': grid.soldiers.total(),
+        'moves_per_sec': moves / play_time if play_time else 0.0,
+        'init_time': init_time,
+        'strategy_time': strategy_time,
+        'eliminate_time': eliminate_time,
+        'total_time': total_time,
+        'ledger': grid.soldiers,
+    }
+    if profile:
+        result['profile'] = grid.profiler.to_dict()
+    if trace_dir is not None:
+        grid.trace.save(os.path.join(trace_dir, 'game_%s.trace' % game))
+    if record_dir is not None:
+        grid.move_log.save(os.path.join(record_dir, 'game_%s.moves' % game))
+    return result
+
+
+def play_game_args(args) -> {}:
+    return play_game(*args)
+
+
+def run_batch(games, grid_ids=None, seed=0, loop=100, workers=None, compact=False,
+              strategy_type=StrategyType.HIGH_ORDER_FIRST, profile=False, trace_dir=None,
+              boards_path=None, record_dir=None, search_workers=None) -> [{}]:
+    """
+    :param grid_ids: 参与推演的盘面, 默认 grid.json 中的全部, 各局依次轮流使用
+    :param seed: 第 i 局的种子为 seed + i, 与是否并行无关
+    :param workers: 进程数, None 为在当前进程中串行
+    :param search_workers: 评估交换方案的进程数, 此时各局在当前进程中串行, 不能与 workers 同时使用
+    :param boards_path: board_batch 文件, 第 i 局使用其中第 i 个盘面, 此时忽略 grid_ids, 局数不超过盘面数
+    """
+    if search_workers is not None and workers is not None and workers > 1:
+        raise ValueError('search_workers requires games to run serially, do not set workers')
+    if grid_ids is None:
+        grid_ids = list(range(len(MainConfig().grids)))
+    boards = [None] * games
+    if boards_path is not None:
+        with open(boards_path, 'rb') as file:
+            grid_ids = [board_batch.read_header(file)[0]]
+        boards = list(itertools.islice(board_batch.iter_boards(boards_path), games))
+
+    tasks = []
+    for game in range(len(boards)):
+        tasks.append((game, grid_ids[game % len(grid_ids)], seed + game, loop, strategy_type, compact,
+                      profile, trace_dir, boards[game], record_dir))
+
+    if search_workers is not None:
+        with SearchPool(search_workers) as search_pool:
+            return [play_game(*task, search_pool=search_pool) for task in tasks]
+    if workers is None or workers <= 1:
+        return [play_game_args(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(play_game_args, tasks, chunksize=max(1, games // (workers * 4))))
+
+
+def summarize(results) -> {}:
+    """ 汇总全部对局, 时间类字段为总和 """
+    moves = sum(result['moves'] for result in results)
+    cascades = sum(result['cascades'] for result in results)
+    play_time = sum(result['strategy_time'] + result['eliminate_time'] for result in results)
+    summary = {
+        'games': len(results),
+        'moves': moves,
+        'cascades': cascades,
+        'cascades_per_move': cascades / moves if moves else 0.0,
+        'soldiers': sum(result['soldiers'] for result in results),
+        'moves_per_sec': moves / play_time if play_time else 0.0,
+        'init_time': sum(result['init_time'] for result in results),
+        'strategy_time': sum(result['strategy_time'] for result in results),
+        'eliminate_time': sum(result['eliminate_time'] for result in results),
+    }
+    profiles = [result['profile'] for result in results if 'profile' in result]
+    if len(profiles) != 0:
+        profiler = PhaseProfiler()
+        for profile in profiles:
+            profiler.merge(profile)
+        summary['profile'] = profiler.to_dict()
+    ledgers = [result['ledger'] for result in results if 'ledger' in result]
+    if len(ledgers) != 0:
+        production = ledgers[0].copy()
+        for ledger in ledgers[1:]:
+            production.merge(ledger)
+        summary['production'] = production.stats()
+    return summary
+
+
+def write_csv(results, path):
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def write_json(results, path):
+    with open(path, 'w') as file:
+        games = [{key: value for key, value in result.items() if key != 'ledger'} for result in results]
+        json.dump({'summary': summarize(results), 'games': games}, file, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='headless batch simulation')
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--grids', type=int, nargs='*', help='grid ids in json/grid.json, default all')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--loop', type=int, default=100, help='max moves per game')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--search-workers', type=int, help='processes evaluating swaps, games run serially')
+    parser.add_argument('--compact', action='store_true', help='use array backed board')
+    parser.add_argument('--strategy', default=StrategyType.HIGH_ORDER_FIRST.name,
+                        choices=[strategy.name for strategy in StrategyType])
+    parser.add_argument('--profile', action='store_true', help='record per phase timings')
+    parser.add_argument('--trace', help='directory to write binary move traces')
+    parser.add_argument('--boards', help='starting boards generated by core.board_batch')
+    parser.add_argument('--record', help='directory to write move logs for core.replay')
+    parser.add_argument('--csv')
+    parser.add_argument('--json')
+    args = parser.parse_args()
+
+    results = run_batch(args.games, args.grids or None, args.seed, args.loop, args.workers, args.compact,
+                        StrategyType[args.strategy], args.profile, args.trace, args.boards, args.record,
+                        args.search_workers)
+    if args.csv:
+        write_csv(results, args.csv)
+    if args.json:
+        write_json(results, args.json)
+    print(json.dumps(summarize(results), indent=2))
+
+
+if __name__ == '__main__':
+    main()
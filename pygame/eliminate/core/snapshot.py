@@ -0,0 +1,156 @@
+"""
+    对局中途的二进制快照, 包括 盘面 生成计数 上场士兵 以及 grid.rng 的状态:
+        头部: <4sBHHHB b'ELSS' 版本 grid_id row col 怪物数, 之后每个怪物 ref_id 为 1 字节长度 + utf-8
+        盘面: 与 Board 相同的 5 个平行数组 类型 怪物编码 品质 等级 石头血量, 依次为 row*col 个 b h b i b
+        生成计数: 每个怪物一个 <i
+        士兵: <I 个数, 之后每个为 <hbii 怪物编码 品质 soldiers 中的 level 数量
+        random: <B625I grid.rng.getstate() 的版本和 MT 状态, 之后 <Bd gauss_next 是否存在和值; 不带 random 时只有一个字节 0
+    dump/restore 在同形状的 Grid 之间复制对局, 可用于搜索时分叉, save/load 写入和读取文件
+    Grid.snapshot / Grid.restore / Grid.from_snapshot 是对应的入口
+
+    python -m core.snapshot game.snapshot 显示快照中的盘面
+"""
+import struct
+import sys
+from array import array
+
+from core import detector, render
+from core.board import Board
+from core.soldier_ledger import SoldierLedger
+from domain.enum_type import OrderType
+
+MAGIC = b'ELSS'
+VERSION = 1
+HEADER = struct.Struct('<4sBHHHB')
+SOLDIER = struct.Struct('<hbii')
+RANDOM = struct.Struct('<B625I')
+GAUSS = struct.Struct('<Bd')
+COLUMNS = (('cell_type', 'b'), ('ref_code', 'h'), ('order', 'b'), ('level', 'i'), ('hp', 'b'))
+
+
+def dump(grid, with_random=True) -> bytes:
+    board = grid.grid
+    if not isinstance(board, Board):
+        board = Board.from_cells(detector.get_ref_ids(grid)[1:], board)
+
+    data = bytearray(HEADER.pack(MAGIC, VERSION, grid.grid_id, grid.row, grid.col, len(board.ref_ids) - 1))
+    for ref_id in board.ref_ids[1:]:
+        encoded = ref_id.encode('utf-8')
+        data.append(len(encoded))
+        data.extend(encoded)
+    for name, type_code in COLUMNS:
+        values = getattr(board, name)
+        if sys.byteorder == 'big':
+            values = array(type_code, values)
+            values.byteswap()
+        data.extend(values.tobytes())
+
+    counts = [grid.type_count[ref_id] for ref_id in board.ref_ids[1:]]
+    data.extend(struct.pack('<%si' % len(counts), *counts))
+    data.extend(struct.pack('<I', len(grid.soldiers)))
+    for (ref_id, order, level), soldier in grid.soldiers.items():
+        data.extend(SOLDIER.pack(board.ref_codes[ref_id], order.value, level, soldier.count))
+
+    if with_random:
+        version, internal, gauss_next = grid.rng.getstate()
+        data.extend(RANDOM.pack(version, *internal))
+        data.extend(GAUSS.pack(gauss_next is not None, gauss_next or 0.0))
+    else:
+        data.append(0)
+    return bytes(data)
+
+
+def read(data) -> {}:
+    """ 解析快照, 返回 {grid_id row col ref_ids board type_count soldiers random_state} """
+    magic, version, grid_id, row, col, count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a grid snapshot')
+    offset = HEADER.size
+    ref_ids = []
+    for i in range(count):
+        length = data[offset]
+        ref_ids.append(bytes(data[offset + 1:offset + 1 + length]).decode('utf-8'))
+        offset += 1 + length
+
+    board = Board(ref_ids)
+    for name, type_code in COLUMNS:
+        values = array(type_code)
+        values.frombytes(data[offset:offset + row * col * values.itemsize])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        setattr(board, name, values)
+        offset += row * col * values.itemsize
+
+    type_count = dict(zip(ref_ids, struct.unpack_from('<%si' % count, data, offset)))
+    offset += 4 * count
+    soldiers = SoldierLedger(ref_ids)
+    number = struct.unpack_from('<I', data, offset)[0]
+    for i in range(number):
+        code, order, level, count = SOLDIER.unpack_from(data, offset + 4 + i * SOLDIER.size)
+        soldiers.add(board.ref_ids[code], OrderType(order), level, count)
+    offset += 4 + number * SOLDIER.size
+
+    random_state = None
+    if data[offset] != 0:
+        values = RANDOM.unpack_from(data, offset)
+        has_gauss, gauss_next = GAUSS.unpack_from(data, offset + RANDOM.size)
+        random_state = (values[0], values[1:], gauss_next if has_gauss else None)
+    return {
+        'grid_id': grid_id, 'row': row, 'col': col, 'ref_ids': ref_ids, 'board': board,
+        'type_count': type_count, 'soldiers': soldiers, 'random_state': random_state,
+    }
+
+
+def restore(grid, data, with_random=True):
+    """ 把快照恢复到形状相同的 grid 上, 检查/指纹/候选的缓存全部重建 """
+    state = read(data)
+    if (state['row'], state['col']) != (grid.row, grid.col):
+        raise ValueError('snapshot shape %sx%s does not match grid' % (state['row'], state['col']))
+    if state['ref_ids'] != detector.get_ref_ids(grid)[1:]:
+        raise ValueError('snapshot monsters %s do not match grid' % state['ref_ids'])
+
+    board = state['board']
+    if isinstance(grid.grid, Board):
+        grid.grid = board
+    else:
+        grid.grid = list(board)
+    grid.spawner.load(state['type_count'])
+    grid.soldiers = state['soldiers']
+
+    grid.line_states = None
+    grid.dirty_indexes = set()
+    grid.direct_states = {}
+    grid.probably_eliminate = {}
+    grid.swap_snapshot = None
+    grid.swap_index = None
+    grid.cell_hashes = None
+    grid.fingerprint = 0
+    grid.check_eliminate()
+
+    if with_random and state['random_state'] is not None:
+        grid.rng.setstate(state['random_state'])
+    return grid
+
+
+def save(grid, path, with_random=True):
+    with open(path, 'wb') as file:
+        file.write(dump(grid, with_random))
+
+
+def load(grid, path, with_random=True):
+    with open(path, 'rb') as file:
+        return restore(grid, file.read(), with_random)
+
+
+def main():
+    with open(sys.argv[1], 'rb') as file:
+        state = read(file.read())
+    board = state['board']
+    print(render.table_text([cell.simple_show() for cell in board], state['row'], state['col']))
+    print('type count: %s' % state['type_count'])
+    for soldier in state['soldiers'].values():
+        print(soldier)
+
+
+if __name__ == '__main__':
+    main()
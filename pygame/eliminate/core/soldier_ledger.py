@@ -0,0 +1,97 @@
+"""
+    上场士兵的计数账本, 代替 (ref_id, order, level) -> Soldier 的字典:
+        counts 是按 [level][怪物编码][品质] 排列的一维 array('q'), 下标为 level * stride + code * ORDERS + order.value - 1
+        等级超出时在末尾追加一层, 已有的下标不变
+    同一组怪物的账本可以直接按数组相加合并, 多局的产出汇总后用 stats() 导出
+    items() / values() 按需生成 Soldier, 与原来的字典用法一致
+"""
+from array import array
+
+from domain.enum_type import OrderType
+from domain.soldier import Soldier
+
+ORDERS = len(OrderType)
+
+
+class SoldierLedger:
+    def __init__(self, ref_ids, counts=None):
+        self.ref_ids = list(ref_ids)
+        self.codes = {ref_ids[i]: i for i in range(len(ref_ids))}
+        self.stride = len(ref_ids) * ORDERS  # 每个等级占用的长度
+        self.counts = array('q') if counts is None else array('q', counts)
+
+    def slot(self, ref_id, order, level) -> int:
+        return level * self.stride + self.codes[ref_id] * ORDERS + order.value - 1
+
+    def add(self, ref_id, order, level, count):
+        index = self.slot(ref_id, order, level)
+        if index >= len(self.counts):
+            levels = index // self.stride + 1
+            self.counts.extend(array('q', bytes(8 * (levels * self.stride - len(self.counts)))))
+        self.counts[index] += count
+
+    def record(self, ref_id, order, target_level):
+        """ 与 Grid.record_soldier 相同: 记在 level - 1 上, 数量为 level """
+        self.add(ref_id, order, target_level - 1, max(target_level, 1))
+
+    def count(self, ref_id, order, level) -> int:
+        index = self.slot(ref_id, order, level)
+        return self.counts[index] if index < len(self.counts) else 0
+
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def order_totals(self) -> [int]:
+        """ 各品质的数量, 下标为 order.value - 1 """
+        totals = [0] * ORDERS
+        for slot in range(ORDERS):
+            totals[slot] = sum(self.counts[slot::ORDERS])
+        return totals
+
+    def keys(self):
+        """ 数量不为 0 的 (ref_id, order, level), 按 level 怪物 品质 的顺序 """
+        for index in range(len(self.counts)):
+            if self.counts[index] != 0:
+                level, rest = divmod(index, self.stride)
+                code, slot = divmod(rest, ORDERS)
+                yield self.ref_ids[code], OrderType(slot + 1), level
+
+    def items(self):
+        for key in self.keys():
+            yield key, Soldier(key[0], key[1], key[2], self.count(*key))
+
+    def values(self):
+        for key, soldier in self.items():
+            yield soldier
+
+    def __len__(self):
+        return len(self.counts) - self.counts.count(0)
+
+    def copy(self):
+        return SoldierLedger(self.ref_ids, self.counts)
+
+    def merge(self, other):
+        """ 把 other 的计数加到自身, 两者的怪物必须相同 """
+        if other.ref_ids != self.ref_ids:
+            raise ValueError('ledger monsters %s do not match %s' % (other.ref_ids, self.ref_ids))
+        if len(other.counts) > len(self.counts):
+            self.counts.extend(array('q', bytes(8 * (len(other.counts) - len(self.counts)))))
+        for index in range(len(other.counts)):
+            if other.counts[index] != 0:
+                self.counts[index] += other.counts[index]
+        return self
+
+    def stats(self) -> {}:
+        """ 汇总的产出: 总数 以及按 怪物 品质 等级 的数量 """
+        monsters = {ref_id: 0 for ref_id in self.ref_ids}
+        levels = {}
+        for (ref_id, order, level), soldier in self.items():
+            monsters[ref_id] += soldier.count
+            levels[level] = levels.get(level, 0) + soldier.count
+        order_totals = self.order_totals()
+        return {
+            'total': self.total(),
+            'monsters': monsters,
+            'orders': {order.string(): order_totals[order.value - 1] for order in OrderType},
+            'levels': dict(sorted(levels.items())),
+        }
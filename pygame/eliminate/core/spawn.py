@@ -0,0 +1,106 @@
+"""
+    怪物生成:
+        counts 为每种怪物累计生成的数量 (Grid.type_count 就是这个 dict)
+        生成时在 数量/权重 不是最大的那些怪物中随机, 全部相同时在所有怪物中随机, 保持各种怪物的比例
+        权重来自 monster.json 的 weight, 默认为 1, 必须大于 0, 全部为 1 时等概率随机, 否则按权重随机
+
+    按 数量/权重 分桶, 每个桶是怪物下标的位掩码, 最大的桶对应的候选列表按掩码缓存,
+    每次生成只需要 O(1) 更新桶和查表, 不用每次重新统计
+"""
+import random
+
+
+class SpawnEngine:
+    def __init__(self, monsters, rng=random):
+        """ :param rng: 随机源, 默认为全局的 random """
+        self.rng = rng
+        self.ids = [monster['id'] for monster in monsters]
+        self.weights = [monster.get('weight', 1) for monster in monsters]
+        for ref_id, weight in zip(self.ids, self.weights):
+            if not weight > 0:
+                raise ValueError('monster %s weight must be positive, got %r' % (ref_id, weight))
+        self.bits = {ref_id: 1 << i for i, ref_id in enumerate(self.ids)}
+        self.weight = dict(zip(self.ids, self.weights))
+        self.uniform = all(weight == self.weights[0] for weight in self.weights)
+        self.counts = {ref_id: 0 for ref_id in self.ids}
+        self.buckets = {}  # 数量/权重 -> 怪物掩码
+        self.max_key = 0
+        self.choices = {}  # (最大桶的掩码, 排除的掩码) -> (候选, 累计权重)
+        self.others = {}  # ref_id -> (其他怪物, 累计权重)
+        self.load(self.counts)
+
+    def key(self, ref_id):
+        return self.counts[ref_id] / self.weight[ref_id]
+
+    def load(self, counts):
+        """ 用另一份计数重建桶, counts 保持为同一个 dict 对象 """
+        if counts is not self.counts:
+            self.counts.clear()
+            self.counts.update(counts)
+        self.buckets = {}
+        for ref_id in self.ids:
+            key = self.key(ref_id)
+            self.buckets[key] = self.buckets.get(key, 0) | self.bits[ref_id]
+        self.max_key = max(self.buckets)
+
+    def change(self, ref_id, delta):
+        bit = self.bits[ref_id]
+        old = self.key(ref_id)
+        self.buckets[old] ^= bit
+        if self.buckets[old] == 0:
+            del self.buckets[old]
+        self.counts[ref_id] += delta
+        new = self.key(ref_id)
+        self.buckets[new] = self.buckets.get(new, 0) | bit
+        if new > self.max_key:
+            self.max_key = new
+        elif old == self.max_key and old not in self.buckets:
+            self.max_key = max(self.buckets)
+
+    def mask(self, ref_ids) -> int:
+        result = 0
+        for ref_id in ref_ids:
+            result |= self.bits[ref_id]
+        return result
+
+    def candidates(self, exclude=0) -> ([str], [float]):
+        """
+        数量/权重 不是最大的怪物 以及累计权重, 全部相同时为所有怪物
+        :param exclude: 不能选的怪物掩码, 排除后没有候选时放宽比例限制, 仍没有时忽略
+        """
+        top = self.buckets[self.max_key]
+        if (top, exclude) not in self.choices:
+            ids = [ref_id for ref_id in self.ids if not self.bits[ref_id] & (top | exclude)]
+            if len(ids) == 0:
+                ids = [ref_id for ref_id in self.ids if not self.bits[ref_id] & exclude]
+            if len(ids) == 0:
+                ids = list(self.ids)
+            self.choices[(top, exclude)] = ids, cumulative(ids, self.weight)
+        return self.choices[(top, exclude)]
+
+    def pick(self, ids, cum_weights) -> str:
+        if self.uniform:
+            return self.rng.choice(ids)
+        return self.rng.choices(ids, cum_weights=cum_weights)[0]
+
+    def spawn(self, exclude=0) -> str:
+        ref_id = self.pick(*self.candidates(exclude))
+        self.change(ref_id, 1)
+        return ref_id
+
+    def replace(self, ref_id) -> str:
+        """ 换成其他任意一种怪物, 原来的怪物计数减一 """
+        self.change(ref_id, -1)
+        if ref_id not in self.others:
+            ids = [other for other in self.ids if other != ref_id]
+            self.others[ref_id] = ids, cumulative(ids, self.weight)
+        return self.pick(*self.others[ref_id])
+
+
+def cumulative(ids, weight) -> [float]:
+    result = []
+    total = 0
+    for ref_id in ids:
+        total += weight[ref_id]
+        result.append(total)
+    return result
@@ -1,39 +1,157 @@
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from core import swap_effect
 from domain.cell_vo import CellVO
 from util.logger import log
 
+PARALLEL_MIN_PAIRS = 2000  # 组合数少于该值时 进程间通信的开销大于收益, 仍然串行
+CHUNKS_PER_WORKER = 4
+
+worker_state = {}  # 进程池的每个进程中: 共享的字典, 当前搜索的 编号 快照 候选格子 以及组合
+
+
+def best_plan_to_swap(grid, pool=None, cache=None) -> (CellVO, CellVO):
+    """
+    :param pool: SearchPool 把候选组合分块交给进程池评估, 结果与串行一致
+    :param cache: PlanCache 盘面指纹相同时直接返回缓存的方案
+        只缓存评估收益得到的方案 (收益大于 0): 收益为 0 的方案要用 grid.rng 随机补全,
+        命中缓存会少一次随机数, 同一个种子的对局就会不同
+    """
+    if cache is None:
+        return search_plan(grid, pool)[0]
 
-def best_plan_to_swap(grid) -> (CellVO, CellVO):
+    key = cache.key(grid)
+    entry = cache.get(key)
+    if entry is not None:
+        return entry[0]
+    plan, effect = search_plan(grid, pool)
+    if effect > 0:
+        cache.put(key, plan, effect)
+    return plan
+
+
+def search_plan(grid, pool=None) -> ((CellVO, CellVO), int):
+    """ 返回 (交换方案, 收益) 不是通过评估收益得到的方案收益为 0 """
     cells = grid.get_complex_swap_choice()
-    log.debug('swap choice %s' % cells)
+    log.debug('swap choice %s', cells)
     if len(cells) == 0:
         monster = grid.get_simple_swap_choice()
-        log.debug('the way of find by simple %s' % monster)
+        log.debug('the way of find by simple %s', monster)
 
         if monster is None:
             log.info("can't find any swap")
         else:
             other_monster = grid.get_completion_one(monster)
-            return monster, other_monster
-        return ()
+            return (monster, other_monster), 0
+        return (), 0
 
     if len(cells) > 1:
-        max_effect = 0
-        cell_tuple = ()
-        for i in range(len(cells)):
-            for j in range(i + 1, len(cells) - 1):
-                log.debug('%s <-> %s' % (cells[i], cells[j]))
-                temp = grid.calculate_swap_effect(cells[i].index, cells[j].index)
-                if max_effect < temp:
-                    max_effect = temp
-                    cell_tuple = cells[i], cells[j]
+        pairs = candidate_pairs(len(cells))
+        if pool is not None and len(pairs) >= PARALLEL_MIN_PAIRS:
+            max_effect, position = pool.best_pair(grid.board_snapshot(), [cell.index for cell in cells])
+        else:
+            def evaluate(i, j):
+                log.debug('%s <-> %s', cells[i], cells[j])
+                return grid.calculate_swap_effect(cells[i].index, cells[j].index)
+
+            max_effect, position = best_pair(evaluate, pairs, 0, len(pairs))
         if max_effect != 0:
-            return cell_tuple
+            i, j = pairs[position]
+            return (cells[i], cells[j]), max_effect
 
     first = cells[0]
     cell = grid.get_completion_one(first)
-    log.debug('get one %s' % cell)
+    log.debug('get one %s', cell)
     if cell is not None:
         log.debug('random other to eliminate')
-        return first, cell
+        return (first, cell), 0
+
+    return (), 0
+
+
+def candidate_pairs(size) -> [(int, int)]:
+    """ 评估的组合顺序, 决定了收益相同时选哪一个 """
+    pairs = []
+    for i in range(size):
+        for j in range(i + 1, size - 1):
+            pairs.append((i, j))
+    return pairs
+
+
+def best_pair(evaluate, pairs, start, end) -> (int, int):
+    """ [start, end) 中收益最大且最靠前的组合 返回 (收益, 组合下标) 收益都不大于 0 时下标为 None """
+    max_effect = 0
+    position = None
+    for k in range(start, end):
+        effect = evaluate(*pairs[k])
+        if max_effect < effect:
+            max_effect = effect
+            position = k
+    return max_effect, position
+
+
+class SearchPool:
+    """
+    一局或一次推演中复用的进程池, 不再每次搜索都新建进程, 用完后调用 shutdown 或用 with 关闭
+    每次搜索把 (编号, 快照, 候选格子) 放进 Manager 共享的字典, 只序列化一次, 任务只带 (编号, 组合区间),
+    每个进程遇到新的编号时从共享字典取一次快照, 之后的区间直接使用
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.manager = multiprocessing.Manager()
+        self.shared = self.manager.dict()
+        self.search_ids = itertools.count()
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(self.shared,))
+
+    def best_pair(self, snapshot, indexes) -> (int, int):
+        search_id = next(self.search_ids)
+        self.shared['search'] = (search_id, snapshot, indexes)
+        size = len(candidate_pairs(len(indexes)))
+        chunk = max(1, -(-size // (self.workers * CHUNKS_PER_WORKER)))
+        futures = [self.executor.submit(evaluate_chunk, search_id, start, min(start + chunk, size))
+                   for start in range(0, size, chunk)]
+        results = [future.result() for future in futures]
+
+        max_effect = 0
+        position = None
+        for effect, k in results:
+            if max_effect < effect:
+                max_effect = effect
+                position = k
+        return max_effect, position
+
+    def shutdown(self):
+        self.executor.shutdown()
+        self.manager.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+
+def init_worker(shared):
+    worker_state['shared'] = shared
+    worker_state['search_id'] = None
+
+
+def evaluate_chunk(search_id, start, end) -> (int, int):
+    if worker_state['search_id'] != search_id:
+        published, snapshot, indexes = worker_state['shared']['search']
+        if published != search_id:
+            raise RuntimeError('search %s is no longer published' % search_id)
+        if worker_state.get('indexes') is None or len(worker_state['indexes']) != len(indexes):
+            worker_state['pairs'] = candidate_pairs(len(indexes))  # 同一局的候选数量变化不大, 数量相同时复用
+        worker_state.update(search_id=search_id, snapshot=snapshot, indexes=indexes)
+    snapshot = worker_state['snapshot']
+    indexes = worker_state['indexes']
+    pairs = worker_state['pairs']
+
+    def evaluate(i, j):
+        return swap_effect.evaluate_swap(snapshot, indexes[i], indexes[j])
 
-    return ()
+    return best_pair(evaluate, pairs, start, end)
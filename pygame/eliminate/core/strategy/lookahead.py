@@ -0,0 +1,157 @@
+"""
+    多步搜索策略 (beam search, samples 大于 1 时为 expectimax):
+        每一层只展开单步收益最高的 beam_width 个交换, 交换后掉落补充是随机的,
+        对每个交换采样 samples 次真实的连锁消除取平均, 作为机会节点的期望
+        默认 SAMPLES = 1, 机会节点只模拟一次随机补充, 实际是在一个随机的未来上做 beam search, 不是 expectimax:
+            采样 2 次时 10x10 的盘面在 TIME_BUDGET 内基本只能完整搜索 1 层, 需要期望时传入 samples 并放宽 time_budget
+        从 1 层开始迭代加深, 超出时间或节点预算时放弃正在搜索的那一层, 使用上一层完整搜索的结果
+        时间在 生成候选 (每个组合) 和 模拟消除 (每轮连锁) 中都会检查, 截止时间提前 UNWIND_RESERVE 留给回退,
+        模拟时最多展开 MAX_CASCADES 轮连锁, 之后的连锁只来自随机掉落, 对比较方案的帮助很小, 却占了模拟的大部分时间
+        默认参数下自带的盘面 (最大 10x10) 九成以上的步数能在 TIME_BUDGET 内完整搜索 2 层
+
+    搜索直接在 Grid 上 交换-消除-回退, 回退依赖 Grid.save_state / restore_state,
+    结束后盘面和 grid.rng 的状态都会恢复, 不影响之后的推演
+"""
+import itertools
+import time
+
+from core import swap_effect
+from core.strategy import high_order_first
+from domain.cell_vo import CellVO
+from util.logger import log
+
+DEPTH = 3
+BEAM_WIDTH = 2
+SAMPLES = 1  # 见模块说明, 大于 1 时才是对随机补充取期望
+CANDIDATES = 12  # 参与两两组合的候选格子数, 按权重取前面的
+MAX_CASCADES = 1  # 模拟时展开的连锁轮数, 没展开的连锁在下一层的交换中计入
+DISCOUNT = 0.9
+TIME_BUDGET = 0.05  # 每步的时间预算 秒
+UNWIND_RESERVE = 0.003  # 留给回退盘面和恢复随机数的时间 秒
+NODE_BUDGET = None  # 每步最多模拟的交换次数, None 为不限制
+
+clock = time.perf_counter  # 计时用的时钟, 测试中可以替换
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class Search:
+    def __init__(self, grid, beam_width, samples, time_budget, node_budget):
+        self.grid = grid
+        self.beam_width = beam_width
+        self.samples = samples
+        start = clock()
+        self.deadline = None if time_budget is None else start + time_budget - UNWIND_RESERVE
+        self.last_check = start
+        self.longest_step = 0  # 两次检查之间最长的间隔, 剩余时间不够再走一步时提前停止
+        self.node_budget = node_budget
+        self.nodes = 0
+        self.depth = 0  # 完整搜索过的层数
+        self.timed_out = False  # 是否因为时间预算停止
+
+    def tick(self):
+        """ 每次模拟交换计一个节点 """
+        self.nodes += 1
+        if self.node_budget is not None and self.nodes > self.node_budget:
+            raise BudgetExceeded()
+        self.check_time()
+
+    def check_time(self):
+        if self.deadline is None:
+            return
+        now = clock()
+        self.longest_step = max(self.longest_step, now - self.last_check)
+        self.last_check = now
+        if now + self.longest_step > self.deadline:
+            self.timed_out = True
+            raise BudgetExceeded()
+
+    def candidate_moves(self, timed=True) -> [(int, CellVO, CellVO)]:
+        """
+        单步收益最高的 beam_width 个交换 [(收益, cell, cell)]
+        :param timed: 根节点的候选不检查时间, 时间不够时至少还能退化为单步贪心
+        """
+        cells = self.grid.get_complex_swap_choice()[:CANDIDATES]
+        snapshot = self.grid.board_snapshot()
+        moves = []
+        for one, other in itertools.combinations(cells, 2):
+            if timed:
+                self.check_time()
+            effect = swap_effect.evaluate_swap(snapshot, one.index, other.index)
+            if effect > 0:
+                moves.append((effect, one, other))
+        moves.sort(key=lambda move: move[0], reverse=True)
+        return moves[:self.beam_width]
+
+    def value(self, depth) -> float:
+        """ 当前盘面往后 depth 步能得到的最大期望收益 """
+        if depth == 0:
+            return 0
+        best = 0
+        for effect, one, other in self.candidate_moves():
+            best = max(best, self.expect(one, other, depth))
+        return best
+
+    def expect(self, one, other, depth) -> float:
+        """ 机会节点: 多次采样交换后的随机补充 """
+        state = self.grid.save_state()
+        total = 0
+        for i in range(self.samples):
+            self.tick()
+            before = soldier_reward(self.grid)
+            self.grid.swap_and_eliminate((one, other), MAX_CASCADES)
+            total += soldier_reward(self.grid) - before + DISCOUNT * self.value(depth - 1)
+            self.grid.restore_state(state)
+        return total / self.samples
+
+    def best_move(self, moves, depth) -> (CellVO, CellVO):
+        best = None
+        best_value = None
+        for effect, one, other in moves:
+            value = self.expect(one, other, depth)
+            if best_value is None or best_value < value:
+                best_value = value
+                best = one, other
+        return best
+
+
+def soldier_reward(grid) -> int:
+    """ 上场士兵按品质加权的总数 """
+    totals = grid.soldiers.order_totals()
+    return sum(totals[slot] * (slot + 1) ** 3 for slot in range(len(totals)))
+
+
+def best_plan_to_swap(grid, depth=DEPTH, beam_width=BEAM_WIDTH, samples=SAMPLES,
+                      time_budget=TIME_BUDGET, node_budget=NODE_BUDGET) -> (CellVO, CellVO):
+    return search_plan(grid, depth, beam_width, samples, time_budget, node_budget)[0]
+
+
+def search_plan(grid, depth=DEPTH, beam_width=BEAM_WIDTH, samples=SAMPLES,
+                time_budget=TIME_BUDGET, node_budget=NODE_BUDGET) -> ((CellVO, CellVO), Search):
+    """ 返回 (交换方案, 搜索), search.depth 为完整搜索过的层数, 没有候选交换时为 0 """
+    search = Search(grid, beam_width, samples, time_budget, node_budget)
+    moves = search.candidate_moves(timed=False)
+    if len(moves) == 0:
+        return high_order_first.best_plan_to_swap(grid), search
+
+    best = moves[0][1], moves[0][2]  # 时间不够一层时退化为单步贪心
+    root_state = grid.save_state()
+    random_state = grid.rng.getstate()
+    profiler, trace, move_log = grid.profiler, grid.trace, grid.move_log  # 搜索中模拟的消除不计入统计和对局记录
+    grid.profiler = grid.trace = grid.move_log = None
+    grid.cascade_check = search.check_time
+    try:
+        for current in range(1, depth + 1):
+            best = search.best_move(moves, current)
+            search.depth = current
+    except BudgetExceeded:
+        grid.restore_state(root_state)
+    finally:
+        grid.rng.setstate(random_state)
+        grid.profiler, grid.trace, grid.move_log = profiler, trace, move_log
+        grid.cascade_check = None
+
+    log.debug('lookahead depth=%s nodes=%s plan=%s', search.depth, search.nodes, best)
+    return best, search
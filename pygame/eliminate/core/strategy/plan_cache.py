@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+
+class PlanCache:
+    """
+    盘面指纹 -> (最佳交换方案, 收益) 的 LRU 缓存
+    key 为 (row, col, fingerprint), 超过 max_size 时淘汰最久未使用的
+    """
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.plans)
+
+    @staticmethod
+    def key(grid) -> (int, int, int):
+        return grid.row, grid.col, grid.get_fingerprint()
+
+    def get(self, key):
+        """ 未命中返回 None, 命中返回 (plan, effect) """
+        entry = self.plans.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.plans.move_to_end(key)
+        return entry
+
+    def put(self, key, plan, effect):
+        self.plans[key] = (plan, effect)
+        self.plans.move_to_end(key)
+        if len(self.plans) > self.max_size:
+            self.plans.popitem(last=False)
+
+    def stats(self) -> {}:
+        total = self.hits + self.misses
+        return {
+            'size': len(self.plans),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
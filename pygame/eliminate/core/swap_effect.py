@@ -0,0 +1,74 @@
+"""
+    不修改盘面的交换评估:
+        对盘面做一份不可变快照, 评估交换两个格子时只重新检查经过这两个格子的线,
+        其余线的收益直接沿用快照时的结果, 与 Grid.calculate_swap_effect 的计分一致
+    快照可以被 pickle, 能发给其他进程并行评估, 评估结果也可以按 (index, index) 缓存
+"""
+from core import detector
+from core.board import Board, STONE_KEY
+from domain.enum_type import CellType
+
+
+class BoardSnapshot:
+    __slots__ = ('row', 'col', 'keys', 'levels', 'lines', 'cell_lines', 'line_effects', 'total_effect')
+
+    def __init__(self, row, col, keys, levels, lines, cell_lines):
+        self.row = row
+        self.col = col
+        self.keys = tuple(keys)  # index -> key 石头为 STONE_KEY
+        self.levels = tuple(levels)  # index -> level
+        self.lines = tuple(tuple(indexes) for indexes in lines)
+        self.cell_lines = tuple(tuple(line_ids) for line_ids in cell_lines)
+
+        self.line_effects = tuple(line_effect([self.keys[index] for index in indexes],
+                                              [self.levels[index] for index in indexes]) for indexes in self.lines)
+        self.total_effect = sum(self.line_effects)
+
+    @classmethod
+    def from_grid(cls, grid):
+        if isinstance(grid.grid, Board):
+            levels = grid.grid.level
+        else:
+            levels = [cell.level if cell.get_type() == CellType.MONSTER else 0 for cell in grid.grid]
+        return cls(grid.row, grid.col, detector.grid_keys(grid), levels, grid.layout.line_tuples,
+                   grid.layout.cell_line_tuples)
+
+
+def can_swap(snapshot, index_one, index_other) -> bool:
+    key_one = snapshot.keys[index_one]
+    key_other = snapshot.keys[index_other]
+    return key_one != STONE_KEY and key_other != STONE_KEY and key_one != key_other
+
+
+def evaluate_swap(snapshot, index_one, index_other) -> int:
+    """ 交换后整盘可消除结构的收益, 不能交换时为 0 """
+    if not can_swap(snapshot, index_one, index_other):
+        return 0
+
+    keys = snapshot.keys
+    levels = snapshot.levels
+    line_ids = set(snapshot.cell_lines[index_one])
+    line_ids.update(snapshot.cell_lines[index_other])
+
+    effect = snapshot.total_effect
+    for line_id in line_ids:
+        swapped = [index_other if index == index_one else index_one if index == index_other else index
+                   for index in snapshot.lines[line_id]]
+        effect += line_effect([keys[index] for index in swapped], [levels[index] for index in swapped])
+        effect -= snapshot.line_effects[line_id]
+    return effect
+
+
+def line_effect(keys, levels) -> int:
+    """ 一条线上长度大于 2 的结构的收益: order^3 + (level 之和 - 3) * (order - 1)^3 """
+    effect = 0
+    start = 0
+    for i in range(1, len(keys) + 1):
+        if i < len(keys) and keys[i] == keys[start]:
+            continue
+        key = keys[start]
+        if key != STONE_KEY and i - start > 2:
+            order = key & 7
+            effect += order ** 3 + (sum(levels[start:i]) - 3) * (order - 1) ** 3
+        start = i
+    return effect
@@ -0,0 +1,138 @@
+"""
+    交换候选的索引, 随 Grid.check_eliminate 按变动的线和格子增量维护:
+        每条线的 可能消除的结构 (长度 1 或 2) 的前后格子是候选位置, 长度 2 的记 1 份权重, 长度 1 的记 1/2
+        (ref_id, order, index) 所有线上的权重之和大于 0.75 且 index 上是怪物时为一个候选
+        pairs: index -> 前后格子为 index 的长度 2 的结构, 即差 index 这一格就能消除
+        positions: 格子的 key -> 该 (ref_id, order) 怪物所在的 index
+    取候选只排序已有的候选, 与盘面大小无关; 顺序与逐个扫描 probably_eliminate 的旧实现一致:
+        按权重倒序, 权重相同时按 ref_id 第一次出现的位置, 再按候选第一次出现的位置 (线, 线内第几个结构, 前/后)
+"""
+from core import detector
+from core.board import Board, STONE_KEY
+from domain.cell_vo import CellVO
+
+THRESHOLD = 0.75
+
+
+class SwapIndex:
+    def __init__(self, grid):
+        size = grid.row * grid.col
+        # line_id -> ([((ref_id, order, index), 权重, 位置)], {ref_id: 位置}, [(index, [index])])
+        self.line_entries = [None] * len(grid.get_lines())
+        self.weights = {}  # (ref_id, order, index) -> {line_id: (权重, 第一次出现的位置)}
+        self.ref_first = {}  # ref_id -> {line_id: 第一次出现的位置}
+        self.candidates = {}  # (ref_id, order, index) -> 权重, 满足条件的候选
+        self.pairs = [{} for _ in range(size)]  # index -> {line_id: [[index]]}
+        self.positions = {}  # key -> {index}
+        self.cell_keys = [None] * size
+        self.ref_codes = detector.get_ref_codes(grid)
+
+    @classmethod
+    def from_grid(cls, grid):
+        swap_index = cls(grid)
+        swap_index.update(grid, range(len(grid.get_lines())), range(grid.row * grid.col))
+        return swap_index
+
+    def update(self, grid, line_ids, indexes):
+        """ 重新计算 line_ids 这些线的候选, 以及 indexes 这些格子的位置 """
+        for index in indexes:
+            self.update_position(grid, index)
+        for line_id in line_ids:
+            self.remove_line(grid, line_id)
+            self.add_line(grid, line_id, grid.line_states[line_id][1])
+
+    def update_position(self, grid, index):
+        if isinstance(grid.grid, Board):
+            key = grid.grid.key(index)
+        else:
+            key = detector.cell_key(grid.grid[index], self.ref_codes)
+        old = self.cell_keys[index]
+        if old == key:
+            return
+        if old is not None:
+            self.positions[old].discard(index)
+        self.cell_keys[index] = key
+        self.positions.setdefault(key, set()).add(index)
+
+    def add_line(self, grid, line_id, probablies):
+        contributions = []
+        refs = {}
+        pairs = []
+        for position in range(len(probablies)):
+            state = probablies[position]
+            refs.setdefault(state.ref_id, (line_id, position))
+            for side, neighbour in enumerate((state.get_pre(grid), state.get_next(grid))):
+                if neighbour is None:
+                    continue
+                weight = 1
+                if neighbour < 0:  # 单个格子的结构, 见 CellState.pre
+                    neighbour = ~neighbour
+                    weight = 1 / 2
+                else:
+                    pairs.append((neighbour, state.indexes))
+                contributions.append(((state.ref_id, state.order, neighbour), weight, (line_id, position, side)))
+
+        self.line_entries[line_id] = contributions, refs, pairs
+        for key, weight, pos in contributions:
+            lines = self.weights.setdefault(key, {})
+            if line_id in lines:
+                lines[line_id] = (lines[line_id][0] + weight, lines[line_id][1])
+            else:
+                lines[line_id] = (weight, pos)
+        for ref_id, pos in refs.items():
+            self.ref_first.setdefault(ref_id, {})[line_id] = pos
+        for neighbour, indexes in pairs:
+            self.pairs[neighbour].setdefault(line_id, []).append(indexes)
+        for key, weight, pos in contributions:
+            self.check(grid, key)
+
+    def remove_line(self, grid, line_id):
+        entry = self.line_entries[line_id]
+        if entry is None:
+            return
+        contributions, refs, pairs = entry
+        self.line_entries[line_id] = None
+        for key, weight, pos in contributions:
+            lines = self.weights.get(key)
+            if lines is not None and line_id in lines:
+                del lines[line_id]
+                if len(lines) == 0:
+                    del self.weights[key]
+        for ref_id in refs:
+            del self.ref_first[ref_id][line_id]
+        for neighbour, indexes in pairs:
+            self.pairs[neighbour].pop(line_id, None)
+        for key, weight, pos in contributions:
+            self.check(grid, key)
+
+    def check(self, grid, key):
+        lines = self.weights.get(key)
+        weight = 0 if lines is None else sum(value[0] for value in lines.values())
+        if weight > THRESHOLD and self.cell_keys[key[2]] != STONE_KEY:
+            self.candidates[key] = weight
+        else:
+            self.candidates.pop(key, None)
+
+    def swap_choice(self) -> [CellVO]:
+        """ 按权重倒序的候选 """
+        ref_first = {}
+        keys = []
+        for key in self.candidates:
+            if key[0] not in ref_first:
+                ref_first[key[0]] = min(self.ref_first[key[0]].values())
+            first = min(value[1] for value in self.weights[key].values())
+            keys.append((-self.candidates[key], ref_first[key[0]], first, key))
+        keys.sort(key=lambda item: item[:3])
+        return [CellVO(ref_id, order, index, -weight) for weight, _, _, (ref_id, order, index) in keys]
+
+    def nearby(self, index) -> [[int]]:
+        """ 前后格子为 index 的长度 2 的结构 """
+        result = []
+        for indexes_list in self.pairs[index].values():
+            result.extend(indexes_list)
+        return result
+
+    def positions_of(self, ref_id, order) -> [int]:
+        """ 该 (ref_id, order) 的怪物所在的 index, 升序 """
+        key = self.ref_codes[ref_id] << detector.ORDER_BITS | order.value
+        return sorted(self.positions.get(key, ()))
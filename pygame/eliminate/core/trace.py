@@ -0,0 +1,107 @@
+"""
+    紧凑的二进制对局记录, 推演时只追加字节, 之后可以离线渲染:
+        头部: b'ELTR' 版本 row col 怪物数, 之后每个怪物 ref_id 为 1 字节长度 + utf-8
+        每条记录: <hhH 交换的两个 index (初始盘面为 -1 -1) 连锁次数, 之后 row*col 个有符号字节
+            怪物为 ref_code << 3 | order, 石头为 -hp
+        怪物最多 detector.MAX_BYTE_REF_CODE (15) 种, 更多时建立记录就抛出 ValueError, 不会在对局中途出错
+
+    python -m core.trace game.trace
+"""
+import struct
+import sys
+
+from core import detector, render
+from core.board import Board
+from domain.enum_type import CellType
+
+MAGIC = b'ELTR'
+VERSION = 1
+HEADER = struct.Struct('<4sBHHB')
+RECORD = struct.Struct('<hhH')
+
+
+class MoveTrace:
+    def __init__(self, row, col, ref_ids):
+        if len(ref_ids) > detector.MAX_BYTE_REF_CODE:
+            raise ValueError('trace cell codes are signed bytes, %s monsters exceed the limit of %s'
+                             % (len(ref_ids), detector.MAX_BYTE_REF_CODE))
+        self.row = row
+        self.col = col
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, row, col, len(ref_ids)))
+        for ref_id in ref_ids:
+            encoded = ref_id.encode('utf-8')
+            self.data.append(len(encoded))
+            self.data.extend(encoded)
+
+    @classmethod
+    def for_grid(cls, grid):
+        return cls(grid.row, grid.col, detector.get_ref_ids(grid)[1:])
+
+    def record(self, grid, index_one=-1, index_other=-1, cascades=0):
+        self.data.extend(RECORD.pack(index_one, index_other, cascades))
+        self.data.extend(struct.pack('<%sb' % (self.row * self.col), *cell_codes(grid)))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.data)
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.data)
+
+
+def cell_codes(grid) -> [int]:
+    board = grid.grid
+    if isinstance(board, Board):
+        return [board.key(index) if board.is_monster(index) else -board.hp[index] for index in range(len(board))]
+    ref_codes = detector.get_ref_codes(grid)
+    return [-cell.hp if cell.get_type() == CellType.STONE else detector.cell_key(cell, ref_codes)
+            for cell in board]
+
+
+def read_trace(data) -> (int, int, [str], [(int, int, int, (int,))]):
+    """ 返回 (row, col, [ref_id], [(index_one, index_other, cascades, cell_codes)]) """
+    magic, version, row, col, count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a move trace')
+    offset = HEADER.size
+    ref_ids = [' ']
+    for i in range(count):
+        length = data[offset]
+        ref_ids.append(bytes(data[offset + 1:offset + 1 + length]).decode('utf-8'))
+        offset += 1 + length
+
+    cells = struct.Struct('<%sb' % (row * col))
+    records = []
+    while offset < len(data):
+        index_one, index_other, cascades = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        records.append((index_one, index_other, cascades, cells.unpack_from(data, offset)))
+        offset += cells.size
+    return row, col, ref_ids, records
+
+
+def cell_text(code, ref_ids) -> str:
+    if code < 0:
+        return str(-code)
+    return ref_ids[code >> detector.ORDER_BITS]
+
+
+def render_trace(data) -> str:
+    row, col, ref_ids, records = read_trace(data)
+    result = []
+    for index_one, index_other, cascades, codes in records:
+        if index_one < 0:
+            result.append('init')
+        else:
+            result.append('swap %s <-> %s cascades=%s' % (index_one, index_other, cascades))
+        result.append(render.table_text([cell_text(code, ref_ids) for code in codes], row, col))
+    return '\n'.join(result)
+
+
+def main():
+    with open(sys.argv[1], 'rb') as file:
+        print(render_trace(file.read()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+    Zobrist 盘面指纹:
+        每个 (index, 格子的值) 对应一个固定的 64 位随机数, 盘面指纹为所有格子随机数的异或
+        格子变化时只需异或掉旧值再异或上新值, 相同的盘面得到相同的指纹
+    随机数使用独立的 Random 按需生成, 不影响全局 random 的序列
+    table 在进程内共享且不清理, 大小有上限: 最大盘面的格子数 * (怪物种类 * 品质 5 * 出现过的等级数 + 石头血量 7 种),
+        等级只在合成时增长, 32x32 的盘面 3 种怪物, 10 个等级约 16 万项 (约 30 MB), 一般的对局远小于这个值
+"""
+import random
+
+from core.board import Board
+from domain.enum_type import CellType
+
+SEED = 20180808
+STONE = '#'
+
+table = {}  # (index, value) -> 64 bit
+table_random = random.Random(SEED)
+
+
+def cell_value(grid, index) -> (str, int, int):
+    """ 怪物为 (ref_id, order, level) 石头为 (STONE, 0, hp) """
+    board = grid.grid
+    if isinstance(board, Board):
+        if board.is_monster(index):
+            return board.ref_ids[board.ref_code[index]], board.order[index], board.level[index]
+        return STONE, 0, board.hp[index]
+
+    cell = board[index]
+    if cell.get_type() == CellType.STONE:
+        return STONE, 0, cell.hp
+    return cell.ref_id, cell.order.value, cell.level
+
+
+def cell_hash(grid, index) -> int:
+    key = (index, cell_value(grid, index))
+    value = table.get(key)
+    if value is None:
+        value = table_random.getrandbits(64)
+        table[key] = value
+    return value
+
+
+def board_hash(grid) -> [int]:
+    return [cell_hash(grid, index) for index in range(len(grid.grid))]
@@ -28,10 +28,11 @@ class CellType(Enum):
 
 class StrategyType(Enum):
     HIGH_ORDER_FIRST = 1
+    LOOKAHEAD = 2
 
 
-def random_order_type():
-    return random.choice(list(OrderType.__members__.values()))
+def random_order_type(rng=random):
+    return rng.choice(list(OrderType.__members__.values()))
 
 
 def min_order_type():
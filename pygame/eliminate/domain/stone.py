@@ -1,6 +1,6 @@
 import random
 
-from core.grid import CellType
+from domain.enum_type import CellType
 
 
 class Stone:
@@ -12,8 +12,8 @@ class Stone:
         return 'stone: index=' + str(self.index) + ' hp=' + str(self.hp)
 
     @staticmethod
-    def random_hp():
-        return int(random.random() * 7 + 1)
+    def random_hp(rng=random):
+        return int(rng.random() * 7 + 1)
 
     @staticmethod
     def get_type():
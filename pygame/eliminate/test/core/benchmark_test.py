@@ -0,0 +1,38 @@
+import unittest
+
+from core import benchmark
+from domain.enum_type import CellType
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_synthetic_config(self):
+        config = benchmark.synthetic_config(16, 16)
+        self.assertEqual(len(config['data']), 256)
+        self.assertEqual(config, benchmark.synthetic_config(16, 16))
+        self.assertIn(CellType.STONE.value, config['data'])
+
+    def test_run_suite(self):
+        current = benchmark.run_suite([0], [(12, 12)], repeat=2, warmup=0, moves=2, pair_limit=1000)
+        self.assertEqual(set(current['results']), {
+            'grid_0/check_eliminate', 'grid_0/synthesize_monster', 'grid_0/eliminate_monster',
+            'grid_0/best_plan_to_swap', 'grid_0/main_loop',
+            'synthetic_12x12/check_eliminate', 'synthetic_12x12/synthesize_monster',
+            'synthetic_12x12/eliminate_monster',
+        } - set(current['meta']['skipped']))
+        self.assertIn('grid_0/main_loop', current['results'])
+        self.assertIn('synthetic_12x12/best_plan_to_swap', current['meta']['skipped'])
+        for value in current['results'].values():
+            self.assertGreater(value['median_ns'], 0)
+            self.assertLessEqual(value['min_ns'], value['median_ns'])
+            self.assertLessEqual(value['median_ns'], value['p95_ns'])
+
+    def test_compare(self):
+        baseline = {'results': {'a': {'median_ns': 1000}, 'b': {'median_ns': 1000}}}
+        current = {'results': {'a': {'median_ns': 1100}, 'b': {'median_ns': 1300}, 'c': {'median_ns': 5000}}}
+        regressions = benchmark.compare(current, baseline, 0.2)
+        self.assertEqual([regression['name'] for regression in regressions], ['b'])
+        self.assertAlmostEqual(regressions[0]['ratio'], 1.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
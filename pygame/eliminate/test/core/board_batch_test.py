@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from core import board_batch, simulation
+from core.grid import Grid
+from core.main_config import MainConfig
+from domain.enum_type import CellType
+from test.core.fixture import GRID_8X8
+
+
+class TestBoardBatch(unittest.TestCase):
+    def check_boards(self, config, boards):
+        data = config['data']
+        for i in range(len(boards)):
+            codes = [int(code) for code in boards[i]]
+            for index in range(len(data)):
+                if data[index] == CellType.STONE.value:
+                    self.assertTrue(-7 <= codes[index] <= -1)
+                else:
+                    self.assertGreater(codes[index], 0)
+
+            grid = Grid(compact=i % 2 == 0, grid_config=config)
+            grid.init_from_codes(boards[i])
+            self.assertEqual(grid.direct_states, {})
+            self.assertEqual(sum(grid.type_count.values()), data.count(CellType.MONSTER.value))
+
+    def test_generate(self):
+        boards = board_batch.generate(3, 50, seed=1)
+        self.assertEqual(len(boards), 50)
+        self.check_boards(MainConfig().grids[3], boards)
+
+    def test_generate_without_numpy(self):
+        with mock.patch.object(board_batch, 'np', None):
+            boards = board_batch.generate_boards(GRID_8X8, MainConfig().monsters, 20, board_batch.new_rng(1))
+        self.check_boards(GRID_8X8, boards)
+
+    def test_too_many_monsters(self):
+        configs = MainConfig()
+        monsters = [{'id': 'M%s' % i} for i in range(16)]
+        with self.assertRaises(ValueError):
+            board_batch.generate_boards(configs.grids[3], monsters, 2, board_batch.new_rng(0))
+        boards = board_batch.generate_boards(configs.grids[3], monsters[:15], 2, board_batch.new_rng(0))
+        self.assertEqual(max(int(code) for board in boards for code in board) >> 3, 15)
+
+    def test_stream(self):
+        with tempfile.TemporaryDirectory() as path:
+            file_name = os.path.join(path, 'boards.bin')
+            board_batch.save(file_name, 1, 10, seed=2, chunk=3)
+            boards = list(board_batch.iter_boards(file_name))
+            grid_id, loaded = board_batch.load(file_name)
+            self.assertEqual(grid_id, 1)
+            self.assertEqual(len(boards), 10)
+            self.assertEqual([list(board) for board in boards], [[int(code) for code in board] for board in loaded])
+
+            results = simulation.run_batch(4, loop=2, compact=True, boards_path=file_name)
+            self.assertEqual([result['grid_id'] for result in results], [1] * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
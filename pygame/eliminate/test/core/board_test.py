@@ -0,0 +1,49 @@
+import random
+import unittest
+
+from core.board import Board, STONE_KEY
+from core.grid import Grid
+from domain.enum_type import OrderType, StrategyType
+from domain.monster import Monster
+from domain.stone import Stone
+
+
+def play(grid, loop):
+    result = []
+    grid.init_generate_grid()
+    for i in range(loop):
+        cells = grid.swap_by_strategy(StrategyType.HIGH_ORDER_FIRST)
+        if len(cells) == 0:
+            break
+        grid.swap_and_eliminate(cells)
+        result.append([cell.show() for cell in grid.grid])
+    return result
+
+
+class TestBoard(unittest.TestCase):
+    def test_view(self):
+        board = Board(['X', 'Y'])
+        board.append(Monster(0, 'Y', OrderType.C, 3))
+        board.append(Stone(1, 4))
+        board.append(Monster(2, 'Y', OrderType.C, 1))
+
+        self.assertEqual(len(board), 3)
+        self.assertEqual(board[0].show(), '[Y,C,3]')
+        self.assertEqual(board[1].hp, 4)
+        self.assertEqual(board.key(1), STONE_KEY)
+        self.assertTrue(board.is_same(0, 2))
+
+        board.swap(0, 1)
+        self.assertEqual(board[0].show(), '[__4__]')
+        self.assertEqual(board[1].index, 1)
+
+    def test_same_as_list(self):
+        random.seed(7)
+        expect = play(Grid(2), 5)
+        random.seed(7)
+        actual = play(Grid(2, compact=True), 5)
+        self.assertEqual(expect, actual)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from core import detector
+from core.grid import Grid
+
+
+def describe(line_states):
+    result = []
+    for eliminates, probablies in line_states:
+        result.append(([(s.ref_id, s.order, s.indexes) for s in eliminates],
+                       [(s.ref_id, s.order, s.indexes) for s in probablies]))
+    return result
+
+
+class TestDetector(unittest.TestCase):
+    def test_find_runs(self):
+        keys = [9, 9, -1, 9, 10, 10, 10, -1, -1]
+        self.assertEqual(detector.find_runs(keys), [(0, 2, 9), (3, 4, 9), (4, 7, 10)])
+
+    def test_same_as_scan_line(self):
+        for compact in (False, True):
+            grid = Grid(3, compact=compact)
+            grid.init_generate_grid()
+            grid.swap_monster(0, 1)
+            grid.swap_monster(11, 22)
+
+            expect = [grid.scan_line(direct, indexes) for direct, indexes in grid.get_lines()]
+            self.assertEqual(describe(expect), describe(detector.scan_lines(grid)))
+            self.assertEqual(describe(expect[3:5]), describe(detector.scan_lines(grid, [3, 4])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,19 @@
+"""
+    测试用的盘面配置, 格式与 json/grid.json 相同, 通过 Grid(grid_config=...) 使用
+    不放进 grid.json, 以免改变 simulation / benchmark 默认推演的盘面
+"""
+
+# 8x8, 4 块石头
+GRID_8X8 = {
+    'id': 4,
+    'row': 8,
+    'col': 8,
+    'data': [1, 1, 1, 1, 1, 1, 1, 1,
+             1, 1, 0, 1, 1, 1, 1, 1,
+             1, 1, 1, 1, 1, 0, 1, 1,
+             1, 1, 1, 1, 1, 1, 1, 1,
+             1, 1, 1, 1, 1, 1, 1, 1,
+             1, 1, 0, 1, 1, 1, 1, 1,
+             1, 1, 1, 1, 1, 0, 1, 1,
+             1, 1, 1, 1, 1, 1, 1, 1],
+}
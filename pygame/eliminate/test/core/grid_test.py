@@ -1,8 +1,40 @@
-from domain.enum_type import StrategyType
+import random
+
+from domain.enum_type import CellType, StrategyType
 from util.logger import log
 import unittest
 
 from core.grid import Grid
+from core.main_config import MainConfig
+from test.core.fixture import GRID_8X8
+
+
+def states_snapshot(grid):
+    result = []
+    for states in (grid.direct_states, grid.probably_eliminate):
+        for direct in states:
+            result.append([(direct, s.ref_id, s.order, list(s.indexes)) for s in states[direct]])
+    return result
+
+
+def eliminate_by_swap(grid, removes):
+    """ 旧的实现: 逐个交换冒泡下落 """
+    for index in removes:
+        cell = grid.grid[index]
+        cell.ref_id = ' '
+        grid.grid[index] = cell
+    space_indexes = []
+    for x in range(grid.col):
+        stack = []
+        for i in range(grid.row):
+            index = (grid.row - i - 1) * grid.col + x
+            if index in removes:
+                stack.append(index)
+            elif len(stack) != 0 and grid.swap_monster(index, stack[0]):
+                stack.pop(0)
+                stack.append(index)
+        space_indexes.extend(stack)
+    return space_indexes
 
 
 class TestGrid(unittest.TestCase):
@@ -50,6 +82,18 @@ class TestGrid(unittest.TestCase):
         for state in grid.direct_states:
             print(state, grid.direct_states[state])
 
+    def test_generate_without_retry(self):
+        for config in (MainConfig().grids[3], GRID_8X8):
+            for seed in range(20):
+                random.seed(seed)
+                grid = Grid(compact=seed % 2 == 1, grid_config=config)
+                grid.init_generate_grid()
+                self.assertEqual(grid.direct_states, {})
+                # 没有走 检查-替换 的循环时, 生成数量等于怪物格子数
+                monsters = [cell for cell in grid.grid if cell.get_type() == CellType.MONSTER]
+                self.assertEqual(sum(grid.type_count.values()), len(monsters))
+                self.assertLessEqual(max(grid.type_count.values()) - min(grid.type_count.values()), 3)
+
     def test_probably(self):
         grid = Grid(2)
         grid.init_generate_grid()
@@ -104,9 +148,43 @@ class TestGrid(unittest.TestCase):
 
         grid.show()
 
+    def test_incremental_check(self):
+        grid = Grid(2)
+        grid.init_generate_grid()
+        for i in range(5):
+            result = grid.swap_by_strategy(StrategyType.HIGH_ORDER_FIRST)
+            if len(result) == 0:
+                break
+            grid.swap_and_eliminate(result)
+
+            grid.check_eliminate()
+            incremental = states_snapshot(grid)
+            grid.line_states = None
+            grid.check_eliminate()
+            self.assertEqual(incremental, states_snapshot(grid))
+
+    def test_eliminate_monster(self):
+        for compact in (False, True):
+            for seed in range(20):
+                random.seed(seed)
+                expect = Grid(3, compact=compact)
+                expect.init_generate_grid()
+                random.seed(seed)
+                actual = Grid(3, compact=compact)
+                actual.init_generate_grid()
+
+                monsters = [cell.index for cell in expect.grid if cell.get_type() == CellType.MONSTER]
+                removes = random.sample(monsters, random.randint(1, 30))
+                self.assertEqual(eliminate_by_swap(expect, removes), actual.eliminate_monster(removes))
+                self.assertEqual([(cell.index, cell.show()) for cell in expect.grid],
+                                 [(cell.index, cell.show()) for cell in actual.grid])
+
     def test_main_loop(self):
+        # 结束时输出盘面, 但不改变共享 log 的级别
+        level = log.level
         grid = Grid()
         grid.main_loop(4, StrategyType.HIGH_ORDER_FIRST)
+        self.assertEqual(log.level, level)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,52 @@
+import unittest
+
+from core import layout
+from core.grid import Grid
+from domain.cell_state import CellState
+from domain.direct_type import DirectType
+from domain.enum_type import OrderType
+
+
+class TestLayout(unittest.TestCase):
+    def test_shared_by_shape(self):
+        self.assertIs(Grid(0).layout, Grid(0).layout)
+        self.assertIs(layout.get_layout(3, 5), layout.get_layout(3, 5))
+
+    def test_lines(self):
+        table = layout.get_layout(3, 4)
+        self.assertEqual(table.rows[1], [4, 5, 6, 7])
+        self.assertEqual(table.columns[2], [2, 6, 10])
+        self.assertIn([1, 6, 11], table.south_easts)
+        self.assertIn([3, 6, 9], table.north_easts)
+        # 每个格子在每个方向上恰好属于一条斜线
+        for diagonals in (table.south_easts, table.north_easts):
+            self.assertEqual(sorted(index for indexes in diagonals for index in indexes), list(range(12)))
+        for line_id, (direct, indexes) in enumerate(table.lines):
+            self.assertGreaterEqual(len(indexes), 3)
+            for index in indexes:
+                self.assertIn(line_id, table.cell_lines[index])
+
+    def test_neighbours(self):
+        table = layout.get_layout(4, 4)
+        self.assertEqual(sorted(table.neighbours(0)), [1, 4, 5])
+        self.assertEqual(sorted(table.neighbours(5)), [0, 1, 2, 4, 6, 8, 9, 10])
+        self.assertEqual(table.forward[DirectType.NORTH_EAST][3], 6)
+        self.assertEqual(table.backward[DirectType.NORTH_EAST][6], 3)
+        self.assertEqual(table.forward[DirectType.EAST][3], -1)
+        self.assertEqual(table.backward[DirectType.SOUTH_EAST][4], -1)
+
+    def test_pre_and_next(self):
+        grid = Grid(0)
+        # index 0 也是合法的前一个格子
+        state = CellState('a', [1, 2], OrderType.C, DirectType.EAST)
+        self.assertEqual((state.get_pre(grid), state.get_next(grid)), (0, 3))
+        state = CellState('a', [4, 8], OrderType.C, DirectType.SOUTH)
+        self.assertEqual((state.get_pre(grid), state.get_next(grid)), (0, 12))
+        state = CellState('a', [5], OrderType.C, DirectType.SOUTH_EAST)
+        self.assertEqual((state.get_pre(grid), state.get_next(grid)), (~0, ~10))
+        state = CellState('a', [4, 5], OrderType.C, DirectType.EAST)
+        self.assertEqual((state.get_pre(grid), state.get_next(grid)), (None, 6))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import random
+import unittest
+
+from core import simulation
+from core.grid import Grid
+from core.profiler import PhaseProfiler
+from domain.enum_type import StrategyType
+
+
+class TestPhaseProfiler(unittest.TestCase):
+    def test_record(self):
+        random.seed(4)
+        grid = Grid(1)
+        grid.profiler = PhaseProfiler()
+        generated = []
+        grid.profiler.on('generate', lambda phase, elapsed, result: generated.append(elapsed))
+        grid.init_generate_grid()
+
+        moves = 0
+        cascades = 0
+        for i in range(5):
+            cells = grid.swap_by_strategy(StrategyType.HIGH_ORDER_FIRST)
+            if len(cells) == 0:
+                break
+            moves += 1
+            cascades += grid.swap_and_eliminate(cells)
+
+        profile = grid.profiler.to_dict()
+        self.assertEqual(profile['counts']['swap'], moves)
+        self.assertEqual(profile['counts']['eliminate'], cascades)
+        self.assertEqual(len(generated), cascades)
+        self.assertEqual(sum(profile['cascades'].values()), moves)
+
+        merged = PhaseProfiler().merge(profile).merge(grid.profiler)
+        self.assertEqual(merged.counts['swap'], moves * 2)
+
+    def test_batch_export(self):
+        results = simulation.run_batch(2, grid_ids=[1], loop=3, profile=True)
+        summary = simulation.summarize(results)
+        self.assertEqual(sum(summary['profile']['cascades'].values()), summary['moves'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import random
+import tempfile
+import unittest
+
+from core import replay
+from core.grid import Grid
+from core.replay import MoveLog, ReplayMismatch
+from domain.enum_type import StrategyType
+
+
+def record(grid_id, seed, loop, compact=False) -> MoveLog:
+    grid = Grid(grid_id, compact=compact, rng=random.Random(seed))
+    grid.init_generate_grid()
+    grid.move_log = MoveLog(StrategyType.HIGH_ORDER_FIRST)
+    grid.move_log.start(grid)
+    for i in range(loop):
+        cells = grid.swap_by_strategy(StrategyType.HIGH_ORDER_FIRST)
+        if len(cells) == 0:
+            break
+        grid.swap_and_eliminate(cells)
+    return grid.move_log
+
+
+class TestReplay(unittest.TestCase):
+    def test_replay(self):
+        move_log = record(2, 5, 8)
+        self.assertEqual(len(move_log.moves), 8)
+        for compact in (False, True):
+            self.assertEqual(replay.replay(move_log, compact), 8)
+
+    def test_file(self):
+        move_log = record(1, 6, 5, compact=True)
+        with tempfile.TemporaryDirectory() as path:
+            file_name = os.path.join(path, 'game.moves')
+            move_log.save(file_name)
+            with open(file_name, 'rb') as file:
+                other = MoveLog.from_bytes(file.read())
+
+        self.assertEqual(other.strategy_type, StrategyType.HIGH_ORDER_FIRST)
+        self.assertEqual(other.initial, move_log.initial)
+        self.assertEqual(other.moves, move_log.moves)
+        self.assertEqual(replay.replay(other), 5)
+
+    def test_mismatch(self):
+        move_log = record(2, 7, 6)
+        index_one, index_other, digest = move_log.moves[3]
+        move_log.moves[3] = (index_one, index_other, bytes(16))
+        with self.assertRaises(ReplayMismatch) as context:
+            replay.replay(move_log)
+        self.assertEqual(context.exception.move, 3)
+
+        move_log = record(2, 7, 6)
+        index_one, index_other, digest = move_log.moves[2]
+        move_log.moves[2] = (index_other, index_one, digest)
+        with self.assertRaises(ReplayMismatch) as context:
+            replay.replay(move_log)
+        self.assertEqual(context.exception.move, 2)
+
+    def test_rng(self):
+        # 每个 Grid 使用自己的 rng 时, 与全局 random 的状态无关
+        random.seed(1)
+        one = record(0, 11, 5)
+        random.seed(2)
+        other = record(0, 11, 5)
+        self.assertEqual(one.initial, other.initial)
+        self.assertEqual(one.moves, other.moves)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from core import simulation
+from core.strategy import high_order_first
+
+
+class TestSimulation(unittest.TestCase):
+    def test_same_seed_same_result(self):
+        first = simulation.run_batch(4, grid_ids=[0, 1], seed=5, loop=5)
+        second = simulation.run_batch(4, grid_ids=[0, 1], seed=5, loop=5, workers=2)
+        for a, b in zip(first, second):
+            self.assertEqual((a['grid_id'], a['moves'], a['cascades'], a['soldiers']),
+                             (b['grid_id'], b['moves'], b['cascades'], b['soldiers']))
+
+    def test_search_pool(self):
+        min_pairs = high_order_first.PARALLEL_MIN_PAIRS
+        high_order_first.PARALLEL_MIN_PAIRS = 0
+        try:
+            first = simulation.run_batch(2, grid_ids=[3], seed=2, loop=3)
+            second = simulation.run_batch(2, grid_ids=[3], seed=2, loop=3, search_workers=2)
+        finally:
+            high_order_first.PARALLEL_MIN_PAIRS = min_pairs
+        for a, b in zip(first, second):
+            self.assertEqual((a['moves'], a['cascades'], a['soldiers']), (b['moves'], b['cascades'], b['soldiers']))
+        with self.assertRaises(ValueError):
+            simulation.run_batch(2, loop=1, workers=2, search_workers=2)
+
+    def test_export(self):
+        results = simulation.run_batch(2, grid_ids=[1], loop=3)
+        with tempfile.TemporaryDirectory() as path:
+            simulation.write_csv(results, os.path.join(path, 'result.csv'))
+            simulation.write_json(results, os.path.join(path, 'result.json'))
+
+            with open(os.path.join(path, 'result.csv')) as file:
+                self.assertEqual(len(list(csv.DictReader(file))), 2)
+            with open(os.path.join(path, 'result.json')) as file:
+                summary = json.load(file)['summary']
+        self.assertEqual(summary['games'], 2)
+        self.assertEqual(summary['production']['total'], summary['soldiers'])
+        self.assertEqual(sum(summary['production']['orders'].values()), summary['soldiers'])
+
+
+if __name__ == '__main__':
+    unittest.main()
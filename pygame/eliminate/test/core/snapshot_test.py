@@ -0,0 +1,56 @@
+import os
+import random
+import tempfile
+import unittest
+
+from core import snapshot
+from core.grid import Grid
+from domain.enum_type import StrategyType
+
+
+def play(grid, loop) -> [str]:
+    result = []
+    for i in range(loop):
+        cells = grid.swap_by_strategy(StrategyType.HIGH_ORDER_FIRST)
+        if len(cells) == 0:
+            break
+        grid.swap_and_eliminate(cells)
+        result.append(''.join(str(cell.simple_show()) for cell in grid.grid))
+    result.append(str(sorted((str(key), soldier.count) for key, soldier in grid.soldiers.items())))
+    return result
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_resume(self):
+        for compact in (False, True):
+            random.seed(8)
+            grid = Grid(2, compact=compact)
+            grid.init_generate_grid()
+            play(grid, 3)
+            data = grid.snapshot()
+            expect = play(grid, 5)
+
+            for other_compact in (False, True):
+                random.seed(100)
+                other = Grid.from_snapshot(data, compact=other_compact)
+                self.assertEqual(play(other, 5), expect)
+
+    def test_file(self):
+        random.seed(9)
+        grid = Grid(1)
+        grid.init_generate_grid()
+        play(grid, 2)
+        with tempfile.TemporaryDirectory() as path:
+            file_name = os.path.join(path, 'game.snapshot')
+            snapshot.save(grid, file_name, with_random=False)
+            other = snapshot.load(Grid(1, compact=True), file_name)
+
+        self.assertEqual([cell.show() for cell in other.grid], [cell.show() for cell in grid.grid])
+        self.assertEqual(other.type_count, grid.type_count)
+        self.assertEqual(sorted(map(repr, other.soldiers.values())), sorted(map(repr, grid.soldiers.values())))
+        self.assertEqual(other.get_fingerprint(), grid.get_fingerprint())
+        self.assertRaises(ValueError, snapshot.restore, Grid(0), grid.snapshot())
+
+
+if __name__ == '__main__':
+    unittest.main()
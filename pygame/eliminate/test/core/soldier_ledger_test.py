@@ -0,0 +1,48 @@
+import pickle
+import unittest
+
+from core.soldier_ledger import SoldierLedger
+from domain.enum_type import OrderType
+
+
+class TestSoldierLedger(unittest.TestCase):
+    def test_record(self):
+        ledger = SoldierLedger(['a', 'b'])
+        ledger.record('a', OrderType.E, 1)
+        ledger.record('a', OrderType.E, 1)
+        ledger.record('b', OrderType.C, 4)
+        ledger.record('b', OrderType.C, 12)
+
+        self.assertEqual(ledger.count('a', OrderType.E, 0), 2)
+        self.assertEqual(ledger.count('b', OrderType.C, 3), 4)
+        self.assertEqual(ledger.count('b', OrderType.C, 11), 12)
+        self.assertEqual(ledger.count('b', OrderType.A, 40), 0)
+        self.assertEqual(ledger.total(), 18)
+        self.assertEqual(len(ledger), 3)
+        self.assertEqual(ledger.order_totals(), [2, 0, 16, 0, 0])
+        self.assertEqual([(key, soldier.count) for key, soldier in ledger.items()],
+                         [(('a', OrderType.E, 0), 2), (('b', OrderType.C, 3), 4), (('b', OrderType.C, 11), 12)])
+
+    def test_merge(self):
+        one = SoldierLedger(['a', 'b'])
+        one.record('a', OrderType.D, 2)
+        other = SoldierLedger(['a', 'b'])
+        other.record('a', OrderType.D, 2)
+        other.record('b', OrderType.B, 9)
+
+        merged = one.copy().merge(pickle.loads(pickle.dumps(other)))
+        self.assertEqual(one.total(), 2)
+        self.assertEqual(merged.count('a', OrderType.D, 1), 4)
+        self.assertEqual(merged.count('b', OrderType.B, 8), 9)
+        self.assertEqual(merged.stats(), {
+            'total': 13,
+            'monsters': {'a': 4, 'b': 9},
+            'orders': {'E': 0, 'D': 4, 'C': 0, 'B': 9, 'A': 0},
+            'levels': {1: 4, 8: 9},
+        })
+        with self.assertRaises(ValueError):
+            one.merge(SoldierLedger(['b', 'a']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import random
+import unittest
+
+from core.grid import Grid
+from core.spawn import SpawnEngine
+
+MONSTERS = [{'id': 'X'}, {'id': 'Y'}, {'id': 'Z'}, {'id': 'W'}]
+
+
+def naive_resources(type_count) -> [str]:
+    """ 原来逐次统计的实现 """
+    max_count = max(type_count.values())
+    result = [ref_id for ref_id in type_count if type_count[ref_id] != max_count]
+    return result or list(type_count)
+
+
+class TestSpawn(unittest.TestCase):
+    def test_same_as_naive(self):
+        engine = SpawnEngine(MONSTERS)
+        type_count = {monster['id']: 0 for monster in MONSTERS}
+        rng = random.Random(3)
+        for i in range(500):
+            if rng.random() < 0.2:
+                ref_id = rng.choice(MONSTERS)['id']
+                if type_count[ref_id] > 0:
+                    type_count[ref_id] -= 1
+                    engine.change(ref_id, -1)
+            self.assertEqual(engine.candidates()[0], naive_resources(type_count))
+            ref_id = engine.spawn()
+            type_count[ref_id] += 1
+            self.assertEqual(engine.counts, type_count)
+
+    def test_weights(self):
+        random.seed(1)
+        engine = SpawnEngine([{'id': 'X', 'weight': 3}, {'id': 'Y'}])
+        for i in range(400):
+            engine.spawn()
+        self.assertEqual(engine.counts, {'X': 300, 'Y': 100})
+        self.assertEqual(engine.replace('X'), 'Y')
+        self.assertEqual(engine.counts['X'], 299)
+
+    def test_invalid_weight(self):
+        for weight in (0, -1, 0.0):
+            with self.assertRaises(ValueError):
+                SpawnEngine([{'id': 'X', 'weight': weight}, {'id': 'Y'}])
+
+    def test_state_restore(self):
+        random.seed(5)
+        grid = Grid(1)
+        grid.init_generate_grid()
+        state = grid.save_state()
+        count = dict(grid.type_count)
+        for i in range(10):
+            grid.random_monster_ref()
+        grid.restore_state(state)
+        self.assertIs(grid.type_count, grid.spawner.counts)
+        self.assertEqual(grid.type_count, count)
+        self.assertEqual(grid.get_monster_resources(), naive_resources(count))
+
+
+if __name__ == '__main__':
+    unittest.main()
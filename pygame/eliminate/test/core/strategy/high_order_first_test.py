@@ -0,0 +1,37 @@
+import random
+import unittest
+
+from core.grid import Grid
+from core.strategy import high_order_first
+
+
+class TestHighOrderFirst(unittest.TestCase):
+    def test_parallel_same_as_serial(self):
+        min_pairs = high_order_first.PARALLEL_MIN_PAIRS
+        high_order_first.PARALLEL_MIN_PAIRS = 0
+        try:
+            # 同一个进程池依次完成多次搜索
+            with high_order_first.SearchPool(2) as pool:
+                # 快照每次搜索只发布一次, 任务只带 (编号, 区间)
+                submitted = []
+                submit = pool.executor.submit
+                pool.executor.submit = lambda function, *args: submitted.append(args) or submit(function, *args)
+                for seed in range(2):
+                    random.seed(seed)
+                    grid = Grid(3)
+                    grid.init_generate_grid()
+
+                    random.seed(seed)
+                    serial = high_order_first.best_plan_to_swap(grid)
+                    random.seed(seed)
+                    parallel = high_order_first.best_plan_to_swap(grid, pool)
+                    self.assertEqual([cell.index for cell in serial], [cell.index for cell in parallel])
+                self.assertGreater(len(submitted), 2)
+                self.assertTrue(all(all(isinstance(arg, int) for arg in args) for args in submitted))
+                self.assertEqual(len({args[0] for args in submitted}), 2)
+        finally:
+            high_order_first.PARALLEL_MIN_PAIRS = min_pairs
+
+
+if __name__ == '__main__':
+    unittest.main()
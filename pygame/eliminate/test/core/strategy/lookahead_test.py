@@ -0,0 +1,69 @@
+import random
+import unittest
+from unittest import mock
+
+from core.grid import Grid
+from core.strategy import lookahead
+from domain.enum_type import StrategyType
+from test.core.fixture import GRID_8X8
+
+
+class TestLookahead(unittest.TestCase):
+    def test_not_mutate(self):
+        random.seed(2)
+        grid = Grid(compact=True, grid_config=GRID_8X8)
+        grid.init_generate_grid()
+        before = [cell.show() for cell in grid.grid]
+        state = random.getstate()
+
+        plan = lookahead.best_plan_to_swap(grid, node_budget=40, time_budget=None)
+        self.assertEqual(len(plan), 2)
+        self.assertEqual(before, [cell.show() for cell in grid.grid])
+        self.assertEqual(state, random.getstate())
+
+        # 节点预算是确定的
+        self.assertEqual([cell.index for cell in plan],
+                         [cell.index for cell in lookahead.best_plan_to_swap(grid, node_budget=40, time_budget=None)])
+
+    def test_time_budget(self):
+        # 假的时钟每读一次前进 1 毫秒, 候选生成和每轮连锁都会检查时间, 停止时不会超过截止时间
+        ticks = []
+
+        def clock():
+            ticks.append(len(ticks) * 0.001)
+            return ticks[-1]
+
+        random.seed(4)
+        grid = Grid(compact=True, grid_config=GRID_8X8)
+        grid.init_generate_grid()
+        with mock.patch.object(lookahead, 'clock', clock):
+            plan, search = lookahead.search_plan(grid)
+        self.assertEqual(len(plan), 2)
+        self.assertTrue(search.timed_out)
+        self.assertLessEqual(ticks[-1], lookahead.TIME_BUDGET - lookahead.UNWIND_RESERVE)
+        self.assertGreaterEqual(search.depth, 1)
+
+        plan, search = lookahead.search_plan(grid, time_budget=None)
+        self.assertFalse(search.timed_out)
+        self.assertEqual(search.depth, lookahead.DEPTH)
+
+    def test_depth_two(self):
+        # 默认参数完整搜索 2 层需要的交换次数: 第 1 层 beam_width * samples, 第 2 层再重复一遍并展开每个交换
+        width = lookahead.BEAM_WIDTH * lookahead.SAMPLES
+        node_budget = width + width * (1 + width)
+        grid = Grid(compact=True, rng=random.Random(4), grid_config=GRID_8X8)
+        grid.init_generate_grid()
+        for i in range(5):
+            plan, search = lookahead.search_plan(grid, time_budget=None, node_budget=node_budget)
+            self.assertEqual(len(plan), 2)
+            self.assertGreaterEqual(search.depth, 2)
+            self.assertLessEqual(search.nodes, node_budget + 1)
+            grid.swap_and_eliminate(plan)
+
+    def test_main_loop(self):
+        grid = Grid(1, compact=True)
+        grid.main_loop(4, StrategyType.LOOKAHEAD)
+
+
+if __name__ == '__main__':
+    unittest.main()
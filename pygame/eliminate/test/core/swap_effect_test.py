@@ -0,0 +1,57 @@
+import pickle
+import random
+import unittest
+
+from core import swap_effect
+from core.grid import Grid
+from domain.enum_type import CellType
+
+
+def effect_by_swap(grid, index_one, index_other):
+    """ 旧的实现: 真实交换后全盘检查再换回来 """
+    if not grid.swap_monster(index_one, index_other):
+        return 0
+    grid.check_eliminate()
+    effect = 0
+    for direct in grid.direct_states:
+        for state in grid.direct_states[direct]:
+            target_level = sum(grid.grid[index].level for index in state.indexes)
+            effect += state.order.value ** 3 + (target_level - 3) * (state.order.value - 1) ** 3
+    grid.swap_monster(index_one, index_other)
+    return effect
+
+
+class TestSwapEffect(unittest.TestCase):
+    def test_same_as_swap(self):
+        random.seed(3)
+        grid = Grid(2)
+        # 不去除初始的三消, 快照里其他线上已有的结构也要计分
+        for index in range(len(grid.current_grid['data'])):
+            if grid.current_grid['data'][index] == CellType.MONSTER.value:
+                grid.grid.append(grid.create_monster(index))
+            else:
+                grid.grid.append(grid.create_stone(index))
+
+        snapshot = grid.board_snapshot()
+        for i in range(len(grid.grid)):
+            for j in range(i + 1, len(grid.grid)):
+                self.assertEqual(effect_by_swap(grid, i, j), swap_effect.evaluate_swap(snapshot, i, j))
+
+    def test_not_mutate(self):
+        grid = Grid(1)
+        grid.init_generate_grid()
+        grid.check_eliminate()
+        before = [cell.show() for cell in grid.grid]
+        probably = grid.probably_eliminate
+
+        for i in range(len(grid.grid) - 1):
+            grid.calculate_swap_effect(i, i + 1)
+        self.assertEqual(before, [cell.show() for cell in grid.grid])
+        self.assertIs(probably, grid.probably_eliminate)
+
+        snapshot = pickle.loads(pickle.dumps(grid.board_snapshot()))
+        self.assertEqual(snapshot.keys, grid.board_snapshot().keys)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import random
+import unittest
+
+from core.grid import Grid
+from core.main_config import MainConfig
+from domain.enum_type import CellType, StrategyType
+from test.core.fixture import GRID_8X8
+
+
+def scan_choice(grid):
+    """ 旧的实现: 逐个扫描 probably_eliminate """
+    vo_dict = {}
+    for direct in grid.probably_eliminate:
+        for state in grid.probably_eliminate[direct]:
+            id_ = vo_dict.setdefault(state.ref_id, [])
+            for index in (state.get_pre(grid), state.get_next(grid)):
+                if index is not None:
+                    id_.append((state.order, index))
+
+    result = []
+    for ref_id in vo_dict:
+        temp = {}
+        for order, index in vo_dict[ref_id]:
+            base = 1
+            if index < 0:
+                index = ~index
+                base = 1 / 2
+            temp[(order, index)] = temp.get((order, index), 0) + base
+        for (order, index), weight in temp.items():
+            if weight > 0.75 and grid.grid[index].get_type() == CellType.MONSTER:
+                result.append((ref_id, order, index, weight))
+    return sorted(result, key=lambda item: item[3], reverse=True)
+
+
+def scan_nearby(grid, index):
+    result = []
+    for direct in grid.probably_eliminate:
+        for state in grid.probably_eliminate[direct]:
+            if index in (state.get_pre(grid), state.get_next(grid)):
+                result.append(state.indexes)
+    return result
+
+
+class TestSwapIndex(unittest.TestCase):
+    def check(self, grid):
+        cells = grid.get_complex_swap_choice()
+        self.assertEqual([(cell.ref_id, cell.order, cell.index, cell.weight) for cell in cells], scan_choice(grid))
+        for index in range(len(grid.grid)):
+            self.assertEqual(sorted(grid.get_swap_index().nearby(index)), sorted(scan_nearby(grid, index)))
+        for cell in cells:
+            positions = [monster.index for monster in grid.grid
+                         if monster.get_type() == CellType.MONSTER and monster.is_same(cell)]
+            self.assertEqual(grid.get_swap_index().positions_of(cell.ref_id, cell.order), positions)
+
+    def test_same_as_scan(self):
+        configs = MainConfig().grids
+        for config, compact in ((configs[1], False), (configs[2], True), (GRID_8X8, False)):
+            random.seed(config['id'])
+            grid = Grid(compact=compact, grid_config=config)
+            grid.init_generate_grid()
+            for i in range(8):
+                self.check(grid)
+                cells = grid.swap_by_strategy(StrategyType.HIGH_ORDER_FIRST)
+                if len(cells) == 0:
+                    break
+                grid.swap_and_eliminate(cells)
+
+    def test_restore(self):
+        random.seed(3)
+        grid = Grid(2)
+        grid.init_generate_grid()
+        state = grid.save_state()
+        grid.swap_and_eliminate(grid.swap_by_strategy(StrategyType.HIGH_ORDER_FIRST))
+        grid.restore_state(state)
+        self.check(grid)
+
+
+if __name__ == '__main__':
+    unittest.main()
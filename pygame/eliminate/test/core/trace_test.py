@@ -0,0 +1,56 @@
+import logging
+import os
+import random
+import tempfile
+import unittest
+
+from core import render, simulation
+from core.grid import Grid
+from core.trace import MoveTrace, read_trace, render_trace
+from domain.enum_type import StrategyType
+from util.logger import log
+
+
+class TestTrace(unittest.TestCase):
+    def test_lazy_render(self):
+        calls = []
+        level = log.level
+        log.setLevel(logging.WARNING)
+        try:
+            log.info('%s', render.LazyText(calls.append, 'table'))
+            self.assertEqual(calls, [])
+            log.warning('%s', render.LazyText(lambda: calls.append('table') or 'table'))
+            self.assertEqual(calls, ['table'])
+        finally:
+            log.setLevel(level)
+
+    def test_record_and_render(self):
+        for compact in (False, True):
+            random.seed(6)
+            grid = Grid(0, compact=compact)
+            grid.trace = MoveTrace.for_grid(grid)
+            grid.main_loop(3, StrategyType.HIGH_ORDER_FIRST)
+
+            row, col, ref_ids, records = read_trace(grid.trace.to_bytes())
+            self.assertEqual((row, col), (4, 4))
+            self.assertEqual(records[0][:2], (-1, -1))
+            self.assertEqual(render_trace(grid.trace.to_bytes()).count('┏'), len(records))
+
+            self.assertTrue(render_trace(grid.trace.to_bytes()).endswith(render.grid_table(grid)))
+
+    def test_too_many_monsters(self):
+        grid = Grid(0)
+        grid.configs.monsters = [{'id': 'M%s' % i} for i in range(16)]
+        with self.assertRaises(ValueError):
+            MoveTrace.for_grid(grid)
+        self.assertEqual(len(read_trace(MoveTrace(4, 4, ['M%s' % i for i in range(15)]).to_bytes())[2]), 16)
+
+    def test_batch_trace(self):
+        with tempfile.TemporaryDirectory() as path:
+            simulation.run_batch(1, grid_ids=[1], loop=2, trace_dir=path)
+            with open(os.path.join(path, 'game_0.trace'), 'rb') as file:
+                self.assertGreaterEqual(len(read_trace(file.read())[3]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import random
+import unittest
+from unittest import mock
+
+from core import zobrist
+from core.grid import Grid
+from core.strategy import high_order_first
+from core.strategy.plan_cache import PlanCache
+from domain.enum_type import StrategyType
+
+
+class TestZobrist(unittest.TestCase):
+    def test_incremental_fingerprint(self):
+        for compact in (False, True):
+            random.seed(11)
+            grid = Grid(2, compact=compact)
+            grid.init_generate_grid()
+            origin = grid.get_fingerprint()
+
+            self.assertTrue(grid.swap_monster(0, 1) or grid.swap_monster(0, 2) or grid.swap_monster(1, 2))
+            self.assertNotEqual(origin, grid.get_fingerprint())
+
+            for i in range(3):
+                cells = grid.swap_by_strategy(StrategyType.HIGH_ORDER_FIRST)
+                if len(cells) == 0:
+                    break
+                grid.swap_and_eliminate(cells)
+                expect = 0
+                for value in zobrist.board_hash(grid):
+                    expect ^= value
+                self.assertEqual(expect, grid.get_fingerprint())
+
+    def test_plan_cache(self):
+        cache = PlanCache(max_size=1)
+        grid = Grid(1, plan_cache=cache)
+        grid.init_generate_grid()
+
+        first = grid.swap_by_strategy(StrategyType.HIGH_ORDER_FIRST)
+        second = grid.swap_by_strategy(StrategyType.HIGH_ORDER_FIRST)
+        self.assertIs(first, second)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+        cache.put((0, 0, 0), (), 0)
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get(PlanCache.key(grid)))
+
+    def test_random_plan_not_cached(self):
+        # 没有可评估的组合时随机补全, 收益为 0 的方案不缓存, 有无缓存时 rng 的序列相同
+        states = []
+        for cache in (None, PlanCache()):
+            random.seed(3)
+            grid = Grid(1, rng=random.Random(5))
+            grid.init_generate_grid()
+            with mock.patch.object(grid, 'get_complex_swap_choice', return_value=[]):
+                plans = [high_order_first.best_plan_to_swap(grid, cache=cache) for i in range(3)]
+            self.assertEqual(len(plans[0]), 2)
+            states.append((grid.rng.getstate(), [[cell.index for cell in plan] for plan in plans]))
+            if cache is not None:
+                self.assertEqual(len(cache), 0)
+        self.assertEqual(states[0], states[1])
+
+
+if __name__ == '__main__':
+    unittest.main()